@@ -8,7 +8,7 @@ TPM_KEY_HANDLE="${TPM_KEY_HANDLE:-0x81000000}"
 CONFIG_FILE="/etc/greengrass/config.yaml"
 
 # Paths
-GGL_WORKSPACE="/tmp/aws-greengrass-testing-workspace/aws-greengrass-lite"
+GGL_WORKSPACE="${GGL_WORKSPACE_DIR:-/tmp/aws-greengrass-testing-workspace}/aws-greengrass-lite"
 CLAIM_SCRIPT="${GGL_WORKSPACE}/docs/fleet_provisioning/generate_claim_tpm.sh"
 TEMP_DIR="${GGL_WORKSPACE}/TPMFleetCerts"
 
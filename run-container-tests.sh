@@ -40,6 +40,8 @@ for category in "${CATEGORIES[@]}"; do
             -e COMMIT_ID \
             -e AWS_ACCOUNT \
             -e S3_BUCKET \
+            -e GGL_BUILD_CACHE_DIR=/var/cache/aws-greengrass-testing \
+            -v "${GGL_BUILD_CACHE_VOLUME:-ggl-build-cache}:/var/cache/aws-greengrass-testing" \
             -v "$PWD:/aws-greengrass-testing:ro" \
             --name "$CONTAINER_NAME" \
             buildtestcontainer:latest
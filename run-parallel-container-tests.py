@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Run the test categories in several containers at once.
+
+Tests are spread over the containers longest-processing-time first, using
+the durations measured by earlier runs, so every container finishes at about
+the same time. Each container runs its tests through run-tests.sh, one call
+per category, and the results are merged into a single report.
+
+    ./run-parallel-container-tests.py --jobs 4 --categories component,deployment
+"""
+import argparse
+import heapq
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+CATEGORIES = ["security", "runtime", "component", "deployment", "fleet-status"]
+IMAGE = "buildtestcontainer:latest"
+BUILD_CACHE_MOUNT = "/var/cache/aws-greengrass-testing"
+# Durations of earlier runs, by category and test name.
+HISTORY_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "aws-greengrass-testing", "test-durations.json")
+DEFAULT_DURATION = 300    # seconds, for tests without history
+HISTORY_WEIGHT = 0.5    # weight of the previous duration when updating history
+
+TEST_FUNCTION = re.compile(r"^def (test_\w+)\(", re.M)
+TEST_STARTED = re.compile(r"^Starting test suite for: (\S+)")
+TEST_FAILED = re.compile(r"^Test suite failed: (\S+)")
+REPORT_STARTED = "TEST EXECUTION REPORT"
+
+_print_lock = threading.Lock()
+
+
+class TestCase(NamedTuple):
+    category: str
+    name: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.category}::{self.name}"
+
+
+class TestResult(NamedTuple):
+    test: TestCase
+    passed: bool
+    duration: float
+    shard: int
+
+
+def _log(message: str):
+    with _print_lock:
+        print(message, flush=True)
+
+
+def discover_tests(categories: List[str],
+                   names: Optional[List[str]] = None) -> List[TestCase]:
+    tests = []
+    for category in categories:
+        path = f"./src/aws-greengrass-testing-{category}.py"
+        with open(path, 'r') as f:
+            found = TEST_FUNCTION.findall(f.read())
+        tests += [
+            TestCase(category, name) for name in found
+            if names is None or name in names
+        ]
+    return tests
+
+
+def load_history(path: str) -> Dict[str, float]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_history(path: str, history: Dict[str, float],
+                 results: List[TestResult]):
+    for result in results:
+        previous = history.get(result.test.key)
+        history[result.test.key] = (result.duration if previous is None else
+                                    HISTORY_WEIGHT * previous +
+                                    (1 - HISTORY_WEIGHT) * result.duration)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def schedule(tests: List[TestCase], history: Dict[str, float],
+             shards: int) -> List[List[TestCase]]:
+    """Assign tests to shards, longest first, each to the shard with the
+    least expected work so far."""
+    default = (statistics.median(history.values())
+               if history else DEFAULT_DURATION)
+    expected = {test: history.get(test.key, default) for test in tests}
+    loads = [(0.0, shard) for shard in range(shards)]
+    assigned: List[List[TestCase]] = [[] for _ in range(shards)]
+    for test in sorted(tests, key=lambda test: expected[test], reverse=True):
+        load, shard = heapq.heappop(loads)
+        assigned[shard].append(test)
+        heapq.heappush(loads, (load + expected[test], shard))
+    for shard, shard_tests in enumerate(assigned):
+        if shard_tests:
+            total = sum(expected[test] for test in shard_tests)
+            _log(f"Shard {shard}: {len(shard_tests)} tests, "
+                 f"expected {total / 60:.1f} min")
+    return [shard_tests for shard_tests in assigned if shard_tests]
+
+
+def _start_container(name: str, image: str):
+    subprocess.run([
+        "podman", "run", "-d", "--systemd=always", "--tmpfs", "/tmp", "--tmpfs",
+        "/run", "-v", "/sys/fs/cgroup:/sys/fs/cgroup:ro", "-e",
+        "AWS_ACCESS_KEY_ID", "-e", "AWS_SECRET_ACCESS_KEY", "-e",
+        "AWS_SESSION_TOKEN", "-e", "AWS_DEFAULT_REGION", "-e", "COMMIT_ID",
+        "-e", "AWS_ACCOUNT", "-e", "S3_BUCKET", "-e",
+        f"GGL_BUILD_CACHE_DIR={BUILD_CACHE_MOUNT}", "-v",
+        f"{os.environ.get('GGL_BUILD_CACHE_VOLUME', 'ggl-build-cache')}:"
+        f"{BUILD_CACHE_MOUNT}", "-v",
+        f"{os.getcwd()}:/aws-greengrass-testing:ro", "--name", name, image
+    ],
+                   check=True,
+                   stdout=subprocess.DEVNULL)
+    # Give systemd in the container time to boot.
+    time.sleep(3)
+
+
+def _run_category(container: str, category: str, tests: List[TestCase],
+                  shard: int, log) -> List[TestResult]:
+    """Run `tests` of one category through run-tests.sh, timing each test
+    from the progress it prints."""
+    cmd = [
+        "podman", "exec", "-w", "/aws-greengrass-testing", container,
+        "/aws-greengrass-testing/run-tests.sh",
+        f"--aws-account={os.environ.get('AWS_ACCOUNT', '')}",
+        f"--s3-bucket={os.environ.get('S3_BUCKET', '')}",
+        f"--commit-id={os.environ.get('COMMIT_ID', '')}",
+        f"--aws-region={os.environ.get('AWS_DEFAULT_REGION', '')}",
+        f"--test-category={category}",
+        f"--test-name={','.join(test.name for test in tests)}"
+    ]
+    by_name = {test.name: test for test in tests}
+    started: Dict[str, float] = {}
+    durations: Dict[str, float] = {}
+    failed = set()
+    current = None
+
+    def finish(now: float):
+        if current is not None:
+            durations[current] = now - started[current]
+
+    process = subprocess.Popen(cmd,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT,
+                               text=True)
+    for line in process.stdout:
+        log.write(line)
+        now = time.monotonic()
+        if match := TEST_STARTED.match(line):
+            finish(now)
+            current = match.group(1)
+            started[current] = now
+        elif match := TEST_FAILED.match(line):
+            failed.add(match.group(1))
+        elif REPORT_STARTED in line:
+            finish(now)
+            current = None
+    process.wait()
+    finish(time.monotonic())
+
+    results = []
+    for name, test in by_name.items():
+        # A test that never started failed along with its container.
+        passed = name in durations and name not in failed
+        result = TestResult(test, passed, durations.get(name, 0.0), shard)
+        _log(f"[shard {shard}] {'✅' if passed else '❌'} {test.key} "
+             f"({result.duration:.0f}s)")
+        results.append(result)
+    return results
+
+
+def run_shard(shard: int, tests: List[TestCase], image: str,
+              log_dir: str) -> List[TestResult]:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    container = f"buildtestcontainer-shard{shard}-{int(time.time())}"
+    log_path = os.path.join(log_dir, f"test-shard{shard}-{stamp}.log")
+    _log(f"[shard {shard}] Logging to {log_path}")
+    results: List[TestResult] = []
+    with open(log_path, 'w') as log:
+        try:
+            _start_container(container, image)
+            categories = list(dict.fromkeys(test.category for test in tests))
+            for category in categories:
+                category_tests = [
+                    test for test in tests if test.category == category
+                ]
+                results += _run_category(container, category, category_tests,
+                                         shard, log)
+        except Exception as e:
+            _log(f"[shard {shard}] Error: {e}")
+            done = {result.test for result in results}
+            results += [
+                TestResult(test, False, 0.0, shard) for test in tests
+                if test not in done
+            ]
+        finally:
+            subprocess.run(["podman", "rm", "-f", container],
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+    return results
+
+
+def print_report(results: List[TestResult], wall_time: float):
+    passed = [result for result in results if result.passed]
+    failed = [result for result in results if not result.passed]
+    print("")
+    print("==============================================")
+    print("              TEST EXECUTION REPORT           ")
+    print("==============================================")
+    print(f"Total tests: {len(results)}")
+    print(f"Passed: {len(passed)}")
+    print(f"Failed: {len(failed)}")
+    print("")
+    if passed:
+        print("PASSED TESTS:")
+        for result in passed:
+            print(f"✅ {result.test.key} ({result.duration:.0f}s)")
+        print("")
+    if failed:
+        print("FAILED TESTS:")
+        for result in failed:
+            print(f"❌ {result.test.key} (shard {result.shard})")
+        print("")
+    serial_time = sum(result.duration for result in results)
+    print(f"Wall time: {wall_time / 60:.1f} min, "
+          f"test time: {serial_time / 60:.1f} min")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs",
+                        type=int,
+                        default=4,
+                        help="Containers to run at once")
+    parser.add_argument("--categories",
+                        default=",".join(CATEGORIES),
+                        help="Comma separated test categories")
+    parser.add_argument("--tests",
+                        default="",
+                        help="Comma separated test names to run")
+    parser.add_argument("--history",
+                        default=HISTORY_FILE,
+                        help="Test duration history file")
+    parser.add_argument("--image", default=IMAGE, help="Container image")
+    parser.add_argument("--log-dir", default=".", help="Shard log directory")
+    args = parser.parse_args()
+
+    names = args.tests.split(",") if args.tests else None
+    tests = discover_tests(args.categories.split(","), names)
+    if not tests:
+        print("No tests selected")
+        return 1
+
+    history = load_history(args.history)
+    shards = schedule(tests, history, max(1, args.jobs))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        futures = [
+            executor.submit(run_shard, shard, shard_tests, args.image,
+                            args.log_dir)
+            for shard, shard_tests in enumerate(shards)
+        ]
+        results = [result for future in futures for result in future.result()]
+    wall_time = time.monotonic() - start
+
+    # Tests that never ran say nothing about their duration.
+    save_history(args.history, history,
+                 [result for result in results if result.duration > 0])
+    print_report(results, wall_time)
+    return 0 if all(result.passed for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 #!/bin/bash
-VENV_DIR="/tmp/aws-greengrass-testing-workspace/venv"
-WORKSPACE_DIR="/tmp/aws-greengrass-testing-workspace"
+# Everything the run writes goes to the workspace. Give each run sharing a
+# host its own GGL_WORKSPACE_DIR, see src/Workspace.py.
+WORKSPACE_DIR="${GGL_WORKSPACE_DIR:-/tmp/aws-greengrass-testing-workspace}"
+export GGL_WORKSPACE_DIR="$WORKSPACE_DIR"
+VENV_DIR="$WORKSPACE_DIR/venv"
 
 # Use ggl-cli from PATH if available, otherwise use workspace build
 if command -v ggl-cli &> /dev/null; then
@@ -9,7 +12,8 @@ else
     CLI_BIN_PATH="$WORKSPACE_DIR/aws-greengrass-lite/build/bin/ggl-cli"
 fi
 
-# Create workspace directory
+# Create workspace directory. Builds are cached outside of it, see
+# BUILD_CACHE_DIR in src/GGLSetup.py.
 rm -rf "$WORKSPACE_DIR"
 mkdir -p "$WORKSPACE_DIR"
 
@@ -28,9 +32,8 @@ get_test_functions() {
     grep -o "test_[[:alnum:]_]*" "$test_file" | sort -u
 }
 
-setup_and_cleanup() {
+setup_venv() {
     local test_name=$1
-    local test_status=0
 
     # Setup phase - only if venv doesn't exist
     if [ ! -d "$VENV_DIR" ]; then
@@ -53,27 +56,39 @@ setup_and_cleanup() {
         . "$VENV_DIR/bin/activate"
         if ! pip show aws-greengrass-testing &>/dev/null; then
             pip install wheel setuptools
-            cp -r "$(pwd)" /tmp/aws-greengrass-testing-workspace/src
-            pip install /tmp/aws-greengrass-testing-workspace/src
+            cp -r "$(pwd)" "$WORKSPACE_DIR/src"
+            pip install "$WORKSPACE_DIR/src"
         fi
     } || {
         echo "Setup failed for test: $test_name"
         FAILED_TESTS+=("$test_name (Setup Failed)")
         return 1
     }
+}
 
-    # Test execution phase
-    echo "Executing test: $test_name"
-    # Convert comma-separated to pytest 'or' syntax
-    local pytest_filter="${test_name//,/ or }"
-    if ! PYTEST_CACHE_DIR="$WORKSPACE_DIR/.pytest_cache" pytest -q -s -v \
+# Run pytest on the test file of the category, passing on extra arguments
+run_pytest() {
+    pytest -q -s -v -o cache_dir="$WORKSPACE_DIR/.pytest_cache" \
         ./src/aws-greengrass-testing-"$TEST_CATEGORY".py \
-        -k "$pytest_filter" \
         --commit-id="$COMMIT_ID" \
         --aws-account="$AWS_ACCOUNT" \
         --s3-bucket="$S3_BUCKET" \
         --region="$AWS_REGION" \
-        --ggl-cli-path="$CLI_BIN_PATH"; then
+        --ggl-cli-path="$CLI_BIN_PATH" \
+        "$@"
+}
+
+setup_and_cleanup() {
+    local test_name=$1
+    local test_status=0
+
+    setup_venv "$test_name" || return 1
+
+    # Test execution phase
+    echo "Executing test: $test_name"
+    # Convert comma-separated to pytest 'or' syntax
+    local pytest_filter="${test_name//,/ or }"
+    if ! run_pytest -k "$pytest_filter"; then
         test_status=1
         echo "Test failed: $test_name"
         FAILED_TESTS+=("$test_name")
@@ -84,6 +99,57 @@ setup_and_cleanup() {
     return $test_status
 }
 
+# Run the whole selection in a single pytest session, so interpreter startup,
+# imports and session fixtures like the shared device are paid for once.
+# Each test is reported from the short test summary of pytest.
+run_single_session() {
+    local session_name="$TEST_CATEGORY"
+    local pytest_args=(-rfEp)
+    local summary_file="$WORKSPACE_DIR/pytest-session.log"
+    local session_status=0
+    local -A outcomes=()
+    local -a tests=()
+
+    setup_venv "$session_name" || return 1
+
+    if [ -n "$TEST_NAME" ]; then
+        pytest_args+=(-k "${TEST_NAME//,/ or }")
+    fi
+
+    echo "Executing tests of $TEST_CATEGORY in a single session"
+    run_pytest "${pytest_args[@]}" | tee "$summary_file"
+    session_status=${PIPESTATUS[0]}
+
+    # A test that failed in teardown after passing is reported twice, and
+    # counts as failed.
+    while read -r outcome node _; do
+        local test_func="${node##*::}"
+        if [ -z "${outcomes[$test_func]}" ]; then
+            tests+=("$test_func")
+        fi
+        if [ "$outcome" != "PASSED" ] || [ -z "${outcomes[$test_func]}" ]; then
+            outcomes[$test_func]="$outcome"
+        fi
+    done < <(sed -n '/short test summary info/,$p' "$summary_file" |
+        grep -E '^(PASSED|FAILED|ERROR) ')
+
+    for test_func in "${tests[@]}"; do
+        if [ "${outcomes[$test_func]}" = "PASSED" ]; then
+            PASSED_TESTS+=("$test_func")
+        else
+            FAILED_TESTS+=("$test_func")
+        fi
+    done
+
+    # Failures outside of any test, like collection errors or an empty
+    # selection, leave no test to report.
+    if [ "$session_status" -ne 0 ] && [ ${#tests[@]} -eq 0 ]; then
+        FAILED_TESTS+=("$session_name (Session Failed)")
+    fi
+
+    return "$session_status"
+}
+
 # Print test report
 print_report() {
     echo ""
@@ -142,16 +208,26 @@ main() {
         mapfile -t test_functions < <(get_test_functions)
     fi
 
-    # Run setup_and_cleanup for each test function
-    for test_func in "${test_functions[@]}"; do
+    if [ -n "$SINGLE_SESSION" ]; then
         echo "=============================================="
-        echo "Starting test suite for: $test_func"
+        echo "Starting test session for: $TEST_CATEGORY"
         echo "=============================================="
-        if ! setup_and_cleanup "$test_func"; then
-            echo "Test suite failed: $test_func"
+        if ! run_single_session; then
+            echo "Test session failed: $TEST_CATEGORY"
             overall_status=1
         fi
-    done
+    else
+        # Run setup_and_cleanup for each test function
+        for test_func in "${test_functions[@]}"; do
+            echo "=============================================="
+            echo "Starting test suite for: $test_func"
+            echo "=============================================="
+            if ! setup_and_cleanup "$test_func"; then
+                echo "Test suite failed: $test_func"
+                overall_status=1
+            fi
+        done
+    fi
 
     # Print the test report
     print_report
@@ -190,6 +266,9 @@ while [ $# -gt 0 ]; do
         --test-name=*)
         TEST_NAME="${1#*=}"
         ;;
+        --single-session)
+        SINGLE_SESSION=1
+        ;;
         *)
         echo "Unknown parameter passed: $1"
         exit 1
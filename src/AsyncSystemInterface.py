@@ -0,0 +1,167 @@
+import asyncio
+import subprocess
+from typing import Dict, Iterable, Optional, Sequence
+
+from JournalFollower import JournalFollower, JournalRecord
+from SystemInterface import (ComponentStatus, SystemInterface, UnitState,
+                             nucleus_command, unit_user_command)
+
+
+def _call_in_thread(method: str, *args):
+    # D-Bus connections are not thread safe, give each call its own
+    # interface so waits running in parallel threads do not share one.
+    interface = SystemInterface()
+    try:
+        return getattr(interface, method)(*args)
+    finally:
+        interface.close()
+
+
+class AsyncSystemInterface:
+    """Awaitable counterpart of SystemInterface.
+
+    Commands run as asyncio subprocesses whose timeouts are enforced by the
+    event loop, and log waits await the shared journal follower, so several
+    units and log followers can be driven concurrently from one loop:
+
+        await asyncio.gather(
+            interface.wait_for_unit_state("ComponentA", "RUNNING", 30),
+            interface.monitor_journalctl_for_message(
+                "ggl.ComponentB.service", "Hello", 30))
+
+    Unit state queries and waits run the blocking SystemInterface
+    implementation in worker threads.
+    """
+    _journal: Optional[JournalFollower]
+
+    def __init__(self):
+        self._journal = None
+
+    async def _run_command(
+            self, cmd: Sequence[str],
+            timeout: int | float) -> Optional[subprocess.CompletedProcess]:
+        """Run `cmd` to completion, returning None if it could not run or
+        did not finish within `timeout` seconds."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(),
+                                                    timeout)
+        except asyncio.TimeoutError:
+            print(f"Timeout after {timeout} seconds")
+            return None
+        finally:
+            # Also reached when the awaiting task is cancelled.
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        result = subprocess.CompletedProcess(cmd, process.returncode,
+                                             stdout.decode(), stderr.decode())
+        if result.stdout:
+            print(result.stdout)
+        if result.returncode != 0:
+            print(f"{' '.join(cmd)} exited with {result.returncode}: "
+                  f"{result.stderr}")
+        return result
+
+    async def stop_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+        result = await self._run_command(nucleus_command("stop"), timeout)
+        return result is not None and result.returncode == 0
+
+    async def start_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+        result = await self._run_command(nucleus_command("start"), timeout)
+        return result is not None and result.returncode == 0
+
+    async def restart_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+        result = await self._run_command(nucleus_command("restart"), timeout)
+        return result is not None and result.returncode == 0
+
+    async def check_systemd_user(self, component_name: str,
+                                 timeout: int | float) -> str:
+        result = await self._run_command(unit_user_command(component_name),
+                                         timeout)
+        if result is None or result.returncode != 0:
+            return ""
+        return result.stdout
+
+    async def get_unit_state(self, unit: str) -> UnitState:
+        return await asyncio.to_thread(_call_in_thread, "get_unit_state", unit)
+
+    async def snapshot_units(self,
+                             names: Iterable[str]) -> Dict[str, UnitState]:
+        return await asyncio.to_thread(_call_in_thread, "snapshot_units",
+                                       list(names))
+
+    async def check_systemctl_status_for_component(
+            self, component_name: str) -> ComponentStatus:
+        return await asyncio.to_thread(_call_in_thread,
+                                       "check_systemctl_status_for_component",
+                                       component_name)
+
+    async def wait_for_unit_state(self, unit: str, states: ComponentStatus
+                                  | Sequence[ComponentStatus],
+                                  timeout: int | float) -> bool:
+        return await asyncio.to_thread(_call_in_thread, "wait_for_unit_state",
+                                       unit, states, timeout)
+
+    @property
+    def journal(self) -> JournalFollower:
+        """The journal follower shared by this interface's log queries,
+        started on first use."""
+        if self._journal is None:
+            self._journal = JournalFollower()
+        self._journal.start()
+        return self._journal
+
+    def close(self):
+        """Stop the journal follower."""
+        if self._journal is not None:
+            self._journal.stop()
+            self._journal = None
+
+    async def monitor_journalctl_for_message(self, service_name: str,
+                                             message: str,
+                                             timeout: int | float) -> bool:
+        journal = self.journal
+        if not journal.covers(service_name):
+            return await asyncio.to_thread(_call_in_thread,
+                                           "monitor_journalctl_for_message",
+                                           service_name, message, timeout)
+
+        print(f"Monitoring logs for {service_name}...")
+        future = journal.expect(service_name, message)
+        try:
+            # Unlike wait_for, wait leaves the future alone on timeout.
+            await asyncio.wait({asyncio.wrap_future(future)}, timeout=timeout)
+        finally:
+            # Discard first, the future cannot resolve after that.
+            journal.discard(future)
+        if not future.done():
+            print(f"Timeout after {timeout} seconds")
+            return False
+        if future.exception() is not None:
+            print(f"Error: {future.exception()}")
+            return False
+        print(f"Journalctl output: {future.result()[0].message}")
+        print("Found log")
+        return True
+
+    async def wait_for_messages(
+            self,
+            messages: Dict[str, Sequence[str]],
+            timeout: int | float,
+            ordered: bool = False
+    ) -> Dict[str, Dict[str, Optional[JournalRecord]]]:
+        """Awaitable SystemInterface.wait_for_messages."""
+        journal = self.journal
+        futures = journal.expect_messages(messages, ordered)
+        if futures:
+            await asyncio.wait([asyncio.wrap_future(f) for f in futures],
+                               timeout=timeout)
+        return journal.collect_messages(messages, futures, timeout)
@@ -0,0 +1,139 @@
+"""pytest plugin providing the Greengrass Lite device of the tests.
+
+The device is provisioned and set up once per session, and `reset_device`
+returns it to its freshly set up state after each test. Tests that need a
+pristine device of their own, for example to provision it differently, are
+marked `full_setup`; they run before the shared device is set up. If the
+session device cannot be reset, the test fails in teardown and the remaining
+tests get a full setup each.
+"""
+from typing import Generator, Optional
+
+from pytest import Item, StashKey, fail, fixture
+
+import GGLSetup as ggl_setup
+from GGTestUtils import GGTestUtils
+from IoTUtils import IoTUtils
+from JournalFollower import mark_test_start
+from SystemInterface import SystemInterface
+
+FULL_SETUP_MARKER = "full_setup"
+
+_session_device: Optional[IoTUtils] = None
+# Set once the session device failed to reset.
+_session_device_unusable = False
+_last_test = StashKey[bool]()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", f"{FULL_SETUP_MARKER}: provision and set up a pristine "
+        "device for this test instead of sharing the session device")
+
+
+def pytest_collection_modifyitems(items: list[Item]):
+    # Stable, so tests otherwise keep their order.
+    items.sort(key=lambda item: not _wants_full_setup(item))
+
+
+def pytest_runtest_protocol(item: Item, nextitem: Optional[Item]):
+    # The session device is cleaned up after the last test, not reset.
+    item.stash[_last_test] = nextitem is None
+
+
+def _wants_full_setup(item: Item) -> bool:
+    return item.get_closest_marker(FULL_SETUP_MARKER) is not None
+
+
+def _uses_session_device(item: Item) -> bool:
+    return not _session_device_unusable and not _wants_full_setup(item)
+
+
+def reset_device(iot_obj: IoTUtils) -> bool:
+    """Remove the components deployed to the session device and their
+    deployment state, and take it out of the thing groups of the test."""
+    iot_obj.clean_up_thing_groups()
+    return ggl_setup.reset_device()
+
+
+@fixture(scope="session")
+def session_device(request) -> Generator[IoTUtils, None, None]:
+    global _session_device
+    region = request.config.getoption("--region")
+    commit_id = request.config.getoption("--commit-id")
+    iot_obj = IoTUtils(region)
+
+    iot_obj.set_up_core_device()
+    ggl_setup.setup_greengrass_lite(commit_id, region)
+    _session_device = iot_obj
+
+    yield iot_obj
+
+    _session_device = None
+    ggl_setup.clean_up()
+    iot_obj.clean_up()
+
+
+@fixture(scope="function")
+def iot_obj(request) -> Generator[IoTUtils, None, None]:
+    if _uses_session_device(request.node):
+        yield request.getfixturevalue("session_device")
+        return
+
+    region = request.config.getoption("--region")
+    commit_id = request.config.getoption("--commit-id")
+    iot_obj = IoTUtils(region)
+
+    iot_obj.set_up_core_device()
+    ggl_setup.setup_greengrass_lite(commit_id, region)
+
+    yield iot_obj
+
+    ggl_setup.clean_up()
+    iot_obj.clean_up()
+
+
+@fixture(scope="function")
+def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
+    aws_account = request.config.getoption("--aws-account")
+    s3_bucket = request.config.getoption("--s3-bucket")
+    region = request.config.getoption("--region")
+    ggl_cli_path = request.config.getoption("--ggl-cli-path")
+
+    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
+
+    yield gg_util_obj
+
+    gg_util_obj.cleanup()
+
+
+@fixture(scope="function")    # Runs for each test function
+def system_interface() -> Generator[SystemInterface, None, None]:
+    interface = SystemInterface()
+
+    # yield the instance of the class to the tests.
+    yield interface
+
+    # This section is called AFTER the test is run.
+    interface.close()
+
+
+@fixture(autouse=True)
+def cleanup_after_test(request):
+    """Cleanup greengrass state after each test to prevent state pollution"""
+    # Log queries only read journal entries after this point, so earlier
+    # tests' logs never leak into this one.
+    mark_test_start()
+    yield    # Test runs here
+    global _session_device_unusable
+    if _session_device is not None and _uses_session_device(request.node):
+        if not request.node.stash.get(_last_test, False):
+            print("\nResetting the session device after test...")
+            if not reset_device(_session_device):
+                _session_device_unusable = True
+                ggl_setup.clean_up()
+                fail("Could not reset the session device, the remaining "
+                     "tests set up a device of their own")
+    else:
+        print("\nCleaning up greengrass state after test...")
+        ggl_setup.clean_up()
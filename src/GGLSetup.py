@@ -1,16 +1,26 @@
 import argparse
+import fcntl
+import glob
 import grp
+import hashlib
+import io
 import pwd
 import json
 import os
 import re
+import shlex
 import uuid
 import shutil
 import subprocess
+import sys
 import platform
 import requests
-import zipfile
-from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+import tarfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (Any, BinaryIO, Callable, Dict, Iterator, List, Literal,
+                    Optional, Sequence, Tuple)
 from uuid import uuid1
 from boto3 import client
 import boto3
@@ -20,14 +30,118 @@ import logging
 import yaml
 from subprocess import run
 from pathlib import Path
+from IdleBudget import idle, idle_sleep
+from JournalFollower import JournalFollower, mark_test_start
+from Workspace import JSON_FILE, WORKSPACE_DIR
 from typing import Sequence, Optional, Any, Dict, List, Literal, Optional, Sequence, NamedTuple
 
 S3_ARTIFACT_DIR = "artifacts"
 DEVICE_PATH = "/var/lib/greengrass/device.pem.crt"
 PRIVATE_PATH = "/var/lib/greengrass/private.pem.key"
 CA_PATH = "/var/lib/greengrass/AmazonRootCA1.pem"
-JSON_FILE = "/tmp/aws-greengrass-testing-workspace/iot_setup_data.json"
-WORKSPACE_DIR = "/tmp/aws-greengrass-testing-workspace"
+
+# CMake options of every aws-greengrass-lite build. Together with the options
+# of the build profile, they are part of the build cache key.
+CMAKE_BUILD_OPTIONS = [
+    '-D', 'CMAKE_INSTALL_PREFIX=/usr/local', '-DGGL_LOG_LEVEL=DEBUG'
+]
+SANITIZER_FLAGS = "-fsanitize=address,undefined -fno-omit-frame-pointer"
+BuildProfile = Literal["debug", "release", "asan", "profiling"]
+BUILD_PROFILES: Dict[BuildProfile, List[str]] = {
+    "debug": ['-DCMAKE_BUILD_TYPE=Debug'],
+    "release": ['-DCMAKE_BUILD_TYPE=MinSizeRel'],
+    "asan": [
+        '-DCMAKE_BUILD_TYPE=Debug', f'-DCMAKE_C_FLAGS={SANITIZER_FLAGS}',
+        f'-DCMAKE_CXX_FLAGS={SANITIZER_FLAGS}',
+        f'-DCMAKE_EXE_LINKER_FLAGS={SANITIZER_FLAGS}',
+        f'-DCMAKE_SHARED_LINKER_FLAGS={SANITIZER_FLAGS}'
+    ],
+    "profiling": [
+        '-DCMAKE_BUILD_TYPE=RelWithDebInfo',
+        '-DCMAKE_C_FLAGS=-fno-omit-frame-pointer',
+        '-DCMAKE_CXX_FLAGS=-fno-omit-frame-pointer'
+    ],
+}
+BUILD_PROFILE = os.environ.get("GGL_BUILD_PROFILE", "debug")
+# Source the build tree was last built from.
+BUILD_SOURCE_FILE = ".build-source"
+
+# Install trees of previous builds, kept outside the workspace since
+# run-tests.sh wipes it. Set GGL_BUILD_CACHE_DIR to an empty string to
+# disable the cache.
+BUILD_CACHE_DIR = os.environ.get(
+    "GGL_BUILD_CACHE_DIR",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+        "aws-greengrass-testing"))
+# Setup steps verified by earlier runs, skipped while their stamp is valid.
+# Kept with the build cache and disabled with it.
+SETUP_STAMP_DIR = (os.path.join(BUILD_CACHE_DIR, "stamps")
+                   if BUILD_CACHE_DIR else "")
+# Build trees of each profile, kept with the build cache so later runs
+# rebuild them incrementally. They live outside the source tree, which is
+# replaced when another commit is downloaded; the source tree's build
+# directory links to the one in use. Without the build cache they are kept
+# in the workspace.
+BUILD_TREE_DIR = os.path.join(BUILD_CACHE_DIR or WORKSPACE_DIR, "build-trees")
+DPKG_STATUS_FILE = "/var/lib/dpkg/status"
+# Provisioned device state captured by snapshot() and swapped back in by
+# restore(), together with the unit files in UNIT_DIR.
+SNAPSHOT_DIR = os.path.join(WORKSPACE_DIR, "device-snapshot")
+SNAPSHOT_MANIFEST = "manifest.json"
+SNAPSHOT_PATHS = ["/var/lib/greengrass", "/etc/greengrass", "/ggcredentials"]
+# Users and groups owning the snapshot, whose ids it is only valid for.
+SNAPSHOT_USERS = ["ggcore", "gg_component"]
+UNIT_DIR = "/etc/systemd/system"
+UNIT_FILE_PATTERN = "ggl*"
+TARGET_FILE_PATTERN = "greengrass-lite*"
+GREENGRASS_LITE_UNITS = [
+    "greengrass-lite.target",
+    "ggl.aws_iot_tes.socket",
+    "ggl.aws_iot_mqtt.socket",
+    "ggl.gg_config.socket",
+    "ggl.gg_health.socket",
+    "ggl.gg_fleet_status.socket",
+    "ggl.gg_deployment.socket",
+    "ggl.gg_pubsub.socket",
+    "ggl.gg-ipc.socket.socket",
+    "ggl.core.ggconfigd.service",
+    "ggl.core.iotcored.service",
+    "ggl.core.tesd.service",
+    "ggl.core.ggdeploymentd.service",
+    "ggl.core.gg-fleet-statusd.service",
+    "ggl.core.ggpubsubd.service",
+    "ggl.core.gghealthd.service",
+    "ggl.core.ggipcd.service",
+]
+
+REGISTRATION_TIMEOUT = 300    # seconds
+# First and longest wait between registration polls, in seconds
+REGISTRATION_POLL_INTERVAL = (1, 10)
+# Journal messages logged as the nucleus connects and reports its status;
+# each one seen triggers an immediate registration poll.
+# Journal message of the nucleus once it is connected to IoT Core.
+NUCLEUS_READY_EVENT = ("ggl.core.iotcored.service", "Connected")
+REGISTRATION_EVENTS = [
+    NUCLEUS_READY_EVENT,
+    ("ggl.core.gg-fleet-statusd.service", "Published"),
+]
+SETUP_METRICS_FILE = os.path.join(WORKSPACE_DIR, "setup-metrics.jsonl")
+ROOT_CA_URL = "https://www.amazontrust.com/repository/AmazonRootCA1.pem"
+SETUP_MAX_WORKERS = 4    # setup stages run concurrently
+SOURCE_URL = "https://github.com/aws-greengrass/aws-greengrass-lite/archive/{commit_id}.tar.gz"
+DOWNLOAD_CHUNK_SIZE = 1 << 20    # bytes
+DOWNLOAD_TIMEOUT = (10, 60)    # connect and read timeouts, in seconds
+# Directory of source archives named aws-greengrass-lite-<commit>.tar.gz,
+# used instead of GitHub when it has the commit and filled by downloads.
+# Archives are checked against a <archive>.sha256 file next to them, and
+# downloads against GGL_SOURCE_SHA256 when set.
+SOURCE_MIRROR_DIR = os.environ.get("GGL_SOURCE_MIRROR_DIR", "")
+
+# Records which commit a downloaded source tree is, local copies have none.
+SOURCE_COMMIT_FILE = ".source-commit"
+# Only commit hashes are cached, branch and tag names move.
+COMMIT_HASH_PATTERN = re.compile(r"[0-9a-f]{7,40}")
 
 # Adaptive retry config: adds client-side rate limiting/backoff to absorb
 # IoT Core / GGv2 API throttling under parallel UAT load.
@@ -41,13 +155,6 @@ def download_greengrass_lite(commit_id: str) -> bool:
 
     ggl_path = os.path.join(WORKSPACE_DIR, "aws-greengrass-lite")
 
-    # Skip download if already exists in workspace
-    if os.path.exists(ggl_path):
-        print(
-            f"aws-greengrass-lite already exists in {WORKSPACE_DIR}, skipping download"
-        )
-        return True
-
     # Check if greengrass-lite exists in current directory or parent
     current_dir = os.getcwd()
     for check_dir in [
@@ -58,26 +165,42 @@ def download_greengrass_lite(commit_id: str) -> bool:
         potential_ggl = os.path.join(check_dir, "aws-greengrass-lite")
         if os.path.exists(potential_ggl) and os.path.exists(
                 os.path.join(potential_ggl, "CMakeLists.txt")):
+            # Copied on every setup, keeping modification times, so local
+            # changes are picked up by an incremental rebuild.
             print(
                 f"Found aws-greengrass-lite in {check_dir}, copying to workspace"
             )
             shutil.copytree(potential_ggl,
                             ggl_path,
-                            ignore=shutil.ignore_patterns('build'))
+                            ignore=shutil.ignore_patterns('build', 'build-*'),
+                            dirs_exist_ok=True)
             return True
 
+    # Skip download if this commit already exists in workspace
+    if _source_commit(ggl_path) == commit_id:
+        print(
+            f"aws-greengrass-lite already exists in {WORKSPACE_DIR}, skipping download"
+        )
+        return True
+
     # Download the source repo if not found locally
     download_result = _download_source(commit_id, WORKSPACE_DIR)
     return download_result
 
 
-def setup_greengrass_lite(commit_id: str, region: str):
+def setup_greengrass_lite(commit_id: str,
+                          region: str,
+                          profile: BuildProfile = BUILD_PROFILE):
+    if profile not in BUILD_PROFILES:
+        print(f"Unknown build profile {profile}, "
+              f"expected one of {', '.join(BUILD_PROFILES)}")
+        return False
+
     # Download source
     if not download_greengrass_lite(commit_id):
         return False
 
     ggl_path = os.path.join(WORKSPACE_DIR, "aws-greengrass-lite")
-    build_path = os.path.join(ggl_path, 'build')
 
     # Get config
     with open(JSON_FILE, 'r') as file:
@@ -93,65 +216,72 @@ def setup_greengrass_lite(commit_id: str, region: str):
 
     # Set up an iot client
     iot_client = client("iot", region_name=region, config=THROTTLE_RETRY_CONFIG)
+    journal = JournalFollower()
 
     try:
 
-        # Install build tools
-        install_result = _install_build_dependencies()
-        if not install_result:
-            return False
-
-        # Add user and group
-        add_result_ggcore = _add_user_and_group("ggcore", "ggcore")
-        add_result_gg_component = _add_user_and_group("gg_component",
-                                                      "gg_component")
-        if not add_result_ggcore or not add_result_gg_component:
-            return False
-
-        # Create several directories
-        dir1_result = _create_dir("/ggcredentials",
-                                  ownership=True,
-                                  flag='-R',
-                                  user="ggcore",
-                                  group="ggcore")
-        dir2_result = _create_dir("/var/lib/greengrass",
-                                  ownership=True,
-                                  user="ggcore",
-                                  group="ggcore")
-        dir3_result = _create_dir("/etc/greengrass")
-        if not dir1_result or not dir2_result or not dir3_result:
-            return False
-
-        # TES setup
-        tes_result = _tes_setup(device_cert, private_key)
-        if not tes_result:
-            return False
-
-        # Config setup
-        src_path = "docs/examples/sample_nucleus_config.yaml"
-        temp_path = "./config.yaml"
-        dest_path = "/etc/greengrass/config.yaml"
-
-        move_result1 = _copy_file(src_path, temp_path)
-        config_result = _modify_config(iot_client, thing_name, temp_path,
-                                       "ggcore", "ggcore", region)
-        move_result2 = _copy_file(temp_path, dest_path)
-        remove_result = _remove_file(temp_path)
-        if not config_result or not move_result1 or not move_result2 or not remove_result:
+        # Provision the device, restoring the snapshot of an earlier setup
+        # when possible, while building and installing
+        manifest = snapshot_manifest()
+        restorable = (manifest is not None
+                      and manifest.get("commit_id") == commit_id
+                      and manifest.get("region") == region)
+        results: Dict[str, Any] = {}
+
+        def setup_stages(restore_snapshot: bool) -> List[SetupStage]:
+            stages = [SetupStage("users", _add_users)]
+            if restore_snapshot:
+                stages.append(
+                    SetupStage(
+                        "restore", lambda: restore() and _set_device_identity(
+                            device_cert, private_key, thing_name), ("users", )))
+            else:
+                stages += [
+                    SetupStage("dependencies", _install_build_dependencies),
+                    SetupStage("directories", _create_device_dirs, ("users", )),
+                    SetupStage("root_ca", _download_root_ca),
+                    SetupStage(
+                        "credentials", lambda: _tes_setup(
+                            device_cert, private_key, results["root_ca"]),
+                        ("directories", "root_ca")),
+                    SetupStage("endpoints",
+                               lambda: _get_iot_endpoints(iot_client)),
+                    SetupStage(
+                        "config", lambda: _write_config(results["endpoints"],
+                                                        thing_name, region),
+                        ("directories", "endpoints")),
+                ]
+            # Build tools come from an earlier setup when restoring. The
+            # install writes below the provisioned directories and next to the
+            # unit files, so it waits for the stages writing them.
+            stages += [
+                SetupStage("build",
+                           lambda: _build(commit_id, ggl_path, profile),
+                           () if restore_snapshot else ("dependencies", )),
+                SetupStage("install", lambda: results["build"](),
+                           ("build", "restore") if restore_snapshot else
+                           ("build", "directories", "credentials", "config")),
+            ]
+            return stages
+
+        setup_result = _run_setup_stages(setup_stages(restorable), results)
+        if not setup_result and restorable and "restore" not in results:
+            print("Could not restore device snapshot, provisioning instead")
+            restorable = False
+            setup_result = _run_setup_stages(setup_stages(False), results)
+        if not setup_result:
             return False
 
-        # Build
-        if not os.path.exists(build_path):
-            build_result = _build_with_cmake()
-            if not build_result:
-                return False
+        # Capture the provisioned state before the nucleus first starts, so
+        # later setups only swap in their device identity.
+        if restorable:
+            print("Restored provisioned device state from snapshot")
         else:
-            print("Build directory exists, skipping build")
+            snapshot(commit_id=commit_id, region=region)
 
-        # Install
-        install_result = _install_with_cmake()
-        if not install_result:
-            return False
+        # Follow the journal from before the nucleus starts, so the events
+        # it logs while connecting are not missed
+        journal.start()
 
         # run nucleus
         os.chmod('misc/run_nucleus', 0o775)
@@ -167,10 +297,9 @@ def setup_greengrass_lite(commit_id: str, region: str):
             print(f"stderr: {e.stderr}")
             raise Exception(
                 f"Greengrass setup failed: run_nucleus script failed")
+        nucleus_started = time.monotonic()
 
         # Wait for device to register with Greengrass V2
-        from GGTestUtils import sleep_with_log
-
         # Read thing name from config
         try:
             with open('/etc/greengrass/config.yaml', 'r') as f:
@@ -182,50 +311,178 @@ def setup_greengrass_lite(commit_id: str, region: str):
 
         gg_client = boto3.client('greengrassv2', config=THROTTLE_RETRY_CONFIG)
 
-        for attempt in range(30):    # Wait up to 5 minutes
-            try:
-                gg_client.get_core_device(coreDeviceThingName=thing_name)
-                print(
-                    f"Device {thing_name} successfully registered with Greengrass V2"
-                )
-                break
-            except gg_client.exceptions.ResourceNotFoundException:
-                sleep_with_log(
-                    10,
-                    f"waiting for device registration, attempt {attempt + 1}/30"
-                )
-        else:
+        if not _wait_for_registration(gg_client, thing_name, journal,
+                                      nucleus_started):
             raise Exception(
-                f"FATAL: Device {thing_name} failed to register with Greengrass after 5 minutes"
+                f"FATAL: Device {thing_name} failed to register with Greengrass after {REGISTRATION_TIMEOUT} seconds"
             )
         print("Successfully installed and started the nucleus from source")
 
     except Exception as e:
         print(f"Unexpected error: {e}")
     finally:
+        journal.stop()
         os.chdir(original_dir)
 
 
+def snapshot(snapshot_dir: str = SNAPSHOT_DIR, **manifest) -> bool:
+    """Capture the provisioned device state: SNAPSHOT_PATHS and the ggl unit
+    files, together with `manifest` describing it. Copies are reflinks where
+    the filesystem supports them."""
+    staging_dir = f"{snapshot_dir}.tmp"
+    try:
+        _run_sudo(['rm', '-rf', staging_dir])
+        os.makedirs(staging_dir)
+        saved = [path for path in SNAPSHOT_PATHS if os.path.exists(path)]
+        saved += _unit_files()
+        batch = PrivilegedBatch()
+        for path in saved:
+            copy = os.path.join(staging_dir, "root") + path
+            os.makedirs(os.path.dirname(copy), exist_ok=True)
+            batch.run('cp', '-a', '--reflink=auto', path, copy)
+        if not batch.apply():
+            raise Exception("could not copy the device state")
+        manifest.update(created=time.time(), users=_snapshot_user_ids())
+        with open(os.path.join(staging_dir, SNAPSHOT_MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+
+        # Replace an older snapshot only once this one is complete.
+        _run_sudo(['rm', '-rf', snapshot_dir])
+        os.rename(staging_dir, snapshot_dir)
+        print(f"Saved device snapshot in {snapshot_dir}")
+        return True
+    except Exception as e:
+        print(f"Error when taking device snapshot: {e}")
+        _run_sudo(['rm', '-rf', staging_dir], check=False)
+        return False
+
+
+def snapshot_manifest(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[dict]:
+    """The manifest given to snapshot(), or None without a snapshot."""
+    try:
+        with open(os.path.join(snapshot_dir, SNAPSHOT_MANIFEST), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def restore(snapshot_dir: str = SNAPSHOT_DIR) -> bool:
+    """Replace the device state with a snapshot. Each path is copied next
+    to its target first and then renamed over it, so it is never seen half
+    restored. Snapshots taken while SNAPSHOT_USERS had other ids, for example
+    before clean_up recreated them, are not restored."""
+    manifest = snapshot_manifest(snapshot_dir)
+    if manifest is None:
+        print(f"No device snapshot in {snapshot_dir}")
+        return False
+    if manifest.get("users") != _snapshot_user_ids():
+        print(f"Device snapshot in {snapshot_dir} is owned by other user and "
+              "group ids")
+        return False
+
+    root = os.path.join(snapshot_dir, "root")
+    batch = PrivilegedBatch()
+    for path in SNAPSHOT_PATHS:
+        saved = root + path
+        incoming = f"{path}.restoring"
+        outgoing = f"{path}.old"
+        batch.run('rm', '-rf', incoming, outgoing)
+        if os.path.exists(saved):
+            batch.run('cp', '-a', '--reflink=auto', saved, incoming)
+        if os.path.exists(path):
+            batch.run('mv', '-T', path, outgoing)
+        if os.path.exists(saved):
+            batch.run('mv', '-T', incoming, path)
+        batch.run('rm', '-rf', outgoing)
+
+    current_units = _unit_files()
+    if current_units:
+        batch.run('rm', '-rf', *current_units)
+    saved_units = _unit_files(root + UNIT_DIR)
+    if saved_units:
+        batch.run('cp', '-a', '--reflink=auto', *saved_units, UNIT_DIR)
+    batch.run('systemctl', 'daemon-reload')
+    if not batch.apply():
+        print("Error when restoring device snapshot")
+        return False
+    print(f"Restored device snapshot from {snapshot_dir}")
+    return True
+
+
+def _snapshot_user_ids() -> Dict[str, Optional[List[int]]]:
+    """The uid and gid of each of SNAPSHOT_USERS, None for missing ones."""
+    ids: Dict[str, Optional[List[int]]] = {}
+    for name in SNAPSHOT_USERS:
+        try:
+            ids[name] = [pwd.getpwnam(name).pw_uid, grp.getgrnam(name).gr_gid]
+        except KeyError:
+            ids[name] = None
+    return ids
+
+
+def reset_device() -> bool:
+    """Return a device set up by setup_greengrass_lite to its state before
+    the nucleus first started, keeping the identity in JSON_FILE: stop it,
+    restore its snapshot and run the nucleus again. Components deployed
+    since, and their deployment state, are gone afterwards."""
+    try:
+        with open(JSON_FILE, 'r') as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error when reading {JSON_FILE}: {e}")
+        return False
+
+    batch = PrivilegedBatch()
+    batch.run('systemctl', 'stop', 'greengrass-lite.target', 'ggl.*')
+    if not batch.apply():
+        return False
+    if not restore() or not _set_device_identity(
+            data['DEVICE_CERT'], data['PRIVATE_KEY'], data['THING_NAME']):
+        return False
+
+    # Only messages of the restarted nucleus count, not those logged by the
+    # nucleus of the test.
+    mark_test_start()
+    journal = JournalFollower()
+    journal.start()
+    try:
+        ggl_path = os.path.join(WORKSPACE_DIR, "aws-greengrass-lite")
+        started = time.monotonic()
+        try:
+            subprocess.run(['sudo', './misc/run_nucleus'],
+                           cwd=ggl_path,
+                           check=True,
+                           text=True)
+        except Exception as e:
+            print(f"Error when starting the nucleus: {e}")
+            return False
+        if not _wait_for_nucleus(journal, started):
+            print(f"Nucleus not connected after {REGISTRATION_TIMEOUT} "
+                  "seconds")
+            return False
+    finally:
+        journal.stop()
+    print("Successfully reset the device")
+    return True
+
+
 def clean_up() -> bool:
+    batch = PrivilegedBatch()
+
     # Stop and disable services
-    stop_result = _stop_and_disable_services()
-    if not stop_result:
-        return False
+    _stop_and_disable_services(batch)
 
     # Remove several other directories
-    remove_dir1 = _remove_dir("/ggcredentials")
-    remove_dir2 = _remove_dir("/var/lib/greengrass")
-    remove_dir3 = _remove_dir("/etc/greengrass")
-    if not remove_dir1 or not remove_dir2 or not remove_dir3:
-        return False
+    _remove_dir("/ggcredentials", batch)
+    _remove_dir("/var/lib/greengrass", batch)
+    _remove_dir("/etc/greengrass", batch)
 
     # Delete user and group
-    delete_result_ggcore = _delete_user_and_group("ggcore", "ggcore")
-    delete_result_gg_component = _delete_user_and_group("gg_component",
-                                                        "gg_component")
-    if not delete_result_ggcore or not delete_result_gg_component:
-        return False
+    _delete_user_and_group("ggcore", "ggcore", batch)
+    _delete_user_and_group("gg_component", "gg_component", batch)
 
+    if not batch.apply():
+        return False
     print("Successfully cleaned up greengrass-lite")
     return True
 
@@ -234,54 +491,182 @@ def clean_up() -> bool:
 # HELPER FUNCTIONS
 # ===============================================
 def _download_source(commit_id: str, target_dir: str, max_retries=3) -> bool:
-    url = f"https://github.com/aws-greengrass/aws-greengrass-lite/archive/{commit_id}.zip"
-    src_path = os.path.join(target_dir, "aws-greengrass-lite.zip")
-    extracted_folder = os.path.join(target_dir,
-                                    f"aws-greengrass-lite-{commit_id}")
+    url = SOURCE_URL.format(commit_id=commit_id)
+    archive_name = f"aws-greengrass-lite-{commit_id}.tar.gz"
+    part_path = os.path.join(target_dir, f"{archive_name}.part")
     target_folder = os.path.join(target_dir, "aws-greengrass-lite")
+    mirror_path = (os.path.join(SOURCE_MIRROR_DIR, archive_name)
+                   if SOURCE_MIRROR_DIR else None)
+
+    if mirror_path is not None and os.path.exists(mirror_path):
+        print(f"Using aws-greengrass-lite from mirror {mirror_path}")
+        with open(mirror_path, 'rb') as archive:
+            stream = _ArchiveStream(archive)
+            extracted_folder = _extract_archive(stream, target_dir)
+        if extracted_folder is None:
+            return False
+        if not _verify_checksum(stream.sha256.hexdigest(),
+                                _read_checksum(mirror_path)):
+            shutil.rmtree(extracted_folder, ignore_errors=True)
+            return False
+    else:
+        for attempt in range(max_retries):
+            try:
+                with _open_download(url, part_path) as stream:
+                    extracted_folder = _extract_archive(stream, target_dir)
+                if extracted_folder is not None:
+                    break
+                # Not a valid archive, download it again from the start.
+                os.remove(part_path)
+            except requests.exceptions.RequestException as e:
+                # The next attempt resumes from the bytes in part_path.
+                print(f"Error when downloading aws-greengrass-lite, {str(e)}")
+            print(f"Download attempt {attempt + 1}/{max_retries} failed")
+        else:
+            print(
+                f"Failed to download aws-greengrass-lite after {max_retries} attempts"
+            )
+            return False
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url)
-
-            if response.status_code != 200:
-                print(
-                    f"Failed to download aws-greengrass-lite, status code: {response.status_code}"
-                )
-                if attempt < max_retries - 1:
-                    continue
-                return False
-
-            with open(src_path, 'wb') as f:
-                f.write(response.content)
-
-            if _unzip_file(src_path, target_dir):
-                if os.path.exists(target_folder):
-                    shutil.rmtree(target_folder)
-                os.rename(extracted_folder, target_folder)
-                print("Successfully downloaded aws-greengrass-lite")
-                return True
+        digest = stream.sha256.hexdigest()
+        if not _verify_checksum(digest, os.environ.get("GGL_SOURCE_SHA256")):
+            os.remove(part_path)
+            shutil.rmtree(extracted_folder, ignore_errors=True)
+            return False
+        _store_in_mirror(part_path, mirror_path, digest)
+
+    if os.path.exists(target_folder):
+        shutil.rmtree(target_folder)
+    os.rename(extracted_folder, target_folder)
+    with open(os.path.join(target_folder, SOURCE_COMMIT_FILE), 'w') as f:
+        f.write(commit_id)
+    print("Successfully downloaded aws-greengrass-lite")
+    return True
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error when downloading aws-greengrass-lite, {str(e)}")
-            if attempt == max_retries - 1:
-                print(
-                    f"Failed to download aws-greengrass-lite after {max_retries} attempts"
-                )
-                return False
 
+class _ArchiveStream(io.RawIOBase):
+    """Readable stream over a source archive that hashes everything read.
+
+    For downloads, the bytes already in the partial file are replayed first
+    and the response body is appended to it as it is read, so extraction
+    runs while the archive is still downloading and a retry resumes where
+    the last attempt stopped.
+    """
+
+    def __init__(self,
+                 replay: BinaryIO,
+                 response: Optional[requests.Response] = None,
+                 part_file: Optional[BinaryIO] = None):
+        self._replay = replay
+        self._response = response
+        self._chunks = (response.iter_content(DOWNLOAD_CHUNK_SIZE)
+                        if response is not None else iter(()))
+        self._part_file = part_file
+        self._pending = b""
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
 
-def _unzip_file(src_path: str, dest_path: str) -> bool:
+    def readinto(self, buffer) -> int:
+        if not self._pending and self._replay is not None:
+            self._pending = self._replay.read(len(buffer))
+            if not self._pending:
+                self._replay = None
+        if not self._pending and self._replay is None:
+            self._pending = next(self._chunks, b"")
+            if self._part_file is not None:
+                self._part_file.write(self._pending)
+        data, self._pending = (self._pending[:len(buffer)],
+                               self._pending[len(buffer):])
+        buffer[:len(data)] = data
+        self.sha256.update(data)
+        return len(data)
+
+    def close(self):
+        for resource in (self._replay, self._part_file, self._response):
+            if resource is not None:
+                resource.close()
+        super().close()
+
+
+def _open_download(url: str, part_path: str) -> _ArchiveStream:
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    response = requests.get(url,
+                            headers=headers,
+                            stream=True,
+                            timeout=DOWNLOAD_TIMEOUT)
+    if response.status_code == 416:
+        # Range not satisfiable, the partial file is already complete.
+        response.close()
+        return _ArchiveStream(open(part_path, 'rb'))
+    response.raise_for_status()
+
+    if offset and response.status_code == 206:
+        print(f"Resuming aws-greengrass-lite download at {offset} bytes")
+        return _ArchiveStream(open(part_path, 'rb'), response,
+                              open(part_path, 'ab'))
+    return _ArchiveStream(None, response, open(part_path, 'wb'))
+
+
+def _extract_archive(stream: _ArchiveStream, target_dir: str) -> Optional[str]:
+    """Extract a .tar.gz source archive as it is read, returning the path of
+    its top level folder."""
+    top_level = None
+    try:
+        with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extraction_filter = tarfile.data_filter
+            for member in tar:
+                top_level = top_level or member.name.split("/")[0]
+                tar.extract(member, target_dir)
+        # Hash the gzip trailer too, tarfile may stop before it.
+        while stream.read(DOWNLOAD_CHUNK_SIZE):
+            pass
+    except (tarfile.TarError, EOFError, OSError) as e:
+        print(f"Error during extraction: {str(e)}")
+        if top_level:
+            shutil.rmtree(os.path.join(target_dir, top_level),
+                          ignore_errors=True)
+        if isinstance(e, requests.exceptions.RequestException):
+            raise
+        return None
+    if top_level is None:
+        print("Error during extraction: empty archive")
+        return None
+    return os.path.join(target_dir, top_level)
+
+
+def _read_checksum(archive_path: str) -> Optional[str]:
     try:
-        with zipfile.ZipFile(src_path, 'r') as zip_ref:
-            zip_ref.extractall(dest_path)
+        with open(f"{archive_path}.sha256", 'r') as f:
+            return f.read().split()[0]
+    except (OSError, IndexError):
+        return None
 
-        os.remove(src_path)
-        return True
 
-    except Exception as e:
-        print(f"Error during extraction: {str(e)}")
+def _verify_checksum(digest: str, expected: Optional[str]) -> bool:
+    print(f"aws-greengrass-lite archive sha256: {digest}")
+    if expected and expected.lower() != digest:
+        print(f"Checksum mismatch, expected sha256 {expected}")
         return False
+    return True
+
+
+def _store_in_mirror(part_path: str, mirror_path: Optional[str], digest: str):
+    """Keep a downloaded archive in the mirror for offline runs."""
+    try:
+        if mirror_path is None:
+            os.remove(part_path)
+            return
+        os.makedirs(os.path.dirname(mirror_path), exist_ok=True)
+        with open(f"{mirror_path}.sha256", 'w') as f:
+            f.write(f"{digest}  {os.path.basename(mirror_path)}\n")
+        shutil.move(part_path, mirror_path)
+        print(f"Stored aws-greengrass-lite archive in {mirror_path}")
+    except OSError as e:
+        print(f"Could not store archive in mirror: {e}")
 
 
 def _install_build_dependencies() -> bool:
@@ -291,9 +676,19 @@ def _install_build_dependencies() -> bool:
             "build-essential", "pkg-config", "cmake", "git", "curl",
             "libssl-dev", "libcurl4-openssl-dev", "uuid-dev", "libzip-dev",
             "libsqlite3-dev", "libyaml-dev", "libsystemd-dev", "libevent-dev",
-            "liburiparser-dev", "cgroup-tools"
+            "liburiparser-dev", "cgroup-tools", "ccache", "ninja-build"
         ]
 
+        # The installed packages cannot have changed unless dpkg wrote its
+        # status file since they were last found complete.
+        stamp = {
+            "packages": sorted(packages),
+            "dpkg_status_mtime": os.stat(DPKG_STATUS_FILE).st_mtime
+        }
+        if _read_stamp("dependencies") == stamp:
+            print("All dependencies already installed")
+            return True
+
         # Check which packages are missing
         check_cmd = ["dpkg", "-l"] + packages
         result = subprocess.run(check_cmd, capture_output=True, text=True)
@@ -305,6 +700,7 @@ def _install_build_dependencies() -> bool:
 
         if not missing_packages:
             print("All dependencies already installed")
+            _write_stamp("dependencies", stamp)
             return True
 
         # Update and install only missing packages
@@ -312,6 +708,8 @@ def _install_build_dependencies() -> bool:
         subprocess.run(["sudo", "apt", "install", "-y"] + missing_packages,
                        check=True)
 
+        stamp["dpkg_status_mtime"] = os.stat(DPKG_STATUS_FILE).st_mtime
+        _write_stamp("dependencies", stamp)
         print("Successfully updated and installed dependencies")
         return True
 
@@ -320,46 +718,38 @@ def _install_build_dependencies() -> bool:
         return False
 
 
-def _add_user_and_group(user: str, group: str):
-    try:
-        # Create the group
-        if not _check_group_exists(group):
-            subprocess.run(['sudo', 'groupadd', group], check=True)
-            print(f"Successfully created {group} group")
-
-        # Create the user and add to the group
-        if not _check_user_exists(user):
-            subprocess.run(['sudo', 'useradd', '-Ng', group, user], check=True)
-            print(f"Successfully created {user} user")
-        return True
+def _add_user_and_group(user: str,
+                        group: str,
+                        batch: Optional["PrivilegedBatch"] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
 
-    except subprocess.CalledProcessError as e:
-        print(f"Command failed: {e.cmd}. Return code: {e.returncode}")
-        return False
-    except Exception as e:
-        print(f"Error when adding user and group: {str(e)}")
-        return False
+    # Create the group
+    if not _check_group_exists(group):
+        batch.run('groupadd', group)
 
+    # Create the user and add to the group
+    if not _check_user_exists(user):
+        batch.run('useradd', '-Ng', group, user)
+    return batch.apply() if own_batch else True
 
-def _delete_user_and_group(user: str, group: str):
-    try:
-        # Delete the user
-        if _check_user_exists(user):
-            subprocess.run(['sudo', 'userdel', user], check=True)
-            print(f"Successfully deleted {user} user")
-
-        # Delete the group
-        if _check_group_exists(group):
-            subprocess.run(['sudo', 'groupdel', group], check=True)
-            print(f"Successfully deleted {group} group")
-        return True
 
-    except subprocess.CalledProcessError as e:
-        print(f"Command failed: {e.cmd}. Return code: {e.returncode}")
-        return False
-    except Exception as e:
-        print(f"Error when deleting user and group: {str(e)}")
-        return False
+def _delete_user_and_group(user: str,
+                           group: str,
+                           batch: Optional["PrivilegedBatch"] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+
+    # Delete the user
+    if _check_user_exists(user):
+        batch.run('userdel', user)
+
+    # Delete the group
+    if _check_group_exists(group):
+        batch.run('groupdel', group)
+    return batch.apply() if own_batch else True
 
 
 def _check_group_exists(group: str) -> bool:
@@ -378,19 +768,102 @@ def _check_user_exists(user: str) -> bool:
         return False
 
 
-def _build_with_cmake() -> bool:
+def _source_commit(ggl_path: str) -> Optional[str]:
+    """The commit id a downloaded source tree was extracted from, or None
+    for a copied local checkout."""
+    try:
+        with open(os.path.join(ggl_path, SOURCE_COMMIT_FILE), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _build_tree(ggl_path: str, profile: BuildProfile) -> str:
+    """Build tree of `profile` for the source tree at `ggl_path`. CMake ties
+    a build tree to its source directory, so each workspace has its own."""
+    source_key = hashlib.sha256(
+        os.path.abspath(ggl_path).encode()).hexdigest()[:12]
+    return os.path.join(BUILD_TREE_DIR, source_key, profile)
+
+
+@contextmanager
+def _build_tree_lock(build_dir: str) -> Iterator[None]:
+    """Hold `build_dir` for this run while building and installing from it,
+    so concurrent runs sharing the build cache take turns."""
+    os.makedirs(os.path.dirname(build_dir), exist_ok=True)
+    with open(f"{build_dir}.lock", 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"Waiting for another run to release {build_dir}")
+            with idle("waiting for build tree"):
+                fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _build_with_cmake(ggl_path: str, build_dir: str,
+                      profile: BuildProfile) -> bool:
+    """Build `profile` in `build_dir`, reusing the outputs of an earlier
+    build of the same source."""
+    source = _source_commit(ggl_path) or "local"
+    source_file = os.path.join(build_dir, BUILD_SOURCE_FILE)
     try:
         cmake_cmd = [
-            'cmake', '-B', 'build', '-D', 'CMAKE_INSTALL_PREFIX=/usr/local',
-            '-D', 'CMAKE_BUILD_TYPE=MinSizeRel', '-D', 'CMAKE_BUILD_TYPE=Debug',
-            '-DGGL_LOG_LEVEL=DEBUG'
+            'cmake', '-S', ggl_path, '-B', build_dir, *CMAKE_BUILD_OPTIONS,
+            *BUILD_PROFILES[profile]
         ]
-        subprocess.run(cmake_cmd, check=True)
-
-        build_cmd = ['make', '-C', 'build', f'-j{os.cpu_count()}']
-        subprocess.run(build_cmd, check=True)
+        # The generator of an existing build tree cannot change.
+        if (shutil.which('ninja') and
+                not os.path.exists(os.path.join(build_dir, 'CMakeCache.txt'))):
+            cmake_cmd += ['-G', 'Ninja']
+        env = None
+        if BUILD_CACHE_DIR and shutil.which('ccache'):
+            # Compiler cache shared by every commit, so a commit that only
+            # differs slightly from a cached one rebuilds quickly.
+            cmake_cmd += [
+                '-DCMAKE_C_COMPILER_LAUNCHER=ccache',
+                '-DCMAKE_CXX_COMPILER_LAUNCHER=ccache'
+            ]
+            env = dict(os.environ,
+                       CCACHE_DIR=os.path.join(BUILD_CACHE_DIR, 'ccache'),
+                       CCACHE_BASEDIR=ggl_path)
+        subprocess.run(cmake_cmd, check=True, env=env)
 
-        print("Successfully completed the build process")
+        try:
+            with open(source_file, 'r') as f:
+                built_source = f.read().strip()
+        except OSError:
+            built_source = None
+        if built_source is not None and built_source != source:
+            # Extracted sources carry the commit's timestamps, which may be
+            # older than the outputs of the previous commit. Rebuild all of
+            # it, mostly from ccache.
+            print(f"Source changed from {built_source} to {source}, "
+                  "cleaning build tree")
+            subprocess.run(['cmake', '--build', build_dir, '--target', 'clean'],
+                           check=True,
+                           env=env)
+
+        build_cmd = [
+            'cmake', '--build', build_dir, '--parallel',
+            str(os.cpu_count())
+        ]
+        subprocess.run(build_cmd, check=True, env=env)
+        with open(source_file, 'w') as f:
+            f.write(source)
+
+        # Keep build/bin/ggl-cli pointing at the profile in use.
+        build_link = os.path.join(ggl_path, 'build')
+        if os.path.islink(build_link):
+            os.remove(build_link)
+        elif os.path.exists(build_link):
+            shutil.rmtree(build_link)
+        os.symlink(build_dir, build_link)
+
+        print(f"Successfully completed the {profile} build process")
         return True
     except subprocess.CalledProcessError as e:
         print(f"Error during build process: {e}")
@@ -400,9 +873,9 @@ def _build_with_cmake() -> bool:
         return False
 
 
-def _install_with_cmake() -> bool:
+def _install_with_cmake(build_dir: str) -> bool:
     try:
-        install_cmd = ['sudo', 'make', '-C', 'build', 'install']
+        install_cmd = ['sudo', 'cmake', '--install', build_dir]
         subprocess.run(install_cmd, check=True)
         print("Successfully completed the install process")
         return True
@@ -414,38 +887,454 @@ def _install_with_cmake() -> bool:
         return False
 
 
-def _tes_setup(device_cert: str, private_key: str) -> bool:
+def _build_cache_path(commit_id: str, ggl_path: str,
+                      profile: BuildProfile) -> Optional[str]:
+    """Path of the cached install tree for this commit and build options, or
+    None if the source tree cannot be cached."""
+    if not BUILD_CACHE_DIR or not COMMIT_HASH_PATTERN.fullmatch(commit_id):
+        return None
+    # Not downloaded for this commit: a local checkout, which may have local
+    # changes.
+    if _source_commit(ggl_path) != commit_id:
+        return None
 
-    # Save the key and certificates
     try:
-        device_result = _create_file(DEVICE_PATH, device_cert)
-        key_result = _create_file(PRIVATE_PATH, private_key)
+        os_release = platform.freedesktop_os_release()
+        system = f"{os_release.get('ID')}-{os_release.get('VERSION_ID')}"
+    except OSError:
+        system = platform.system()
+    options = json.dumps([
+        CMAKE_BUILD_OPTIONS, BUILD_PROFILES[profile],
+        platform.machine(), system
+    ])
+    digest = hashlib.sha256(options.encode()).hexdigest()[:12]
+    return os.path.join(BUILD_CACHE_DIR, "builds",
+                        f"{commit_id}-{profile}-{digest}.tar.gz")
+
+
+def _cache_build(cache_path: str, build_dir: str) -> bool:
+    """Install the build into a staging tree and store it in the build
+    cache."""
+    staging_dir = os.path.join(WORKSPACE_DIR, "install-staging")
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        subprocess.run(['cmake', '--install', build_dir],
+                       check=True,
+                       env=dict(os.environ, DESTDIR=staging_dir))
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        subprocess.run([
+            'tar', '-czf', temp_path, '--owner=0', '--group=0', '-C',
+            staging_dir, '--no-recursion', '--null', '-T', '-'
+        ],
+                       input="\0".join(_install_entries(staging_dir)).encode(),
+                       check=True)
+        # Atomic, parallel runs never see a partial archive.
+        os.replace(temp_path, cache_path)
+        print(f"Stored build in {cache_path}")
+    except Exception as e:
+        print(f"Could not cache the build, installing directly: {e}")
+        return False
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return True
+
+
+def _install_entries(staging_dir: str) -> List[str]:
+    """The files and symlinks of an install tree, relative to it. Directory
+    entries are left out, they would carry the modes and times of the
+    staging tree onto /, /usr, /etc and the like when extracted."""
+    entries = []
+    for root, dirs, files in os.walk(staging_dir):
+        links = [d for d in dirs if os.path.islink(os.path.join(root, d))]
+        for name in files + links:
+            path = os.path.relpath(os.path.join(root, name), staging_dir)
+            entries.append(os.path.join(".", path))
+    return entries
+
+
+def _install_from_cache(cache_path: str) -> bool:
+    """Extract a cached install tree over the root filesystem. Directories
+    that already exist keep their metadata, archives cached before they were
+    left out still hold entries for them."""
+    try:
+        subprocess.run([
+            'sudo', 'tar', '-xzf', cache_path, '--no-overwrite-dir', '-C', '/'
+        ],
+                       check=True)
+        print("Successfully completed the install process")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Error during install process: {e}")
+        return False
 
-        if not device_result or not key_result:
-            return False
 
-        root_ca_url = "https://www.amazontrust.com/repository/AmazonRootCA1.pem"
-        ca_response = requests.get(root_ca_url)
-        ca_result = _create_file(CA_PATH, ca_response.text)
-        if not ca_result:
-            return False
+class SetupStage(NamedTuple):
+    """One step of setup_greengrass_lite. A falsy result fails the stage."""
+    name: str
+    run: Callable[[], Any]
+    after: Sequence[str] = ()
+    """Stages that must have succeeded before this one starts"""
+
+
+def _run_setup_stages(stages: Sequence[SetupStage], results: Dict[str,
+                                                                  Any]) -> bool:
+    """Run setup stages on a worker pool, each as soon as the stages it
+    depends on have succeeded, and report the time spent in each.
+
+    Results of successful stages are stored in `results` by stage name, and
+    stages already in it are not run again. After a failure no new stage is
+    started.
+    """
+    pending = {
+        stage.name: stage
+        for stage in stages if stage.name not in results
+    }
+    timings: Dict[str, float] = {}
+    failed = False
+    start = time.monotonic()
+
+    def timed(stage: SetupStage):
+        stage_start = time.monotonic()
+        try:
+            return stage.run()
+        finally:
+            timings[stage.name] = time.monotonic() - stage_start
+
+    with ThreadPoolExecutor(max_workers=SETUP_MAX_WORKERS) as executor:
+        running = {}
+        while pending or running:
+            if not failed:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.after):
+                        running[executor.submit(timed, stage)] = name
+                        del pending[name]
+            if not running:
+                if not failed:
+                    raise ValueError(
+                        f"Unsatisfiable setup stages: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error in setup stage {name}: {e}")
+                    result = None
+                if result:
+                    results[name] = result
+                else:
+                    print(f"Setup stage {name} failed")
+                    failed = True
+
+    print("Setup stage timings:")
+    for stage in stages:
+        if stage.name in timings:
+            print(f"  {stage.name:<14} {timings[stage.name]:7.2f}s")
+    print(f"  {'total':<14} {time.monotonic() - start:7.2f}s")
+    return not failed
+
+
+def _add_users() -> bool:
+    batch = PrivilegedBatch()
+    _add_user_and_group("ggcore", "ggcore", batch)
+    _add_user_and_group("gg_component", "gg_component", batch)
+    return batch.apply()
+
+
+def _create_device_dirs() -> bool:
+    batch = PrivilegedBatch()
+    _create_dir("/ggcredentials",
+                ownership=True,
+                flag='-R',
+                user="ggcore",
+                group="ggcore",
+                batch=batch)
+    _create_dir("/var/lib/greengrass",
+                ownership=True,
+                user="ggcore",
+                group="ggcore",
+                batch=batch)
+    _create_dir("/etc/greengrass", batch=batch)
+    return batch.apply()
+
+
+def _write_config(endpoints: Dict[str, str], thing_name: str,
+                  region: str) -> bool:
+    src_path = "docs/examples/sample_nucleus_config.yaml"
+    temp_path = "./config.yaml"
+    dest_path = "/etc/greengrass/config.yaml"
+
+    move_result1 = _copy_file(src_path, temp_path)
+    config_result = _modify_config(endpoints, thing_name, temp_path, "ggcore",
+                                   "ggcore", region)
+    if not config_result or not move_result1:
+        return False
+
+    batch = PrivilegedBatch()
+    _copy_file(temp_path, dest_path, batch)
+    _remove_file(temp_path, batch)
+    return batch.apply()
+
+
+def _build(commit_id: str, ggl_path: str,
+           profile: BuildProfile) -> Optional[Callable[[], bool]]:
+    """Build aws-greengrass-lite, or find it in the build cache. Returns the
+    function installing the build, or None if it failed."""
+    cache_path = _build_cache_path(commit_id, ggl_path, profile)
+    if cache_path is not None and os.path.exists(cache_path):
+        return lambda: _install_cached(cache_path)
+
+    build_dir = _build_tree(ggl_path, profile)
+    with _build_tree_lock(build_dir):
+        # Another run may have cached this build while we waited.
+        if cache_path is not None and os.path.exists(cache_path):
+            return lambda: _install_cached(cache_path)
+
+        build_result = _build_with_cmake(ggl_path, build_dir, profile)
+        if not build_result:
+            return None
+
+        if cache_path is not None and _cache_build(cache_path, build_dir):
+            return lambda: _install_cached(cache_path)
+
+    def install() -> bool:
+        with _build_tree_lock(build_dir):
+            return _install_with_cmake(build_dir)
+
+    return install
+
+
+def _install_cached(cache_path: str) -> bool:
+    if not _install_from_cache(cache_path):
+        return False
+    print(f"Installed cached build {cache_path}")
+    return True
+
 
-        print("Successfully saved all required certificates and keys")
+def _wait_for_registration(gg_client, thing_name: str, journal: JournalFollower,
+                           started: float) -> bool:
+    """Wait until the cloud knows `thing_name` as a core device.
+
+    Registration is polled with backed-off intervals, and immediately again
+    whenever one of REGISTRATION_EVENTS shows up in the journal. The time
+    from `started` to registration is recorded as a setup metric.
+    """
+    first_interval, longest_interval = REGISTRATION_POLL_INTERVAL
+    interval = first_interval
+    deadline = started + REGISTRATION_TIMEOUT
+    events = {
+        journal.expect(unit, pattern): unit
+        for unit, pattern in REGISTRATION_EVENTS
+    }
+    try:
+        while True:
+            try:
+                gg_client.get_core_device(coreDeviceThingName=thing_name)
+                latency = time.monotonic() - started
+                print(f"Device {thing_name} successfully registered with "
+                      f"Greengrass V2 after {latency:.2f}s")
+                _record_metric("registration_latency", latency)
+                return True
+            except gg_client.exceptions.ResourceNotFoundException:
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            pending = [event for event in events if not event.done()]
+            timeout = min(interval, remaining)
+            if not pending:
+                idle_sleep(timeout, "waiting for core device registration")
+                interval = min(interval * 2, longest_interval)
+                continue
+            with idle("waiting for core device registration"):
+                seen, _ = wait(pending, timeout, return_when=FIRST_COMPLETED)
+            seen = [event for event in seen if event.exception() is None]
+            for event in seen:
+                print(f"{events[event]} ready after "
+                      f"{time.monotonic() - started:.2f}s")
+            interval = (first_interval if seen else min(interval *
+                                                        2, longest_interval))
+    finally:
+        for event in events:
+            journal.discard(event)
+
+
+def _wait_for_nucleus(journal: JournalFollower, started: float) -> bool:
+    """Wait until the nucleus started at `started` logs NUCLEUS_READY_EVENT,
+    as setup does before the device registers."""
+    ready = journal.expect(*NUCLEUS_READY_EVENT)
+    try:
+        with idle("waiting for the nucleus to connect"):
+            done, _ = wait([ready], REGISTRATION_TIMEOUT)
+        if not done or ready.exception() is not None:
+            return False
+        print(f"{NUCLEUS_READY_EVENT[0]} ready after "
+              f"{time.monotonic() - started:.2f}s")
         return True
+    finally:
+        journal.discard(ready)
+
 
+def _record_metric(name: str, seconds: float):
+    """Append a timing to SETUP_METRICS_FILE."""
+    try:
+        with open(SETUP_METRICS_FILE, 'a') as f:
+            f.write(
+                json.dumps({
+                    "metric": name,
+                    "seconds": round(seconds, 3),
+                    "time": time.time()
+                }) + "\n")
+    except OSError as e:
+        print(f"Error when recording metric {name}: {e}")
+
+
+def _set_device_identity(device_cert: str, private_key: str,
+                         thing_name: str) -> bool:
+    """Swap the certificate, key and thing name of a restored device."""
+    config_path = "/etc/greengrass/config.yaml"
+    temp_path = os.path.join(WORKSPACE_DIR, "config.yaml")
+    try:
+        with open(config_path, 'r') as file:
+            data = yaml.safe_load(file)
+        data['system']['thingName'] = thing_name
+        with open(temp_path, 'w') as file:
+            yaml.dump(data, file, default_flow_style=False)
     except Exception as e:
-        print(f"Error when writing certificate or key: {str(e)}")
+        print(f"Error when modifying config.yaml: {str(e)}")
+        return False
+    batch = PrivilegedBatch()
+    _create_file(DEVICE_PATH, device_cert, batch)
+    _create_file(PRIVATE_PATH, private_key, batch)
+    _copy_file(temp_path, config_path, batch)
+    _remove_file(temp_path, batch)
+    return batch.apply()
+
+
+def _unit_files(unit_dir: str = UNIT_DIR) -> List[str]:
+    """The Greengrass Lite unit files installed in `unit_dir`."""
+    return sorted(
+        glob.glob(os.path.join(unit_dir, UNIT_FILE_PATTERN)) +
+        glob.glob(os.path.join(unit_dir, TARGET_FILE_PATTERN)))
+
+
+def _run_sudo(cmd: List[str], check: bool = True):
+    subprocess.run(['sudo', *cmd], check=check)
+
+
+def _download_root_ca() -> Optional[str]:
+    """The Root CA, downloaded once and then read from SETUP_STAMP_DIR while
+    its checksum matches the stamp."""
+    ca_path = (os.path.join(SETUP_STAMP_DIR, os.path.basename(CA_PATH))
+               if SETUP_STAMP_DIR else None)
+    stamp = _read_stamp("root_ca")
+    if ca_path is not None and stamp is not None:
+        try:
+            with open(ca_path, 'r') as f:
+                root_ca = f.read()
+            if (stamp.get("url") == ROOT_CA_URL and stamp.get("sha256")
+                    == hashlib.sha256(root_ca.encode()).hexdigest()):
+                print(f"Using Root CA from {ca_path}")
+                return root_ca
+        except OSError:
+            pass
+
+    try:
+        ca_response = requests.get(ROOT_CA_URL, timeout=DOWNLOAD_TIMEOUT)
+        ca_response.raise_for_status()
+        root_ca = ca_response.text
+    except requests.exceptions.RequestException as e:
+        print(f"Error when downloading the Root CA: {str(e)}")
+        return None
+
+    if ca_path is not None and "BEGIN CERTIFICATE" in root_ca:
+        try:
+            _write_atomic(ca_path, root_ca)
+            _write_stamp(
+                "root_ca", {
+                    "url": ROOT_CA_URL,
+                    "sha256": hashlib.sha256(root_ca.encode()).hexdigest()
+                })
+        except OSError as e:
+            print(f"Could not store the Root CA: {e}")
+    return root_ca
+
+
+def _read_stamp(name: str) -> Optional[dict]:
+    """The stamp last written for `name`, or None."""
+    if not SETUP_STAMP_DIR:
+        return None
+    try:
+        with open(os.path.join(SETUP_STAMP_DIR, f"{name}.json"), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_stamp(name: str, stamp: dict):
+    """Record that the setup step `name` was verified in the state described
+    by `stamp`."""
+    if not SETUP_STAMP_DIR:
+        return
+    try:
+        _write_atomic(os.path.join(SETUP_STAMP_DIR, f"{name}.json"),
+                      json.dumps(stamp))
+    except OSError as e:
+        print(f"Could not write the {name} setup stamp: {e}")
+
+
+def _write_atomic(path: str, content: str):
+    # Parallel runs share the stamps, never let them see a partial file.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def _tes_setup(device_cert: str, private_key: str, root_ca: str) -> bool:
+
+    # Save the key and certificates
+    batch = PrivilegedBatch()
+    _create_file(DEVICE_PATH, device_cert, batch)
+    _create_file(PRIVATE_PATH, private_key, batch)
+    _create_file(CA_PATH, root_ca, batch)
+    if not batch.apply():
+        print("Error when writing certificate or key")
         return False
 
+    print("Successfully saved all required certificates and keys")
+    return True
+
+
+def _get_iot_endpoints(iot_client: "client") -> Optional[Dict[str, str]]:
+    try:
+        return {
+            'data':
+            iot_client.describe_endpoint(
+                endpointType='iot:Data-ATS')['endpointAddress'],
+            'credentials':
+            iot_client.describe_endpoint(
+                endpointType='iot:CredentialProvider')['endpointAddress'],
+        }
+    except Exception as e:
+        print(f"Error when describing IoT endpoints: {str(e)}")
+        return None
+
 
-def _modify_config(iot_client: "client", thing_name: str, file_path: str,
+def _modify_config(endpoints: Dict[str, str], thing_name: str, file_path: str,
                    group: str, user: str, region: str) -> bool:
 
     try:
-        iot_data_endpoint = iot_client.describe_endpoint(
-            endpointType='iot:Data-ATS')['endpointAddress']
-        iot_cred_endpoint = iot_client.describe_endpoint(
-            endpointType='iot:CredentialProvider')['endpointAddress']
+        iot_data_endpoint = endpoints['data']
+        iot_cred_endpoint = endpoints['credentials']
 
         with open(file_path, 'r') as file:
             data = yaml.safe_load(file)
@@ -477,36 +1366,20 @@ def _modify_config(iot_client: "client", thing_name: str, file_path: str,
         return False
 
 
-def _stop_and_disable_services():
-    commands = [
-        ['sudo', 'systemctl', 'stop', 'greengrass-lite.target'],
-        ['sudo', 'systemctl', 'disable', 'greengrass-lite.target'],
-        ['sudo', 'systemctl', 'disable', 'ggl.aws_iot_tes.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.aws_iot_mqtt.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.gg_config.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.gg_health.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.gg_fleet_status.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.gg_deployment.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.gg_pubsub.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.gg-ipc.socket.socket'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.ggconfigd.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.iotcored.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.tesd.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.ggdeploymentd.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.gg-fleet-statusd.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.ggpubsubd.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.gghealthd.service'],
-        ['sudo', 'systemctl', 'disable', 'ggl.core.ggipcd.service'],
-        ['sudo', 'systemctl', 'daemon-reload'],
-        ['sudo', 'rm', '-rf', '/etc/systemd/system/ggl*']
-    ]
-
-    for cmd in commands:
-        try:
-            subprocess.run(cmd, check=True)
-        except Exception as e:
-            print(f"Error when executing {' '.join(cmd)}: {e}")
-            return False
+def _stop_and_disable_services(
+        batch: Optional["PrivilegedBatch"] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+
+    batch.run('systemctl', 'stop', 'greengrass-lite.target')
+    batch.run('systemctl', 'disable', *GREENGRASS_LITE_UNITS)
+    batch.run('systemctl', 'daemon-reload')
+    unit_files = glob.glob(os.path.join(UNIT_DIR, UNIT_FILE_PATTERN))
+    if unit_files:
+        batch.run('rm', '-rf', *unit_files)
+    if own_batch and not batch.apply():
+        return False
     print("Successfully stopped and disabled all services")
     return True
 
@@ -516,86 +1389,125 @@ def _stop_and_disable_services():
 # ===============================================
 
 
+class PrivilegedBatch:
+    """Commands that need root, queued to run in order by a single sudo
+    shell instead of one sudo process each. The first failing command stops
+    the batch."""
+    _commands: List[Tuple[str, str]]
+
+    def __init__(self):
+        self._commands = []
+
+    def run(self, *cmd: str):
+        command = shlex.join(cmd)
+        self._commands.append((command, command))
+
+    def write_file(self, file_path: str, content: str):
+        # printf is a shell builtin, so the content never shows up in the
+        # argument list of a process.
+        self._commands.append(
+            (f"printf '%s' {shlex.quote(content)} > {shlex.quote(file_path)}",
+             f"write {file_path}"))
+
+    def apply(self) -> bool:
+        """Run and clear the queued commands."""
+        if not self._commands:
+            return True
+        script = "".join(f"{command} || {{ echo {shlex.quote(description)}"
+                         f" failed >&2; exit 1; }}\n"
+                         for command, description in self._commands)
+        self._commands = []
+        try:
+            subprocess.run(['sudo', 'sh', '-s'],
+                           input=script,
+                           check=True,
+                           text=True)
+            return True
+        except Exception as e:
+            print(f"Error when running privileged commands: {str(e)}")
+            return False
+
+
 def _create_dir(dir: str,
                 permission=False,
                 octal=None,
                 ownership=False,
                 flag=None,
                 user=None,
-                group=None) -> bool:
-    try:
-        if not os.path.exists(dir):
-            subprocess.run(['sudo', 'mkdir', dir], check=True)
-        if permission and octal is not None:
-            subprocess.run(['sudo', 'chmod', octal, dir], check=True)
-        if ownership and user is not None and group is not None:
-            if flag is not None:
-                subprocess.run(['sudo', 'chown', flag, f'{user}:{group}', dir],
-                               check=True)
-            else:
-                subprocess.run(['sudo', 'chown', f'{user}:{group}', dir],
-                               check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error when creating directory: {str(e)}")
-        return False
-
-
-def _remove_dir(dir: str) -> bool:
-    try:
-        if os.path.exists(dir):
-            subprocess.run(['sudo', 'rm', '-rf', dir], check=True)
-            print(f"Successfully removed {dir}")
+                group=None,
+                batch: Optional[PrivilegedBatch] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+
+    # It may be created by another stage before the batch runs.
+    batch.run('mkdir', '-p', dir)
+    if permission and octal is not None:
+        batch.run('chmod', octal, dir)
+    if ownership and user is not None and group is not None:
+        if flag is not None:
+            batch.run('chown', flag, f'{user}:{group}', dir)
         else:
-            print(f"Directory {dir} does not exist, skipping removal")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error when removing directory: {str(e)}")
-        return False
+            batch.run('chown', f'{user}:{group}', dir)
+    return batch.apply() if own_batch else True
 
 
-def _create_file(file_path: str, content="") -> bool:
-    try:
-        subprocess.run(['sudo', 'tee', file_path],
-                       input=content,
-                       check=True,
-                       text=True,
-                       stdout=subprocess.DEVNULL)
+def _remove_dir(dir: str, batch: Optional[PrivilegedBatch] = None) -> bool:
+    if not os.path.exists(dir):
+        print(f"Directory {dir} does not exist, skipping removal")
         return True
-    except Exception as e:
-        print(f"Error when creating file and changing permission: {str(e)}")
-        return False
-
-
-def _move_file(src_path: str, dest_path: str) -> bool:
-    try:
-        subprocess.run(['sudo', 'mv', src_path, dest_path], check=True)
+    if batch is not None:
+        batch.run('rm', '-rf', dir)
         return True
-    except Exception as e:
-        print(f"Error when moving {src_path} to {dest_path}: {str(e)}")
-        return False
-
 
-def _copy_file(src_path: str, dest_path: str) -> bool:
-    try:
-        subprocess.run(['sudo', 'cp', '-p', src_path, dest_path], check=True)
-        return True
-    except Exception as e:
-        print(f"Error when copying {src_path} to {dest_path}: {str(e)}")
+    batch = PrivilegedBatch()
+    batch.run('rm', '-rf', dir)
+    if not batch.apply():
         return False
+    print(f"Successfully removed {dir}")
+    return True
 
 
-def _remove_file(file_path: str) -> bool:
-    try:
-        if os.path.exists(file_path):
-            subprocess.run(['sudo', 'rm', '-rf', file_path], check=True)
-            return True
-        else:
-            print("Error when removing the file: file does not exist")
-            return False
-    except subprocess.CalledProcessError as e:
-        print(f"Error when removing the file: {str(e)}")
+def _create_file(file_path: str,
+                 content="",
+                 batch: Optional[PrivilegedBatch] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+    batch.write_file(file_path, content)
+    return batch.apply() if own_batch else True
+
+
+def _move_file(src_path: str,
+               dest_path: str,
+               batch: Optional[PrivilegedBatch] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+    batch.run('mv', src_path, dest_path)
+    return batch.apply() if own_batch else True
+
+
+def _copy_file(src_path: str,
+               dest_path: str,
+               batch: Optional[PrivilegedBatch] = None) -> bool:
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+    batch.run('cp', '-p', src_path, dest_path)
+    return batch.apply() if own_batch else True
+
+
+def _remove_file(file_path: str,
+                 batch: Optional[PrivilegedBatch] = None) -> bool:
+    if not os.path.exists(file_path):
+        print("Error when removing the file: file does not exist")
         return False
+    own_batch = batch is None
+    if own_batch:
+        batch = PrivilegedBatch()
+    batch.run('rm', '-rf', file_path)
+    return batch.apply() if own_batch else True
 
 
 if __name__ == "__main__":
@@ -607,6 +1519,10 @@ if __name__ == "__main__":
     source_parser = subparsers.add_parser('setup_greengrass_lite')
     source_parser.add_argument('--id', required=True, help='Commit id')
     source_parser.add_argument('--region', required=True, help='AWS region')
+    source_parser.add_argument('--build-profile',
+                               default=BUILD_PROFILE,
+                               choices=list(BUILD_PROFILES),
+                               help='aws-greengrass-lite build profile')
 
     # Parser for clean_up without arguments
     subparsers.add_parser('clean_up')
@@ -615,6 +1531,6 @@ if __name__ == "__main__":
 
     # Call the selected function with appropriate arguments
     if args.function == 'setup_greengrass_lite':
-        setup_greengrass_lite(args.id, args.region)
+        setup_greengrass_lite(args.id, args.region, args.build_profile)
     elif args.function == 'clean_up':
         clean_up()
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple
 from uuid import uuid1
 import boto3
 from botocore.exceptions import ClientError, BotoCoreError
@@ -8,6 +8,7 @@ from botocore.config import Config
 import time
 import random
 import logging
+import shutil
 import subprocess
 from types_boto3_greengrassv2 import GreengrassV2Client
 from types_boto3_greengrassv2.type_defs import CreateDeploymentResponseTypeDef, ComponentDeploymentSpecificationTypeDef
@@ -18,6 +19,12 @@ import yaml
 from subprocess import run
 from pathlib import Path
 from typing import Sequence, Optional, Any, Dict, List, Literal, Optional, Sequence, NamedTuple
+from collections import deque
+from IdleBudget import ConditionWait, idle_sleep, record_condition, working
+from JournalFollower import (journal_window_args, native_journal_available,
+                             read_journal)
+from SystemInterface import ComponentStatus, SystemInterface
+from Workspace import WORKSPACE_DIR
 
 S3_ARTIFACT_DIR = "artifacts"
 RECIPE_DIR = "/var/lib/greengrass/packages/recipes"
@@ -30,6 +37,9 @@ THROTTLE_RETRY_CONFIG = Config(retries={"max_attempts": 10, "mode": "adaptive"})
 INITIAL_POLL_INTERVAL = 2    # start polling every 2s instead of 1s
 MAX_POLL_INTERVAL = 15    # cap backoff at 15s to stay responsive
 MAX_CONSECUTIVE_DEPLOYMENT_ERRORS = 3    # consecutive failed status checks before failing loudly
+DEVICE_LOG_WINDOW = 300    # seconds of logs dumped on failure outside of a test
+# Initial and maximum interval between checks of wait_until (seconds)
+WAIT_BACKOFF = (0.5, 5)
 
 # Delay between destructive teardown calls to ease IoT Jobs
 # DELETION_IN_PROGRESS concurrency limits.
@@ -62,7 +72,7 @@ def _retry_on_throttle(func, *, attempts=3, base_delay=1.0, cap=10.0):
             print(
                 f"  Throttled ({code}), retry {attempt + 1}/{attempts} after {delay:.1f}s"
             )
-            time.sleep(delay)
+            idle_sleep(delay, "throttling backoff")
         except BotoCoreError:
             if attempt == attempts - 1:
                 raise
@@ -70,16 +80,125 @@ def _retry_on_throttle(func, *, attempts=3, base_delay=1.0, cap=10.0):
             print(
                 f"  Transient error, retry {attempt + 1}/{attempts} after {delay:.1f}s"
             )
-            time.sleep(delay)
+            idle_sleep(delay, "transient error backoff")
 
 
 def sleep_with_log(seconds: int, reason: str = ""):
-    """Sleep with logging message before sleeping."""
+    """Sleep with logging message before sleeping, accounting the time as
+    idle time of `reason`."""
     msg = f"Sleeping for {seconds}s"
     if reason:
         msg += f" ({reason})"
     print(msg)
-    time.sleep(seconds)
+    idle_sleep(seconds, reason)
+
+
+def _poll(predicate: Callable[[], Any], timeout: int | float,
+          backoff: Tuple[float, float], reason: str) -> Tuple[bool, float, int]:
+    """Check `predicate` until it is true or `timeout` seconds passed,
+    backing off from the first to the second interval of `backoff`. Returns
+    whether it became true, the time it took and the number of checks."""
+    start = time.monotonic()
+    deadline = start + timeout
+    interval, max_interval = backoff
+    checks = 0
+    while True:
+        checks += 1
+        try:
+            with working(reason):
+                if predicate():
+                    return True, time.monotonic() - start, checks
+        except Exception as e:
+            print(f"Error: {e}")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False, time.monotonic() - start, checks
+        idle_sleep(min(interval, remaining), reason)
+        interval = min(interval * 2, max_interval)
+
+
+def wait_until(predicate: Callable[[], Any],
+               timeout: int | float,
+               backoff: Tuple[float, float] = WAIT_BACKOFF,
+               reason: str = "") -> bool:
+    """Wait until `predicate` returns a true value, checking it with
+    exponential `backoff` (initial, maximum interval in seconds) for at most
+    `timeout` seconds. A predicate raising an exception counts as false.
+
+    Use instead of fixed sleeps: the wait ends as soon as the condition
+    holds, and the time it took is recorded with the idle time of the test.
+    """
+    reason = reason or "condition"
+    print(f"Waiting up to {timeout}s ({reason})")
+    satisfied, elapsed, checks = _poll(predicate, timeout, backoff, reason)
+    record_condition(ConditionWait(reason, satisfied, elapsed, checks))
+    if satisfied:
+        print(f"Condition met after {elapsed:.1f}s, {checks} checks "
+              f"({reason})")
+    else:
+        print(f"Timeout after {timeout} seconds ({reason})")
+    return satisfied
+
+
+def holds_for(predicate: Callable[[], Any],
+              duration: int | float,
+              backoff: Tuple[float, float] = WAIT_BACKOFF,
+              reason: str = "") -> bool:
+    """Check that `predicate` stays true for `duration` seconds, returning
+    False as soon as it does not.
+
+    For conditions that must not change, like a component staying RUNNING,
+    where a fixed sleep followed by a single check would only notice the
+    change at the end.
+    """
+    reason = reason or "condition"
+    print(f"Checking for {duration}s ({reason})")
+    changed, elapsed, checks = _poll(lambda: not predicate(), duration, backoff,
+                                     reason)
+    record_condition(ConditionWait(reason, not changed, elapsed, checks))
+    if changed:
+        print(f"Condition no longer held after {elapsed:.1f}s ({reason})")
+    return not changed
+
+
+def settles_within(predicate: Callable[[], Any],
+                   window: int | float,
+                   backoff: Tuple[float, float] = WAIT_BACKOFF,
+                   reason: str = "") -> bool:
+    """Check that `predicate` becomes true within `window` seconds and stays
+    true until the window ends: wait_until, then holds_for the rest of it.
+
+    For a fixed sleep followed by a single check, like a component being
+    RUNNING some seconds after its deployment: one that starts and crashes
+    within the window still fails.
+    """
+    start = time.monotonic()
+    if not wait_until(predicate, window, backoff, reason):
+        return False
+    remaining = round(window - (time.monotonic() - start), 1)
+    return remaining <= 0 or holds_for(predicate, remaining, backoff, reason)
+
+
+def unit_state_probe(
+        system_interface: SystemInterface, component_name: str,
+        states: ComponentStatus | Sequence[ComponentStatus]
+) -> Callable[[], bool]:
+    """Probe for wait_until: the unit of `component_name` is in one of
+    `states`."""
+    if isinstance(states, str):
+        states = [states]
+    return lambda: system_interface.check_systemctl_status_for_component(
+        component_name) in states
+
+
+def log_probe(system_interface: SystemInterface,
+              service_name: str,
+              message: str,
+              count: int = 1) -> Callable[[], bool]:
+    """Probe for wait_until: `service_name` logged `message` at least `count`
+    times since the current test started."""
+    return lambda: system_interface.count_journal_messages(
+        service_name, message) >= count
 
 
 class ComponentDeploymentInfo(NamedTuple):
@@ -138,6 +257,10 @@ class GGTestUtils:
 
     @property
     def cli_bin_path(self) -> str:
+        # Builds installed from the build cache have no build tree, use the
+        # installed ggl-cli instead.
+        if shutil.which(self._cli_bin_path) is None:
+            return shutil.which("ggl-cli") or self._cli_bin_path
         return self._cli_bin_path
 
     def get_thing_group_arn(self, thing_group: str) -> str:
@@ -505,50 +628,7 @@ class GGTestUtils:
                                         print(
                                             f"\nChecking all Greengrass logs for errors..."
                                         )
-                                        try:
-                                            # Check all greengrass services
-                                            services = [
-                                                "ggdeploymentd", "iotcored",
-                                                "ggconfigd", "tesd",
-                                                "gghealthd", "ggipcd"
-                                            ]
-                                            for svc in services:
-                                                log_output = subprocess.run(
-                                                    [
-                                                        "journalctl", "-u", svc,
-                                                        "--no-pager", "-n",
-                                                        "50", "--since",
-                                                        "5 minutes ago"
-                                                    ],
-                                                    capture_output=True,
-                                                    text=True,
-                                                    timeout=3)
-                                                if log_output.stdout.strip(
-                                                ) and "-- No entries --" not in log_output.stdout:
-                                                    print(
-                                                        f"\n--- {svc} logs ---")
-                                                    print(log_output.
-                                                          stdout[-1500:])
-
-                                            # Check for any errors in all logs
-                                            error_log = subprocess.run(
-                                                [
-                                                    "journalctl", "--no-pager",
-                                                    "-p", "err", "--since",
-                                                    "5 minutes ago"
-                                                ],
-                                                capture_output=True,
-                                                text=True,
-                                                timeout=3)
-                                            if error_log.stdout.strip(
-                                            ) and "-- No entries --" not in error_log.stdout:
-                                                print(
-                                                    f"\n--- System errors (priority: err) ---"
-                                                )
-                                                print(error_log.stdout[-2000:])
-                                        except Exception as e:
-                                            print(
-                                                f"Could not retrieve logs: {e}")
+                                        self._dump_device_logs()
                                         print(f"{'='*60}\n")
                                         return "FAILED"
                                     else:
@@ -625,15 +705,22 @@ class GGTestUtils:
 
     def _dump_device_logs(self):
         """Dump recent Greengrass service logs for debugging."""
+        services = [
+            "ggdeploymentd", "iotcored", "ggconfigd", "tesd", "gghealthd",
+            "ggipcd"
+        ]
+        if native_journal_available():
+            self._dump_device_logs_native(services)
+            return
+
+        # Only entries logged since the current test started, falling back
+        # to a fixed window outside of a test.
+        window = journal_window_args() or ["--since", "5 minutes ago"]
         try:
-            services = [
-                "ggdeploymentd", "iotcored", "ggconfigd", "tesd", "gghealthd",
-                "ggipcd"
-            ]
             for svc in services:
                 log_output = subprocess.run([
                     "/usr/bin/journalctl", "-u", svc, "--no-pager", "-n", "50",
-                    "--since", "5 minutes ago"
+                    *window
                 ],
                                             capture_output=True,
                                             text=True,
@@ -643,13 +730,11 @@ class GGTestUtils:
                     print(f"\n--- {svc} logs ---")
                     print(log_output.stdout[-1500:])
 
-            error_log = subprocess.run([
-                "/usr/bin/journalctl", "--no-pager", "-p", "err", "--since",
-                "5 minutes ago"
-            ],
-                                       capture_output=True,
-                                       text=True,
-                                       timeout=3)
+            error_log = subprocess.run(
+                ["/usr/bin/journalctl", "--no-pager", "-p", "err", *window],
+                capture_output=True,
+                text=True,
+                timeout=3)
             if (error_log.stdout.strip()
                     and "-- No entries --" not in error_log.stdout):
                 print(f"\n--- System errors (priority: err) ---")
@@ -657,6 +742,32 @@ class GGTestUtils:
         except Exception as e:
             print(f"Could not retrieve logs: {e}")
 
+    def _dump_device_logs_native(self, services: Sequence[str]):
+        """Same as _dump_device_logs, reading the journal through sd-journal
+        instead of spawning journalctl for each service."""
+        since = time.time() - DEVICE_LOG_WINDOW
+        try:
+            logs: Dict[str, deque] = {
+                f"{svc}.service": deque(maxlen=50)
+                for svc in services
+            }
+            errors = deque(maxlen=50)
+            for record in read_journal(since=since):
+                if record.unit in logs:
+                    logs[record.unit].append(record.format())
+            for record in read_journal(since=since, max_priority=3):
+                errors.append(record.format())
+
+            for unit, lines in logs.items():
+                if lines:
+                    print(f"\n--- {unit.removesuffix('.service')} logs ---")
+                    print("\n".join(lines)[-1500:])
+            if errors:
+                print(f"\n--- System errors (priority: err) ---")
+                print("\n".join(errors)[-2000:])
+        except Exception as e:
+            print(f"Could not retrieve logs: {e}")
+
     def _upload_files_to_s3(self,
                             files: Sequence[os.PathLike | str],
                             bucket_name: str,
@@ -691,7 +802,7 @@ class GGTestUtils:
 
         # Wait for S3 propagation
         if files:
-            time.sleep(5)
+            idle_sleep(5, "S3 propagation")
 
         return True
 
@@ -745,7 +856,7 @@ class GGTestUtils:
                             print(
                                 f"Artifact not accessible yet, retrying in 10s (attempt {retry + 1}/20)"
                             )
-                            time.sleep(10)
+                            idle_sleep(10, "artifact not accessible yet")
                         else:
                             raise
                     except self._ggClient.exceptions.ConflictException:
@@ -759,23 +870,10 @@ class GGTestUtils:
                 self._ggComponentToDeleteArn.append(response["arn"])
 
                 # Wait for component to be DEPLOYABLE
-                component_name = response['componentName']
-                component_version = response['componentVersion']
-                for attempt in range(10):
-                    status_response = self._ggClient.describe_component(
-                        arn=response['arn'])
-                    status = status_response.get('status',
-                                                 {}).get('componentState')
-                    if status == 'DEPLOYABLE':
-                        print(
-                            f"Component {component_name} is DEPLOYABLE after {attempt + 1}s"
-                        )
-                        break
-                    time.sleep(1)
-                else:
-                    print(
-                        f"Warning: Component {component_name} status is {status}, not DEPLOYABLE after 10s"
-                    )
+                wait_until(
+                    self.deployable_probe([response['arn']]),
+                    10,
+                    reason=f"{response['componentName']} to be DEPLOYABLE")
 
         return cloud_recipe_name
 
@@ -865,9 +963,8 @@ class GGTestUtils:
                             recipe_obj["ComponentDependencies"][
                                 dependency[1]] = stored_val
 
-                        output_dir = os.path.join(
-                            "/tmp/aws-greengrass-testing-workspace", "ggtest",
-                            "modified_recipes")
+                        output_dir = os.path.join(WORKSPACE_DIR, "ggtest",
+                                                  "modified_recipes")
                         os.makedirs(output_dir, exist_ok=True)
                         new_file_path = os.path.join(
                             output_dir, os.path.basename(recipes_full_paths[0]))
@@ -896,8 +993,7 @@ class GGTestUtils:
     def _create_corrupt_file(self, file_path: str | os.PathLike):
         try:
             # Ensure the output directory exists
-            output_dir = os.path.join("/tmp/aws-greengrass-testing-workspace",
-                                      "ggtest", "corruptFiles")
+            output_dir = os.path.join(WORKSPACE_DIR, "ggtest", "corruptFiles")
             os.makedirs(output_dir, exist_ok=True)
 
             # Construct the new file path
@@ -950,7 +1046,7 @@ class GGTestUtils:
                 logging.warning(
                     f'Failed to delete component {componentArn} from configured test account: {e}'
                 )
-            time.sleep(TEARDOWN_CALL_DELAY)
+            idle_sleep(TEARDOWN_CALL_DELAY, "teardown call delay")
 
         # Delete S3 artifacts for each component random_id
         for random_id in set(self._component_random_ids.values()):
@@ -1007,7 +1103,7 @@ class GGTestUtils:
                                    cap=30.0)
             except Exception as e:
                 print(f"Failed to delete deployment {deployment}: {e}")
-            time.sleep(TEARDOWN_CALL_DELAY)
+            idle_sleep(TEARDOWN_CALL_DELAY, "teardown call delay")
 
         # Reset the lists.
         self._ggComponentToDeleteArn = []
@@ -1125,13 +1221,14 @@ class GGTestUtils:
             thing_name = self._resolve_single_thing_in_group(thing_group_name)
         if thing_name is None:
             return False
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if component_name in self.get_cloud_installed_components(
-                    thing_name):
-                return True
-            time.sleep(1)
-        return False
+
+        def installed() -> bool:
+            return component_name in self.get_cloud_installed_components(
+                thing_name)
+
+        return wait_until(installed,
+                          timeout,
+                          reason=f"{component_name} installed on {thing_name}")
 
     def wait_for_cloud_component_uninstalled(self,
                                              timeout: int | float,
@@ -1145,13 +1242,68 @@ class GGTestUtils:
             thing_name = self._resolve_single_thing_in_group(thing_group_name)
         if thing_name is None:
             return False
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if component_name not in self.get_cloud_installed_components(
-                    thing_name):
-                return True
-            time.sleep(1)
-        return False
+
+        def uninstalled() -> bool:
+            return component_name not in self.get_cloud_installed_components(
+                thing_name)
+
+        return wait_until(
+            uninstalled,
+            timeout,
+            reason=f"{component_name} uninstalled from {thing_name}")
+
+    def deployable_probe(self,
+                         arns: Optional[List[str]] = None
+                         ) -> Callable[[], bool]:
+        """Probe for wait_until: the component versions `arns`, by default all
+        uploaded so far, are DEPLOYABLE in the cloud."""
+        arns = list(self._ggComponentToDeleteArn if arns is None else arns)
+
+        def deployable() -> bool:
+            while arns:
+                status = self._ggClient.describe_component(arn=arns[0]).get(
+                    "status", {}).get("componentState")
+                if status != "DEPLOYABLE":
+                    return False
+                arns.pop(0)
+            return True
+
+        return deployable
+
+    def core_device_status_probe(
+            self, thing_name: str,
+            status: CoreDeviceStatusType) -> Callable[[], bool]:
+        """Probe for wait_until: the core device `thing_name` reports
+        `status`."""
+        return lambda: self._ggClient.get_core_device(
+            coreDeviceThingName=thing_name)["status"] == status
+
+    def core_device_group_probe(self,
+                                thing_name: str,
+                                thing_group_name: str,
+                                member: bool = True) -> Callable[[], bool]:
+        """Probe for wait_until: Greengrass lists the core device
+        `thing_name` in `thing_group_name`, or no longer does with `member`
+        False.
+
+        The IoT registry shows a membership change as soon as it is made;
+        Greengrass, which decides what a group deployment reaches, learns of
+        it later.
+        """
+        thing_group_arn = self.get_thing_group_arn(thing_group_name)
+
+        def membership() -> bool:
+            kwargs = {"thingGroupArn": thing_group_arn, "maxResults": 100}
+            while True:
+                response = self._ggClient.list_core_devices(**kwargs)
+                if any(device["coreDeviceThingName"] == thing_name
+                       for device in response.get("coreDevices", [])):
+                    return member
+                if "nextToken" not in response:
+                    return not member
+                kwargs["nextToken"] = response["nextToken"]
+
+        return membership
 
     def create_recipe_file(self, component_name: str) -> dict | None:
         template_file = os.path.join(".", "misc", "recipe_template.yaml")
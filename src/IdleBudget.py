@@ -0,0 +1,170 @@
+"""Accounting of the time the current test spends idle.
+
+Sleeps, poll loops and waits for events report the time they spent idle
+here, by reason. Poll loops also report the time of their checks as work,
+and wait_until and holds_for how long each condition took. The time of the
+test not reported as idle is counted as work. IdleBudgetPlugin resets the
+accountant before each test and checks its report after it. Session-scoped
+fixtures are set up and finalized during some test, but their time is
+accounted to the session, between enter_session and leave_session, so that
+no test is charged for them.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+UNSPECIFIED_REASON = "unspecified"
+
+
+class ReasonTotals(NamedTuple):
+    idle: float
+    work: float
+    waits: int
+
+
+class ConditionWait(NamedTuple):
+    reason: str
+    satisfied: bool
+    elapsed: float
+    checks: int
+
+
+class IdleReport(NamedTuple):
+    wall: float
+    idle: float
+    reasons: Dict[str, ReasonTotals]
+    conditions: List[ConditionWait]
+
+    @property
+    def work(self) -> float:
+        # Idle time of concurrent threads can add up to more than the test.
+        return max(self.wall - self.idle, 0.0)
+
+
+class _Account:
+    """Idle time, work and condition waits of a test or of the session."""
+
+    def __init__(self):
+        self.reasons: Dict[str, ReasonTotals] = {}
+        self.conditions: List[ConditionWait] = []
+        self.wall = 0.0    # wall time up to `started`
+        self.started: Optional[float] = None    # while accounting to it
+
+    def report(self, now: float) -> IdleReport:
+        wall = self.wall
+        if self.started is not None:
+            wall += now - self.started
+        reasons = dict(self.reasons)
+        return IdleReport(
+            wall, sum((totals.idle for totals in reasons.values()), 0.0),
+            reasons, list(self.conditions))
+
+
+_lock = threading.Lock()
+_test = _Account()
+# Session-scoped fixtures, set up and finalized while some test runs.
+_session = _Account()
+_session_depth = 0
+
+
+def _account() -> _Account:
+    return _session if _session_depth else _test
+
+
+def reset():
+    """Start accounting for a new test."""
+    global _test
+    with _lock:
+        _test = _Account()
+        if not _session_depth:
+            _test.started = time.monotonic()
+
+
+def report() -> IdleReport:
+    """Idle and work time of the current test so far, without that of
+    session-scoped fixtures."""
+    with _lock:
+        return _test.report(time.monotonic())
+
+
+def session_report() -> IdleReport:
+    """Idle and work time of session-scoped fixtures so far."""
+    with _lock:
+        return _session.report(time.monotonic())
+
+
+def enter_session():
+    """Account to the session rather than the current test, until the
+    matching leave_session."""
+    global _session_depth
+    with _lock:
+        _session_depth += 1
+        if _session_depth == 1:
+            now = time.monotonic()
+            _pause(_test, now)
+            _session.started = now
+
+
+def leave_session():
+    global _session_depth
+    with _lock:
+        _session_depth -= 1
+        if _session_depth == 0:
+            now = time.monotonic()
+            _pause(_session, now)
+            _test.started = now
+
+
+def _pause(account: _Account, now: float):
+    if account.started is not None:
+        account.wall += now - account.started
+        account.started = None
+
+
+def _add(reason: str, idle: float = 0.0, work: float = 0.0, waits: int = 0):
+    reason = reason or UNSPECIFIED_REASON
+    with _lock:
+        reasons = _account().reasons
+        totals = reasons.get(reason, ReasonTotals(0.0, 0.0, 0))
+        reasons[reason] = ReasonTotals(totals.idle + idle, totals.work + work,
+                                       totals.waits + waits)
+
+
+def record_idle(seconds: float, reason: str):
+    _add(reason, idle=seconds, waits=1)
+
+
+def record_work(seconds: float, reason: str):
+    _add(reason, work=seconds)
+
+
+@contextmanager
+def idle(reason: str) -> Iterator[None]:
+    """Account the time spent in the block as idle time of `reason`."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_idle(time.monotonic() - started, reason)
+
+
+@contextmanager
+def working(reason: str) -> Iterator[None]:
+    """Account the time spent in the block as work of `reason`."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record_work(time.monotonic() - started, reason)
+
+
+def record_condition(wait: ConditionWait):
+    with _lock:
+        _account().conditions.append(wait)
+
+
+def idle_sleep(seconds: float, reason: str):
+    """time.sleep, accounted as idle time of `reason`."""
+    with idle(reason):
+        time.sleep(seconds)
@@ -0,0 +1,210 @@
+"""pytest plugin checking the idle time of each test against a baseline.
+
+Sleeps and poll loops report their idle time to IdleBudget, by reason. After
+each test its idle time is compared with the one recorded for it in the
+`--idle-baseline` file; a test idle for longer than its baseline allows gets
+a warning, or with `--idle-gate=fail` an error. `--update-idle-baseline`
+records the idle times of the run as the new baseline. Session-scoped
+fixtures are accounted to the session instead of the test that happens to set
+them up or finalize them, so a test's idle time does not depend on whether it
+runs alone or with others. The session ends with a summary of the idlest
+tests, of the reasons they were idle for and of the slowest conditions waited
+for.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from pytest import PytestWarning, hookimpl
+
+import IdleBudget
+from IdleBudget import ConditionWait, IdleReport, ReasonTotals
+
+# Idle time allowed over the baseline, as a fraction of it plus seconds.
+IDLE_TOLERANCE = 0.2
+IDLE_SLACK = 5.0
+SUMMARY_SIZE = 10
+# Summary row of the session-scoped fixtures.
+SESSION_NODE = "session"
+
+
+class IdleBudgetWarning(PytestWarning):
+    """A test was idle for longer than its baseline allows."""
+
+
+_baseline: Dict[str, float] = {}
+_reports: Dict[str, IdleReport] = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption("--idle-baseline",
+                     action="store",
+                     default="",
+                     help="JSON file of the idle seconds of each test")
+    parser.addoption("--idle-tolerance",
+                     action="store",
+                     type=float,
+                     default=IDLE_TOLERANCE,
+                     help="Idle time allowed over the baseline, as a "
+                     "fraction of it")
+    parser.addoption("--idle-gate",
+                     action="store",
+                     choices=["warn", "fail"],
+                     default="warn",
+                     help="Warn about or fail tests idle for longer than "
+                     "their baseline allows")
+    parser.addoption("--update-idle-baseline",
+                     action="store_true",
+                     default=False,
+                     help="Record the idle times of this run as the baseline")
+    parser.addoption("--idle-summary",
+                     action="store",
+                     type=int,
+                     default=SUMMARY_SIZE,
+                     help="Number of the idlest tests and reasons to "
+                     "summarize, 0 to disable the summary")
+
+
+def pytest_configure(config):
+    path = config.getoption("--idle-baseline")
+    if path and not config.getoption("--update-idle-baseline"):
+        _baseline.update(_load_baseline(path))
+
+
+def _load_baseline(path: str) -> Dict[str, float]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Failed to read the idle baseline {path}: {e}")
+        return {}
+
+
+def pytest_runtest_logstart(nodeid: str, location):
+    IdleBudget.reset()
+
+
+@hookimpl(wrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    if fixturedef.scope != "session":
+        return (yield)
+    # Finalizers run last in, first out, so these two bracket the fixture's
+    # own finalization.
+    fixturedef.addfinalizer(IdleBudget.leave_session)
+    IdleBudget.enter_session()
+    try:
+        return (yield)
+    finally:
+        IdleBudget.leave_session()
+        fixturedef.addfinalizer(IdleBudget.enter_session)
+
+
+def _allowed_idle(config, nodeid: str) -> Optional[float]:
+    baseline = _baseline.get(nodeid)
+    if baseline is None:
+        return None
+    return baseline * (1 + config.getoption("--idle-tolerance")) + IDLE_SLACK
+
+
+@hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = yield
+    if call.when != "teardown":
+        return report
+    idle_report = IdleBudget.report()
+    _reports[item.nodeid] = idle_report
+    allowed = _allowed_idle(item.config, item.nodeid)
+    if allowed is None or idle_report.idle <= allowed:
+        return report
+
+    message = (f"Idle for {idle_report.idle:.1f}s, more than the "
+               f"{allowed:.1f}s allowed by its baseline of "
+               f"{_baseline[item.nodeid]:.1f}s. Idlest reasons: " +
+               ", ".join(f"{reason} {totals.idle:.1f}s"
+                         for reason, totals in _idlest(idle_report.reasons)))
+    if item.config.getoption("--idle-gate") == "fail" and report.passed:
+        report.outcome = "failed"
+        report.longrepr = message
+    else:
+        item.warn(IdleBudgetWarning(message))
+    return report
+
+
+def _idlest(reasons: Dict[str, ReasonTotals], size: int = 3):
+    idle = [item for item in reasons.items() if item[1].idle > 0]
+    return sorted(idle, key=lambda item: item[1].idle, reverse=True)[:size]
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--idle-baseline")
+    if not path or not session.config.getoption("--update-idle-baseline"):
+        return
+    # Re-read right before writing, so concurrent workers keep each other's
+    # entries.
+    baseline = _load_baseline(path)
+    baseline.update({
+        nodeid: round(report.idle, 1)
+        for nodeid, report in _reports.items()
+    })
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Failed to write the idle baseline {path}: {e}")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    size = config.getoption("--idle-summary")
+    if size <= 0 or not _reports:
+        return
+    reports = dict(_reports)
+    session_report = IdleBudget.session_report()
+    if session_report.wall > 0:
+        reports[SESSION_NODE] = session_report
+    terminalreporter.write_sep("=", "idle time")
+    terminalreporter.write_line(
+        f"{'idle':>9} {'work':>9} {'idle%':>6} {'baseline':>9}  test")
+    idlest = sorted(reports.items(),
+                    key=lambda item: item[1].idle,
+                    reverse=True)[:size]
+    for nodeid, report in idlest:
+        share = report.idle / report.wall * 100 if report.wall else 0.0
+        baseline = _baseline.get(nodeid)
+        baseline = f"{baseline:8.1f}s" if baseline is not None else f"{'-':>9}"
+        terminalreporter.write_line(
+            f"{report.idle:8.1f}s {report.work:8.1f}s {share:5.0f}% "
+            f"{baseline}  {nodeid}")
+
+    reasons: Dict[str, ReasonTotals] = {}
+    for report in reports.values():
+        for reason, totals in report.reasons.items():
+            total = reasons.get(reason, ReasonTotals(0.0, 0.0, 0))
+            reasons[reason] = ReasonTotals(total.idle + totals.idle,
+                                           total.work + totals.work,
+                                           total.waits + totals.waits)
+    terminalreporter.write_line("")
+    terminalreporter.write_line(f"{'idle':>9} {'work':>9} {'waits':>6}  reason")
+    for reason, totals in _idlest(reasons, size):
+        terminalreporter.write_line(f"{totals.idle:8.1f}s {totals.work:8.1f}s "
+                                    f"{totals.waits:6}  {reason}")
+
+    conditions: List[Tuple[str, ConditionWait]] = [
+        (nodeid, wait) for nodeid, report in reports.items()
+        for wait in report.conditions
+    ]
+    if not conditions:
+        return
+    terminalreporter.write_line("")
+    terminalreporter.write_line(
+        f"{'waited':>9} {'checks':>6} {'met':>4}  condition (test)")
+    slowest = sorted(conditions, key=lambda item: item[1].elapsed,
+                     reverse=True)[:size]
+    for nodeid, wait in slowest:
+        terminalreporter.write_line(
+            f"{wait.elapsed:8.1f}s {wait.checks:6} "
+            f"{'yes' if wait.satisfied else 'no':>4}  {wait.reason} ({nodeid})")
@@ -1,5 +1,6 @@
-from time import sleep, time
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import time
+from typing import Dict, List, Optional
 from boto3 import client
 from types_boto3_iot import IoTClient
 import botocore
@@ -9,14 +10,15 @@ import json
 import random
 import subprocess
 import uuid
-
-JSON_FILE = "/tmp/aws-greengrass-testing-workspace/iot_setup_data.json"
+from IdleBudget import idle_sleep
+from Workspace import JSON_FILE
 
 # Adaptive retry config: adds client-side rate limiting/backoff to absorb
 # IoT Core / GGv2 API throttling under parallel UAT load.
 THROTTLE_RETRY_CONFIG = Config(retries={"max_attempts": 10, "mode": "adaptive"})
 
 TEARDOWN_CALL_DELAY = 0.5    # seconds between destructive teardown calls to ease IoT Jobs DELETION_IN_PROGRESS limits
+TEARDOWN_MAX_WORKERS = 4    # concurrent per-certificate teardown pipelines
 
 # Retryable throttling error codes from AWS APIs.
 _THROTTLE_CODES = frozenset({
@@ -45,7 +47,7 @@ def _retry_on_throttle(func, *, attempts=3, base_delay=1.0, cap=10.0):
             print(
                 f"  Throttled ({code}), retry {attempt + 1}/{attempts} after {delay:.1f}s"
             )
-            sleep(delay)
+            idle_sleep(delay, "throttling backoff")
         except (BotoCoreError, botocore.exceptions.ConnectionError):
             if attempt == attempts - 1:
                 raise
@@ -53,7 +55,7 @@ def _retry_on_throttle(func, *, attempts=3, base_delay=1.0, cap=10.0):
             print(
                 f"  Transient error, retry {attempt + 1}/{attempts} after {delay:.1f}s"
             )
-            sleep(delay)
+            idle_sleep(delay, "transient error backoff")
 
 
 class IoTUtils():
@@ -71,6 +73,12 @@ class IoTUtils():
                                  region_name=self._region,
                                  config=THROTTLE_RETRY_CONFIG)
         self._thing_groups = []
+        # In-process model of thing groups this harness generated or created,
+        # and the things it added to them. Used optimistically to skip
+        # existence and membership lookups; the API is only consulted again
+        # on a not-found or conflict error.
+        self._generated_thing_groups = set()
+        self._thing_group_members: Dict[str, set] = {}
         self._provisioned_role_name = None
         self._provisioned_role_alias = None
 
@@ -117,7 +125,9 @@ class IoTUtils():
         return "ggl-uat-thing-" + id
 
     def generate_thing_group_name(self, id):
-        return "ggl-uat-thing-group-" + id
+        thing_group_name = "ggl-uat-thing-group-" + id
+        self._generated_thing_groups.add(thing_group_name)
+        return thing_group_name
 
     def set_up_core_device(self):
         id = self.generate_random_id()
@@ -164,6 +174,7 @@ class IoTUtils():
             thingGroupName=thing_group_name)
         if response is not None:
             self._thing_groups.append(response['thingGroupName'])
+            self._thing_group_members.setdefault(thing_group_name, set())
             print(f"Successfully created a thing group: {thing_group_name}")
             return True
 
@@ -171,18 +182,26 @@ class IoTUtils():
 
     def add_thing_to_thing_group(self, thing_name: str,
                                  thing_group_name: str) -> bool:
-        # Check if the thing group exists
+        if (thing_group_name in self._generated_thing_groups
+                and thing_group_name not in self._thing_group_members):
+            # Generated names are unique, so the group cannot exist yet.
+            try:
+                self.create_new_thing_group(thing_group_name)
+            except self._iot_client.exceptions.ResourceAlreadyExistsException:
+                print(f"Thing group {thing_group_name} already exists")
+
         try:
-            self._iot_client.describe_thing_group(
-                thingGroupName=thing_group_name)
+            response = self._iot_client.add_thing_to_thing_group(
+                thingName=thing_name, thingGroupName=thing_group_name)
         except self._iot_client.exceptions.ResourceNotFoundException:
-            # Thing group doesn't exist, create it
+            # Thing group doesn't exist, create it and retry
             self.create_new_thing_group(thing_group_name)
-
-        response = self._iot_client.add_thing_to_thing_group(
-            thingName=thing_name, thingGroupName=thing_group_name)
+            response = self._iot_client.add_thing_to_thing_group(
+                thingName=thing_name, thingGroupName=thing_group_name)
 
         if response['ResponseMetadata']['HTTPStatusCode'] == 200:
+            if thing_group_name in self._thing_group_members:
+                self._thing_group_members[thing_group_name].add(thing_name)
             print(
                 f"Successfully added thing '{thing_name}' to thing group '{thing_group_name}'"
             )
@@ -191,24 +210,26 @@ class IoTUtils():
 
     def remove_thing_from_thing_group(self, thing_name: str,
                                       thing_group_name: str) -> bool | None:
+        """Remove a thing from a thing group. Returns False if it is not a
+        member, and None if the group does not exist."""
         try:
-            # Check if the thing group exists
-            self._iot_client.describe_thing_group(
-                thingGroupName=thing_group_name)
-
-            # Check if the thing is in the group before attempting removal
-            response = self._iot_client.list_things_in_thing_group(
-                thingGroupName=thing_group_name, recursive=True)
+            if thing_name not in self._thing_group_members.get(
+                    thing_group_name, set()):
+                # Things also join groups outside this instance, for example
+                # through fleet provisioning, so ask IoT Core.
+                if not self._in_thing_group(thing_name, thing_group_name):
+                    # Raises ResourceNotFoundException for a missing group.
+                    self._iot_client.describe_thing_group(
+                        thingGroupName=thing_group_name)
+                    return False
 
-            # If the thing is not in the group, return False
-            if thing_name not in response.get('things', []):
-                return False
-
-            # Proceed with removal
             self._iot_client.remove_thing_from_thing_group(
                 thingName=thing_name, thingGroupName=thing_group_name)
+            self._thing_group_members.get(thing_group_name,
+                                          set()).discard(thing_name)
             return True
         except self._iot_client.exceptions.ResourceNotFoundException:
+            self._thing_group_members.pop(thing_group_name, None)
             print(f"Thing group {thing_group_name} does not exist")
             return None
         except self._iot_client.exceptions.ClientError as e:
@@ -217,6 +238,20 @@ class IoTUtils():
             )
             return False
 
+    def _in_thing_group(self, thing_name: str, thing_group_name: str) -> bool:
+        """Whether IoT Core lists `thing_name` in `thing_group_name`, updating
+        the membership model."""
+        paginator = self._iot_client.get_paginator(
+            'list_thing_groups_for_thing')
+        for page in paginator.paginate(thingName=thing_name):
+            for group in page.get('thingGroups', []):
+                if group['groupName'] == thing_group_name:
+                    if thing_group_name in self._thing_group_members:
+                        self._thing_group_members[thing_group_name].add(
+                            thing_name)
+                    return True
+        return False
+
     def delete_core_device(self):
         # Cancel all deployments for the core device
         try:
@@ -235,7 +270,7 @@ class IoTUtils():
                         print(
                             f"Failed to cancel deployment {deployment['deploymentId']}: {e}"
                         )
-                    sleep(TEARDOWN_CALL_DELAY)
+                    idle_sleep(TEARDOWN_CALL_DELAY, "teardown call delay")
                 print(f"Cancelled all deployments")
 
         except Exception as e:
@@ -262,36 +297,30 @@ class IoTUtils():
             principals = self._iot_client.list_thing_principals(
                 thingName=thing_name)['principals']
 
-            # For each certificate attached to the thing — isolate each so
-            # a failure on one cert doesn't leak the others.
-            for principal in principals:
-                try:
-                    cert_id = principal.split('/')[-1]
-
-                    # Detach all policies from the certificate
-                    policies = self._iot_client.list_attached_policies(
-                        target=principal)['policies']
-
-                    for policy in policies:
-                        self._iot_client.detach_policy(
-                            policyName=policy['policyName'], target=principal)
-
-                    # Detach certificate from thing
-                    self._iot_client.detach_thing_principal(
-                        thingName=thing_name, principal=principal)
-
-                    # Update certificate to INACTIVE
-                    self._iot_client.update_certificate(certificateId=cert_id,
-                                                        newStatus='INACTIVE')
-
-                    # Delete the certificate
-                    self._iot_client.delete_certificate(certificateId=cert_id,
-                                                        forceDelete=True)
-                except Exception as e:
-                    print(
-                        f"Error cleaning up cert {principal} for thing '{thing_name}': {e}"
-                    )
-                sleep(TEARDOWN_CALL_DELAY)
+            # Tear down each certificate in its own pipeline. All pipelines
+            # share this client, so its adaptive retry rate limiter still
+            # throttles the combined call rate. Each pipeline is isolated so a
+            # failure on one cert doesn't leak the others.
+            if principals:
+                workers = min(len(principals), TEARDOWN_MAX_WORKERS)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {}
+                    for index, principal in enumerate(principals):
+                        future = executor.submit(self._teardown_certificate,
+                                                 thing_name, principal, index)
+                        futures[future] = principal
+                    for future in as_completed(futures):
+                        principal = futures[future]
+                        try:
+                            timings = future.result()
+                            steps = ", ".join(
+                                f"{step}={elapsed:.2f}s"
+                                for step, elapsed in timings.items())
+                            print(f"Cleaned up cert {principal}: {steps}")
+                        except Exception as e:
+                            print(
+                                f"Error cleaning up cert {principal} for thing '{thing_name}': {e}"
+                            )
 
             # Finally, delete the thing
             _retry_on_throttle(
@@ -316,10 +345,12 @@ class IoTUtils():
     def delete_thing_group(self, thing_group_name: str):
         try:
             self._iot_client.delete_thing_group(thingGroupName=thing_group_name)
+            self._thing_group_members.pop(thing_group_name, None)
             print(f"Successfully deleted thing group '{thing_group_name}'")
             return True
 
         except self._iot_client.exceptions.ResourceNotFoundException:
+            self._thing_group_members.pop(thing_group_name, None)
             print(
                 f"Thing group '{thing_group_name}' does not exist, nothing to delete"
             )
@@ -331,8 +362,9 @@ class IoTUtils():
             )
             return False
 
-    def clean_up(self):
-        print("\nRunning IoT clean up...")
+    def clean_up_thing_groups(self):
+        """Remove the thing from the thing groups created for it and delete
+        them, so later deployments only reach it through new groups."""
         # Isolate per-resource so the first failure doesn't skip the rest.
         for thing_group in self._thing_groups:
             try:
@@ -344,14 +376,19 @@ class IoTUtils():
                 self.delete_thing_group(thing_group)
             except Exception as e:
                 print(f"Error deleting thing group {thing_group}: {e}")
-            sleep(TEARDOWN_CALL_DELAY)
+            idle_sleep(TEARDOWN_CALL_DELAY, "teardown call delay")
+        self._thing_groups = []
+
+    def clean_up(self):
+        print("\nRunning IoT clean up...")
+        self.clean_up_thing_groups()
 
         # Delete the core device
         try:
             self.delete_core_device()
         except Exception as e:
             print(f"Error deleting core device: {e}")
-        sleep(TEARDOWN_CALL_DELAY)
+        idle_sleep(TEARDOWN_CALL_DELAY, "teardown call delay")
 
         try:
             self.delete_thing(self._thing_name)
@@ -401,6 +438,56 @@ class IoTUtils():
     # ===============================================
     # HELPER FUNCTIONS
     # ===============================================
+    def _teardown_certificate(self,
+                              thing_name: str,
+                              principal: str,
+                              index: int = 0) -> Dict[str, float]:
+        """Detach and delete a single certificate, returning the time spent
+        in each step."""
+        timings: Dict[str, float] = {}
+
+        def timed(step, func, *args, **kwargs):
+            start = time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings[step] = timings.get(step, 0.0) + time() - start
+
+        # Stagger pipeline starts so a burst of certs doesn't hit IoT at once.
+        idle_sleep(index * TEARDOWN_CALL_DELAY, "teardown stagger")
+        cert_id = principal.split('/')[-1]
+
+        # Detach all policies from the certificate
+        policies = timed("list_policies",
+                         self._iot_client.list_attached_policies,
+                         target=principal)['policies']
+
+        for policy in policies:
+            timed("detach_policy",
+                  self._iot_client.detach_policy,
+                  policyName=policy['policyName'],
+                  target=principal)
+
+        # Detach certificate from thing
+        timed("detach_principal",
+              self._iot_client.detach_thing_principal,
+              thingName=thing_name,
+              principal=principal)
+
+        # Update certificate to INACTIVE
+        timed("deactivate",
+              self._iot_client.update_certificate,
+              certificateId=cert_id,
+              newStatus='INACTIVE')
+
+        # Delete the certificate
+        timed(
+            "delete", _retry_on_throttle,
+            lambda: self._iot_client.delete_certificate(certificateId=cert_id,
+                                                        forceDelete=True))
+
+        return timings
+
     def _create_iot_role(self,
                          role_name: str = "ggl-uat-role"
                          ) -> tuple[str | None, bool]:
@@ -0,0 +1,431 @@
+import fnmatch
+import grp
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import (Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence)
+
+try:
+    from systemd import journal as sd_journal
+except ImportError:    # systemd-python is optional, fall back to journalctl
+    sd_journal = None
+
+FOLLOWED_UNITS = "ggl.*"
+RING_BUFFER_SIZE = 20000    # journal records kept in memory
+BACKLOG_LINES = 1000    # records read from before the follower started outside a test
+FOLLOW_WAIT_INTERVAL = 0.5    # seconds between stop checks of the native follower
+
+# Groups allowed to read the system journal without sudo.
+JOURNAL_READER_GROUPS = ("systemd-journal", "adm")
+
+# Fields naming the unit an entry belongs to. Messages systemd logs about a
+# unit (e.g. "Started ...") carry it in UNIT rather than _SYSTEMD_UNIT.
+UNIT_FIELDS = ("_SYSTEMD_UNIT", "UNIT", "OBJECT_SYSTEMD_UNIT")
+
+# Journal position recorded when the current test started. Log queries only
+# read entries after it, which isolates tests without vacuuming the journal.
+_test_start_cursor: Optional[str] = None
+_test_start_time: Optional[float] = None
+
+
+def native_journal_available() -> bool:
+    """Whether the system journal can be read in-process through sd-journal
+    rather than by running journalctl under sudo."""
+    if sd_journal is None:
+        return False
+    if os.geteuid() == 0:
+        return True
+    groups = set(os.getgroups())
+    for name in JOURNAL_READER_GROUPS:
+        try:
+            if grp.getgrnam(name).gr_gid in groups:
+                return True
+        except KeyError:
+            continue
+    return False
+
+
+def read_journal_cursor() -> Optional[str]:
+    """Return the cursor of the newest journal entry, or None if the journal
+    is empty."""
+    if native_journal_available():
+        reader = sd_journal.Reader()
+        try:
+            reader.seek_tail()
+            return reader.get_previous().get("__CURSOR")
+        finally:
+            reader.close()
+    result = subprocess.run([
+        "sudo", "journalctl", "-n", "1", "-o", "json", "--no-pager",
+        "--output-fields=MESSAGE"
+    ],
+                            capture_output=True,
+                            text=True,
+                            check=False)
+    lines = result.stdout.strip().splitlines()
+    if not lines:
+        return None
+    return json.loads(lines[-1]).get("__CURSOR")
+
+
+def mark_test_start():
+    """Record the journal position at the start of a test."""
+    global _test_start_cursor, _test_start_time
+    _test_start_time = time.time()
+    try:
+        _test_start_cursor = read_journal_cursor()
+    except Exception as e:
+        print(f"Could not read journal cursor: {e}")
+        _test_start_cursor = None
+
+
+def journal_window_args() -> List[str]:
+    """journalctl arguments selecting the entries logged since the test
+    started, or an empty list outside of a test."""
+    if _test_start_cursor:
+        return [f"--after-cursor={_test_start_cursor}"]
+    if _test_start_time is not None:
+        # Empty journal at test start, every entry is from this test.
+        return [f"--since=@{int(_test_start_time)}"]
+    return []
+
+
+class JournalRecord(NamedTuple):
+    unit: str
+    message: str
+    timestamp: float
+    """Journal realtime timestamp, in seconds since the epoch"""
+    cursor: str
+
+    def format(self) -> str:
+        """Format the record like journalctl's short-precise output."""
+        stamp = time.strftime("%b %d %H:%M:%S", time.localtime(self.timestamp))
+        micros = int(self.timestamp * 1e6) % 1000000
+        return f"{stamp}.{micros:06d} {self.unit}: {self.message}"
+
+
+class MessageGroup(NamedTuple):
+    """The unit and message patterns covered by one matcher."""
+    unit: str
+    patterns: List[str]
+
+
+class _Matcher:
+    """Matches a list of patterns, in order, against the records of one
+    unit. The future resolves with one record per pattern."""
+
+    def __init__(self, unit: str, patterns: Sequence[str]):
+        self.unit = unit
+        self.patterns = list(patterns)
+        self.records: List[JournalRecord] = []
+        self.future: Future = Future()
+
+    def feed(self, record: JournalRecord) -> bool:
+        """Consume a record, returning True once every pattern matched."""
+        if (record.unit == self.unit
+                and self.patterns[len(self.records)] in record.message):
+            self.records.append(record)
+            if len(self.records) == len(self.patterns):
+                # Waiters may cancel the future at any time.
+                if self.future.set_running_or_notify_cancel():
+                    self.future.set_result(list(self.records))
+                return True
+        return False
+
+    def fail(self, error: Exception):
+        if self.future.set_running_or_notify_cancel():
+            self.future.set_exception(error)
+
+
+def _decode_message(message) -> str:
+    # journalctl emits non UTF-8 messages as an array of byte values,
+    # sd-journal leaves them as bytes.
+    if isinstance(message, list):
+        message = bytes(message)
+    if isinstance(message, bytes):
+        return message.decode("utf-8", errors="replace")
+    if message is None:
+        return ""
+    return str(message)
+
+
+def _entry_unit(entry: dict, units: Optional[Sequence[str]]) -> Optional[str]:
+    # The unit of an entry among `units` (glob patterns), or "" for any unit.
+    for field in UNIT_FIELDS:
+        unit = entry.get(field)
+        if isinstance(unit, str) and (units is None or any(
+                fnmatch.fnmatchcase(unit, pattern) for pattern in units)):
+            return unit
+    return None if units is not None else ""
+
+
+def _seek_test_start(reader) -> bool:
+    # Position an sd-journal reader on the first entry of the current test.
+    # The entry at the recorded cursor is still returned, see _read_entries.
+    if _test_start_cursor:
+        reader.seek_cursor(_test_start_cursor)
+        return True
+    if _test_start_time is not None:
+        reader.seek_realtime(_test_start_time)
+        return True
+    return False
+
+
+def _read_entries(reader, units: Optional[Sequence[str]],
+                  max_priority: Optional[int]) -> Iterator[JournalRecord]:
+    # Units are filtered in-process so glob patterns match units that only
+    # appear in the journal later.
+    for entry in reader:
+        if entry.get("__CURSOR") == _test_start_cursor:
+            continue
+        if (max_priority is not None
+                and int(entry.get("PRIORITY", 6)) > max_priority):
+            continue
+        unit = _entry_unit(entry, units)
+        if unit is None:
+            continue
+        yield JournalRecord(unit=unit,
+                            message=_decode_message(entry.get("MESSAGE")),
+                            timestamp=entry["__REALTIME_TIMESTAMP"].timestamp(),
+                            cursor=entry["__CURSOR"])
+
+
+def read_journal(units: Optional[Sequence[str]] = None,
+                 since: Optional[float] = None,
+                 max_priority: Optional[int] = None) -> Iterator[JournalRecord]:
+    """Read the journal entries logged since the current test started through
+    sd-journal, without spawning journalctl.
+
+    `units` are unit names or glob patterns, all units if None. Outside of a
+    test, entries are read from the `since` epoch timestamp, or from the
+    start of the journal. `max_priority` keeps entries at least as severe
+    (e.g. 3 for `journalctl -p err`). Requires native_journal_available().
+    """
+    reader = sd_journal.Reader()
+    try:
+        if not _seek_test_start(reader):
+            if since is not None:
+                reader.seek_realtime(since)
+            else:
+                reader.seek_head()
+        yield from _read_entries(reader, units, max_priority)
+    finally:
+        reader.close()
+
+
+def _follow_journal(units: str,
+                    stop: threading.Event) -> Iterator[JournalRecord]:
+    # sd-journal equivalent of `journalctl -f`, until `stop` is set.
+    reader = sd_journal.Reader()
+    try:
+        if not _seek_test_start(reader):
+            reader.seek_tail()
+            reader.get_previous(BACKLOG_LINES)
+        while not stop.is_set():
+            yield from _read_entries(reader, [units], None)
+            reader.wait(FOLLOW_WAIT_INTERVAL)
+    finally:
+        reader.close()
+
+
+class JournalFollower:
+    """A single journal stream shared by every log query of a test, read
+    through sd-journal when available and from `journalctl -f -o json`
+    otherwise.
+
+    Entries of the followed units are kept in a bounded ring buffer.
+    Callers register matchers with `expect`, which resolve as futures and
+    also consider entries that arrived before they were registered. Any
+    number of matchers are checked against each entry as it is read, so
+    waits on many messages share a single pass over the stream.
+    """
+    _units: str
+    _records: Deque[JournalRecord]
+    _matchers: List[_Matcher]
+    _process: Optional[subprocess.Popen]
+    _reader: Optional[threading.Thread]
+
+    def __init__(self,
+                 units: str = FOLLOWED_UNITS,
+                 buffer_size: int = RING_BUFFER_SIZE):
+        self._units = units
+        self._records = deque(maxlen=buffer_size)
+        self._matchers = []
+        self._lock = threading.Lock()
+        self._process = None
+        self._reader = None
+        self._stop = threading.Event()
+        self._eof = True
+
+    def covers(self, unit: str) -> bool:
+        return fnmatch.fnmatchcase(unit, self._units)
+
+    @property
+    def running(self) -> bool:
+        return not self._eof
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        if native_journal_available():
+            records = _follow_journal(self._units, self._stop)
+        else:
+            records = self._start_journalctl()
+        self._eof = False
+        self._reader = threading.Thread(target=self._read,
+                                        args=(records, ),
+                                        name="journal-follower",
+                                        daemon=True)
+        self._reader.start()
+        print(f"Following journal for {self._units}")
+
+    def _start_journalctl(self) -> Iterator[JournalRecord]:
+        # Units are filtered in-process: `journalctl -u <glob>` only expands
+        # the glob against units already in the journal, so components
+        # deployed later would be missed.
+        window = journal_window_args()
+        if window:
+            window.append("--lines=all")
+        else:
+            window = [f"--lines={BACKLOG_LINES}"]
+        cmd = [
+            "sudo", "journalctl", "-f", "-o", "json", "--no-pager", *window,
+            f"--output-fields=MESSAGE,{','.join(UNIT_FIELDS)}"
+        ]
+        self._process = subprocess.Popen(cmd,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL,
+                                         text=True)
+        records = (self._parse(line) for line in self._process.stdout)
+        return (record for record in records if record is not None)
+
+    def stop(self):
+        self._stop.set()
+        if self._process is not None:
+            try:
+                self._process.terminate()
+                self._process.wait(timeout=5)
+            except Exception:
+                self._process.kill()
+        if self._reader is not None:
+            self._reader.join(timeout=5)
+        self._process = None
+        self._reader = None
+
+    def expect(self, unit: str, *patterns:
+               str) -> "Future[List[JournalRecord]]":
+        """Return a future resolving with the records of `unit` whose messages
+        contain `patterns`, in that order, including records already
+        buffered."""
+        matcher = _Matcher(unit, patterns)
+        with self._lock:
+            for record in self._records:
+                if matcher.feed(record):
+                    return matcher.future
+            if not self.running:
+                matcher.fail(RuntimeError("journal follower is not running"))
+                return matcher.future
+            self._matchers.append(matcher)
+        return matcher.future
+
+    def discard(self, future: Future) -> List[JournalRecord]:
+        """Drop a matcher that is no longer awaited, returning the records it
+        matched so far."""
+        with self._lock:
+            matched = [m for m in self._matchers if m.future is future]
+            self._matchers = [
+                m for m in self._matchers if m.future is not future
+            ]
+        return matched[0].records if matched else []
+
+    def expect_messages(self, messages: Dict[str, Sequence[str]],
+                        ordered: bool) -> Dict[Future, MessageGroup]:
+        """Register matchers for the message patterns of several units: one
+        per pattern, or one sequence per unit if `ordered`. Returns the
+        futures with the unit and patterns each one covers."""
+        for unit in messages:
+            if not self.covers(unit):
+                raise ValueError(f"{unit} is not a followed unit")
+
+        futures = {}
+        for unit, patterns in messages.items():
+            print(f"Monitoring logs for {unit}...")
+            if ordered:
+                futures[self.expect(unit, *patterns)] = MessageGroup(
+                    unit, list(patterns))
+            else:
+                for pattern in patterns:
+                    futures[self.expect(unit, pattern)] = MessageGroup(
+                        unit, [pattern])
+        return futures
+
+    def collect_messages(
+            self, messages: Dict[str, Sequence[str]],
+            futures: Dict[Future, MessageGroup], timeout: int | float
+    ) -> Dict[str, Dict[str, Optional[JournalRecord]]]:
+        """Discard the matchers of `expect_messages` and return, per unit and
+        pattern, the matching record or None."""
+        matches: Dict[str, Dict[str, Optional[JournalRecord]]] = {
+            unit: dict.fromkeys(patterns)
+            for unit, patterns in messages.items()
+        }
+        for future, (unit, patterns) in futures.items():
+            # Discard first, the future cannot resolve after that.
+            records = self.discard(future)
+            if future.done() and future.exception() is None:
+                records = future.result()
+            for pattern, record in zip(patterns, records):
+                matches[unit][pattern] = record
+
+        for unit, found in matches.items():
+            for pattern, record in found.items():
+                if record is None:
+                    print(f"Not found in {unit} after {timeout} seconds: "
+                          f"{pattern}")
+                else:
+                    print(f"Found log in {unit} at {record.timestamp:.6f}: "
+                          f"{pattern}")
+        return matches
+
+    def records(self, unit: Optional[str] = None) -> List[JournalRecord]:
+        with self._lock:
+            return [r for r in self._records if unit is None or r.unit == unit]
+
+    def _parse(self, line: str) -> Optional[JournalRecord]:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+        for field in UNIT_FIELDS:
+            unit = entry.get(field)
+            if isinstance(unit, str) and self.covers(unit):
+                break
+        else:
+            return None
+        return JournalRecord(
+            unit=unit,
+            message=_decode_message(entry.get("MESSAGE")),
+            timestamp=int(entry.get("__REALTIME_TIMESTAMP", 0)) / 1e6,
+            cursor=entry.get("__CURSOR", ""))
+
+    def _read(self, records: Iterable[JournalRecord]):
+        # Blocking reads on a dedicated thread, no polling.
+        for record in records:
+            with self._lock:
+                self._records.append(record)
+                self._matchers = [
+                    m for m in self._matchers
+                    if not m.future.done() and not m.feed(record)
+                ]
+
+        with self._lock:
+            self._eof = True
+            for matcher in self._matchers:
+                matcher.fail(RuntimeError("journal follower stopped"))
+            self._matchers = []
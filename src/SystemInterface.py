@@ -1,291 +1,510 @@
+import fnmatch
 import os
 import subprocess
 import time
-from typing import Literal
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import TimeoutError as FutureTimeoutError, wait
+from typing import Any, Deque, Dict, Iterable, List, Literal, NamedTuple, Optional, Sequence
+
+try:
+    from jeepney import (DBusAddress, HeaderFields, MatchRule, Message,
+                         Properties, message_bus, new_method_call)
+    from jeepney.io.blocking import DBusConnection, open_dbus_connection
+    from jeepney.wrappers import unwrap_msg
+except ImportError:    # jeepney is optional, fall back to systemctl
+    open_dbus_connection = None
+
+from IdleBudget import idle, idle_sleep
+from JournalFollower import (FOLLOWED_UNITS, JournalFollower, JournalRecord,
+                             journal_window_args, native_journal_available,
+                             read_journal)
+
+SYSTEMD_BUS_NAME = "org.freedesktop.systemd1"
+SYSTEMD_MANAGER_PATH = "/org/freedesktop/systemd1"
+SYSTEMD_UNIT_PATH = "/org/freedesktop/systemd1/unit"
+DBUS_CALL_TIMEOUT = 5    # seconds
+UNIT_STATE_POLL_INTERVAL = 0.5    # seconds, only used without D-Bus
+GREENGRASS_LITE_TARGET = "greengrass-lite.target"
+
+# si_code reported in ExecMainCode once the main process has exited.
+CLD_EXITED = 1
+
+UNIT_STATE_PROPERTIES = ("LoadState", "ActiveState", "SubState", "Result",
+                         "ExecMainCode", "ExecMainStatus")
+
+ComponentStatus = Literal['RUNNING', 'FINISHED', 'NOT_RUNNING']
+
+
+class UnitState(NamedTuple):
+    """systemd properties describing the state of one unit."""
+    load_state: str
+    active_state: str
+    sub_state: str
+    result: str
+    exec_main_code: int
+    exec_main_status: int
+
+    @property
+    def status(self) -> ComponentStatus:
+        if self.active_state == "active" and self.sub_state == "running":
+            return "RUNNING"
+        # A unit that never ran is also inactive/dead with status 0, so
+        # require that the main process actually exited.
+        if (self.active_state == "inactive" and self.sub_state == "dead"
+                and self.result == "success"
+                and self.exec_main_code == CLD_EXITED
+                and self.exec_main_status == 0):
+            return "FINISHED"
+        return "NOT_RUNNING"
+
+
+def _unit_object_path(unit: str) -> str:
+    """Escape a unit name into its systemd D-Bus object path."""
+    escaped = "".join(c if c.isascii() and c.isalnum() and not (
+        i == 0 and c.isdigit()) else f"_{ord(c):02x}"
+                      for i, c in enumerate(unit))
+    return f"{SYSTEMD_UNIT_PATH}/{escaped}"
+
+
+def _component_unit_name(name: str) -> str:
+    """Map a component name to its unit, leaving `ggl.*` unit names as is."""
+    if name.startswith("ggl."):
+        return name
+    return f"ggl.{name}.service"
+
+
+def nucleus_command(action: str) -> List[str]:
+    """systemctl command applying `action` to the Greengrass Lite target."""
+    return [
+        "sudo", "systemctl", action, "--with-dependencies",
+        GREENGRASS_LITE_TARGET
+    ]
+
+
+def unit_user_command(component_name: str) -> List[str]:
+    """systemctl command printing the user a component runs as."""
+    return [
+        "systemctl", "show", "-p", "User",
+        _component_unit_name(component_name)
+    ]
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
 
 
 class SystemInterface:
-
-    def check_systemctl_status_for_component(
-            self, component_name: str
-    ) -> Literal['RUNNING', 'FINISHED', 'NOT_RUNNING']:
-        try:
-            cmd = [
-                "sudo",
-                "systemctl",
-                "status",
-                f"ggl.{component_name}.service",
-            ]
-
-            # Run the command and stream output
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
+    _journal: Optional[JournalFollower]
+    _dbus: Optional["DBusConnection"]
+    _dbus_available: bool
+    _subscribed: bool
+
+    def __init__(self):
+        self._journal = None
+        self._dbus = None
+        self._dbus_available = open_dbus_connection is not None
+        self._subscribed = False
+
+    def _get_dbus_connection(self) -> Optional["DBusConnection"]:
+        if not self._dbus_available:
+            return None
+        if self._dbus is None:
+            try:
+                self._dbus = open_dbus_connection(bus="SYSTEM")
+            except Exception as e:
+                # Don't retry on every status check, use systemctl from now on.
+                print(f"Could not connect to the system bus: {e}")
+                self._dbus_available = False
+                return None
+        return self._dbus
+
+    def _send_and_get_replies(self, connection: "DBusConnection",
+                              messages: List["Message"]) -> List["Message"]:
+        """Pipeline several method calls and wait for all their replies, so a
+        batch costs a single round trip on the bus."""
+        # Replies are caught by local filters, so that receiving them still
+        # hands any signals to the filters of other waits.
+        queue: Deque["Message"] = deque()
+        with ExitStack() as filters:
+            for reply_type in ("method_return", "error"):
+                filters.enter_context(
+                    connection.filter(MatchRule(type=reply_type), queue=queue))
+
+            serials = []
+            for message in messages:
+                serial = next(connection.outgoing_serial)
+                connection.send(message, serial=serial)
+                serials.append(serial)
+
+            replies: Dict[int, "Message"] = {}
+            deadline = time.time() + DBUS_CALL_TIMEOUT
+            while len(replies) < len(serials):
+                message = connection.recv_until_filtered(
+                    queue, timeout=max(deadline - time.time(), 0))
+                reply_to = message.header.fields.get(HeaderFields.reply_serial)
+                if reply_to in serials:
+                    replies[reply_to] = message
+        return [replies[serial] for serial in serials]
+
+    def _get_unit_states_dbus(self, connection: "DBusConnection",
+                              units: Sequence[str]) -> Dict[str, UnitState]:
+        # Result and ExecMain* only exist on service units.
+        queries = [(unit, interface) for unit in units
+                   for interface in ("org.freedesktop.systemd1.Unit",
+                                     "org.freedesktop.systemd1.Service")
+                   if unit.endswith(".service") or interface.endswith(".Unit")]
+        messages = [
+            Properties(
+                DBusAddress(_unit_object_path(unit),
+                            bus_name=SYSTEMD_BUS_NAME,
+                            interface=interface)).get_all()
+            for unit, interface in queries
+        ]
+        replies = self._send_and_get_replies(connection, messages)
+
+        properties: Dict[str, Dict[str, Any]] = {unit: {} for unit in units}
+        for (unit, _), reply in zip(queries, replies):
+            properties[unit].update({
+                name: value
+                for name, (_, value) in unwrap_msg(reply)[0].items()
+            })
+
+        return {
+            unit:
+            UnitState(load_state=props.get("LoadState", ""),
+                      active_state=props.get("ActiveState", ""),
+                      sub_state=props.get("SubState", ""),
+                      result=props.get("Result", ""),
+                      exec_main_code=int(props.get("ExecMainCode", 0)),
+                      exec_main_status=int(props.get("ExecMainStatus", 0)))
+            for unit, props in properties.items()
+        }
+
+    def _get_unit_states_systemctl(
+            self, units: Sequence[str]) -> Dict[str, UnitState]:
+        result = subprocess.run(
+            [
+                "systemctl", "show", *units,
+                f"--property={','.join(UNIT_STATE_PROPERTIES)}"
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # One block of key=value lines per unit, separated by blank lines, in
+        # the order the units were requested.
+        blocks = result.stdout.strip().split("\n\n")
+        if len(blocks) != len(units):
+            raise RuntimeError(
+                f"Expected {len(units)} units from systemctl show, got {len(blocks)}"
             )
 
-            output, errors = process.communicate()
-            if output:
-                if len(output.split("\n")) > 4:
-                    active_line = output.split("\n")[2].strip()
-                    process_line = output.split("\n")[4].strip()
-                    if "Active: active (running)" in active_line:
-                        print("Process is active")
-                        return "RUNNING"
-                    elif ("Active: inactive (dead)"
-                          in active_line) and ("status=0/SUCCESS"
-                                               in process_line):
-                        print("Process is finished")
-                        return "FINISHED"
+        states = {}
+        for unit, block in zip(units, blocks):
+            properties = dict(
+                line.split("=", 1) for line in block.splitlines()
+                if "=" in line)
+            states[unit] = UnitState(
+                load_state=properties.get("LoadState", ""),
+                active_state=properties.get("ActiveState", ""),
+                sub_state=properties.get("SubState", ""),
+                result=properties.get("Result", ""),
+                exec_main_code=_to_int(properties.get("ExecMainCode", "0")),
+                exec_main_status=_to_int(properties.get("ExecMainStatus", "0")))
+        return states
+
+    def _get_unit_states(self, units: Sequence[str]) -> Dict[str, UnitState]:
+        """Read the state of systemd units over D-Bus, falling back to
+        `systemctl show` when the system bus is unavailable."""
+        if not units:
+            return {}
+        connection = self._get_dbus_connection()
+        if connection is not None:
+            try:
+                return self._get_unit_states_dbus(connection, units)
+            except Exception as e:
+                print(f"D-Bus query for {', '.join(units)} failed, "
+                      f"using systemctl: {e}")
+                self._close_dbus_connection()
+        return self._get_unit_states_systemctl(units)
+
+    def get_unit_state(self, unit: str) -> UnitState:
+        return self._get_unit_states([unit])[unit]
+
+    def snapshot_units(self, names: Iterable[str]) -> Dict[str, UnitState]:
+        """Fetch the state of several ggl units in a single query.
+
+        `names` may be component names or full `ggl.*` unit names. The
+        returned map is keyed by the names as given.
+        """
+        names = list(dict.fromkeys(names))
+        units = [_component_unit_name(name) for name in names]
+        states = self._get_unit_states(units)
+        return {name: states[unit] for name, unit in zip(names, units)}
+
+    def _close_dbus_connection(self):
+        if self._dbus is not None:
+            try:
+                self._dbus.close()
+            except Exception:
+                pass
+            self._dbus = None
+            self._subscribed = False
+
+    def _subscribe_to_systemd(self, connection: "DBusConnection"):
+        """Ask systemd to emit unit signals, which it only does while at
+        least one client is subscribed."""
+        if self._subscribed:
+            return
+        manager = DBusAddress(SYSTEMD_MANAGER_PATH,
+                              bus_name=SYSTEMD_BUS_NAME,
+                              interface="org.freedesktop.systemd1.Manager")
+        unwrap_msg(
+            connection.send_and_get_reply(new_method_call(manager, "Subscribe"),
+                                          timeout=DBUS_CALL_TIMEOUT))
+        self._subscribed = True
+
+    def _wait_for_unit_state_dbus(self, connection: "DBusConnection", unit: str,
+                                  states: Sequence[ComponentStatus],
+                                  deadline: float) -> Optional[UnitState]:
+        # Signals carry systemd's unique bus name as sender, so match on the
+        # unit path only.
+        rule = MatchRule(type="signal",
+                         interface="org.freedesktop.DBus.Properties",
+                         member="PropertiesChanged",
+                         path=_unit_object_path(unit))
+        self._subscribe_to_systemd(connection)
+        unwrap_msg(
+            connection.send_and_get_reply(message_bus.AddMatch(rule),
+                                          timeout=DBUS_CALL_TIMEOUT))
+        try:
+            with connection.filter(rule, bufsize=64) as queue:
+                # Check after the match is in place so a transition between
+                # the check and the first signal can't be missed.
+                state = self._get_unit_states_dbus(connection, [unit])[unit]
+                while state.status not in states:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return None
+                    try:
+                        with idle("waiting for unit state"):
+                            connection.recv_until_filtered(queue,
+                                                           timeout=remaining)
+                    except TimeoutError:
+                        return None
+                    queue.clear()
+                    state = self._get_unit_states_dbus(connection, [unit])[unit]
+                return state
+        finally:
+            connection.send_and_get_reply(message_bus.RemoveMatch(rule),
+                                          timeout=DBUS_CALL_TIMEOUT)
+
+    def wait_for_unit_state(self, unit: str,
+                            states: ComponentStatus | Sequence[ComponentStatus],
+                            timeout: int | float) -> bool:
+        """Block until `unit` reaches one of `states` or the timeout elapses.
+
+        `unit` may be a component name or a full `ggl.*` unit name. With D-Bus
+        this wakes on systemd PropertiesChanged signals for the unit instead of
+        polling; otherwise it polls `systemctl show`.
+        """
+        unit = _component_unit_name(unit)
+        if isinstance(states, str):
+            states = [states]
+        deadline = time.time() + timeout
+        start = time.time()
+
+        state = None
+        connection = self._get_dbus_connection()
+        if connection is not None:
+            try:
+                state = self._wait_for_unit_state_dbus(connection, unit, states,
+                                                       deadline)
+            except Exception as e:
+                print(f"D-Bus wait for {unit} failed, polling instead: {e}")
+                self._close_dbus_connection()
+                state = self._poll_unit_state(unit, states, deadline)
+        else:
+            state = self._poll_unit_state(unit, states, deadline)
+
+        if state is None:
+            print(f"Timeout after {timeout} seconds waiting for {unit} "
+                  f"to be {'/'.join(states)}")
+            return False
+        print(f"{unit} is {state.status} after {time.time() - start:.2f}s")
+        return True
 
-            process.terminate()
+    def _poll_unit_state(self, unit: str, states: Sequence[ComponentStatus],
+                         deadline: float) -> Optional[UnitState]:
+        while True:
+            try:
+                state = self.get_unit_state(unit)
+                if state.status in states:
+                    return state
+            except Exception as e:
+                print(f"Error: {e}")
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            idle_sleep(min(UNIT_STATE_POLL_INTERVAL, remaining),
+                       "polling unit state")
 
-            return "NOT_RUNNING"
+    def check_systemctl_status_for_component(
+            self, component_name: str) -> ComponentStatus:
+        try:
+            state = self.get_unit_state(_component_unit_name(component_name))
+            status = state.status
+            if status == "RUNNING":
+                print("Process is active")
+            elif status == "FINISHED":
+                print("Process is finished")
+            return status
 
-        except KeyboardInterrupt:
-            print("\nStopping monitor...")
-            process.terminate()
-            return "NOT_RUNNING"
         except Exception as e:
             print(f"Error: {e}")
             return "NOT_RUNNING"
 
-    def stop_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+    def _run_command(
+            self, cmd: Sequence[str],
+            timeout: int | float) -> Optional[subprocess.CompletedProcess]:
+        """Run `cmd` to completion, returning None if it could not run or
+        did not finish within `timeout` seconds."""
         try:
-            cmd = [
-                "sudo",
-                "systemctl",
-                "stop",
-                "--with-dependencies",
-                "greengrass-lite.target",
-            ]
-
-            # Run the command and stream output
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-            )
-
-            timeout = time.time() + timeout
-
-            # Call the readline is blocking, set it to non-blocking mode.
-            os.set_blocking(process.stdout.fileno(), False)
-
-            while True:
-                # Check timeout
-                if time.time() > timeout:
-                    print(f"Timeout after {timeout} seconds")
-                    process.terminate()
-                    return False
-
-                output, errors = process.communicate()
-                if output:
-                    print(output)
-                    print(errors)
-                    return True
-
-                # Check if process has terminated
-                if process.poll() is not None:
-                    print("Shutdown process terminated.")
-                    return False
-
-                time.sleep(0.01)
-
-        except KeyboardInterrupt:
-            print("\nExiting the shutdown attempt...")
-            process.terminate()
-            return False
+            result = subprocess.run(cmd,
+                                    capture_output=True,
+                                    text=True,
+                                    timeout=timeout,
+                                    check=False)
+        except subprocess.TimeoutExpired:
+            print(f"Timeout after {timeout} seconds")
+            return None
         except Exception as e:
             print(f"Error: {e}")
-            return False
-        finally:
-            # Ensure process is terminated
-            try:
-                process.terminate()
-            except:
-                pass
-
-    def check_systemd_user(self, component_name, timeout: int | float) -> str:
-        try:
-            cmd = [
-                "systemctl", "show", "-p", "User",
-                f"ggl.{component_name}.service"
-            ]
+            return None
+        if result.stdout:
+            print(result.stdout)
+        if result.returncode != 0:
+            print(f"{' '.join(cmd)} exited with {result.returncode}: "
+                  f"{result.stderr}")
+        return result
 
-            # Run the command and stream output
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-            )
-
-            timeout = time.time() + timeout
-
-            # Call the readline is blocking, set it to non-blocking mode.
-            os.set_blocking(process.stdout.fileno(), False)
-
-            while True:
-                # Check timeout
-                if time.time() > timeout:
-                    print(f"Timeout after {timeout} seconds")
-                    process.terminate()
-                    return ""
-
-                output, errors = process.communicate()
-                if output:
-                    print(output)
-                    print(errors)
-                    return output
-
-                # Check if process has terminated
-                if process.poll() is not None:
-                    print("Shutdown process terminated.")
-                    return ""
-
-                time.sleep(0.01)
+    def stop_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+        result = self._run_command(nucleus_command("stop"), timeout)
+        return result is not None and result.returncode == 0
 
-        except KeyboardInterrupt:
-            print("\nExiting the shutdown attempt...")
-            process.terminate()
-            return ""
-        except Exception as e:
-            print(f"Error: {e}")
+    def check_systemd_user(self, component_name, timeout: int | float) -> str:
+        result = self._run_command(unit_user_command(component_name), timeout)
+        if result is None or result.returncode != 0:
             return ""
-        finally:
-            # Ensure process is terminated
-            try:
-                process.terminate()
-            except:
-                pass
+        return result.stdout
 
     def start_systemd_nucleus_lite(self, timeout: int | float) -> bool:
-        try:
-            cmd = [
-                "sudo",
-                "systemctl",
-                "start",
-                "--with-dependencies",
-                "greengrass-lite.target",
-            ]
-
-            # Run the command and stream output
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-            )
-
-            timeout = time.time() + timeout
-
-            # Call the readline is blocking, set it to non-blocking mode.
-            os.set_blocking(process.stdout.fileno(), False)
-
-            while True:
-                # Check timeout
-                if time.time() > timeout:
-                    print(f"Timeout after {timeout} seconds")
-                    process.terminate()
-                    return False
+        result = self._run_command(nucleus_command("start"), timeout)
+        return result is not None and result.returncode == 0
 
-                output, errors = process.communicate()
-                if output:
-                    print(output)
-                    print(errors)
-                    return False
-
-                # Check if process has terminated
-                if process.poll() is not None:
-                    print("Shutdown process terminated.")
-                    return False
+    def restart_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+        result = self._run_command(nucleus_command("restart"), timeout)
+        return result is not None and result.returncode == 0
+
+    @property
+    def journal(self) -> JournalFollower:
+        """The journal follower shared by this interface's log queries,
+        started on first use."""
+        if self._journal is None:
+            self._journal = JournalFollower()
+        self._journal.start()
+        return self._journal
+
+    def close(self):
+        """Stop the journal follower and drop the system bus connection."""
+        if self._journal is not None:
+            self._journal.stop()
+            self._journal = None
+        self._close_dbus_connection()
 
-                time.sleep(0.01)
+    def monitor_journalctl_for_message(self, service_name: str, message: str,
+                                       timeout: int | float) -> bool:
+        if not fnmatch.fnmatchcase(service_name, FOLLOWED_UNITS):
+            return self._monitor_journalctl_process(service_name, message,
+                                                    timeout)
 
-        except KeyboardInterrupt:
-            print("\nExiting the shutdown attempt...")
-            process.terminate()
+        print(f"Monitoring logs for {service_name}...")
+        journal = self.journal
+        future = journal.expect(service_name, message)
+        try:
+            with idle("waiting for journal message"):
+                record = future.result(timeout=timeout)[0]
+            print(f"Journalctl output: {record.message}")
+            print("Found log")
+            return True
+        except FutureTimeoutError:
+            print(f"Timeout after {timeout} seconds")
             return False
         except Exception as e:
             print(f"Error: {e}")
             return False
         finally:
-            # Ensure process is terminated
-            try:
-                process.terminate()
-            except:
-                pass
-
-    def restart_systemd_nucleus_lite(self, timeout: int | float) -> bool:
+            journal.discard(future)
+
+    def wait_for_messages(
+            self,
+            messages: Dict[str, Sequence[str]],
+            timeout: int | float,
+            ordered: bool = False
+    ) -> Dict[str, Dict[str, Optional[JournalRecord]]]:
+        """Wait for log messages of several units at once.
+
+        `messages` maps ggl unit names to the message patterns expected in
+        their journal. All patterns are matched on the shared journal stream
+        under one timeout. With `ordered`, each unit's patterns must appear in
+        the given order. Returns, per unit and pattern, the matching record
+        (with its journal timestamp), or None if it was not seen in time.
+        """
+        journal = self.journal
+        futures = journal.expect_messages(messages, ordered)
+        with idle("waiting for journal messages"):
+            wait(futures, timeout=timeout)
+        return journal.collect_messages(messages, futures, timeout)
+
+    def count_journal_messages(self, service_name: str, message: str) -> int:
+        """Count the journal entries of `service_name` containing `message`
+        that were logged since the current test started."""
+        if native_journal_available():
+            return sum(1 for record in read_journal([service_name])
+                       if message in record.message)
+
+        process = subprocess.Popen(
+            [
+                "sudo", "journalctl", "-u", service_name,
+                *journal_window_args(), "-o", "cat", "--no-pager"
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
         try:
-            cmd = [
-                "sudo",
-                "systemctl",
-                "restart",
-                "--with-dependencies",
-                "greengrass-lite.target",
-            ]
-
-            # Run the command and stream output
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-            )
-
-            timeout = time.time() + timeout
-
-            while True:
-                # Check timeout
-                if time.time() > timeout:
-                    print(f"Timeout after {timeout} seconds")
-                    process.terminate()
-                    return False
-
-                output, errors = process.communicate()
-                if output:
-                    print(output)
-                    print(errors)
-                    return False
-
-                status = process.poll()
-                # Process completed successfully
-                if status == 0:
-                    return True
-
-                # Check if process has terminated
-                if status is not None:
-                    print("Shutdown process terminated.")
-                    return False
-
-                time.sleep(0.01)
-
-        except KeyboardInterrupt:
-            print("\nExiting the shutdown attempt...")
-            process.terminate()
-            return False
-        except Exception as e:
-            print(f"Error: {e}")
-            return False
+            # Stream the output rather than buffering the whole journal.
+            return sum(1 for line in process.stdout if message in line)
         finally:
-            # Ensure process is terminated
-            try:
-                process.terminate()
-            except:
-                pass
+            process.stdout.close()
+            process.wait()
 
-    def monitor_journalctl_for_message(self, service_name: str, message: str,
-                                       timeout: int | float) -> bool:
+    def _monitor_journalctl_process(self, service_name: str, message: str,
+                                    timeout: int | float) -> bool:
         try:
+            # Within a test only read entries logged since it started,
+            # otherwise jump to the end of the journal.
+            window = journal_window_args() or ["-e"]
             cmd = [
                 "sudo",
                 "journalctl",
-                "-xeau",
+                "-xau",
                 service_name,
+                *window,
                 "-f",    # Follow mode - shows new entries as they are added
                 "--no-pager",
             ]
@@ -324,7 +543,7 @@ class SystemInterface:
                     print("journalctl process killed.")
                     return False
 
-                time.sleep(0.01)
+                idle_sleep(0.01, "polling journalctl output")
 
         except KeyboardInterrupt:
             print("\nStopping monitor...")
@@ -0,0 +1,255 @@
+"""pytest plugin timing the phases of each test.
+
+The public methods of GGTestUtils, IoTUtils and SystemInterface and the
+public functions of GGLSetup are wrapped in timing spans. The spans of each
+test are written as a JSONL timeline to `--timeline-dir`, one file per test,
+and the session ends with a summary of the slowest spans across all tests.
+Spans record the pytest phase they ran in, and their time spent outside the
+spans they called, so provisioning in fixture setup is told apart from
+deployment waits in the test itself.
+"""
+import functools
+import inspect
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from pytest import hookimpl
+
+from Workspace import WORKSPACE_DIR
+
+# Classes whose public methods are timed, by module.
+TIMED_CLASSES = {
+    "GGTestUtils": "GGTestUtils",
+    "IoTUtils": "IoTUtils",
+    "SystemInterface": "SystemInterface",
+}
+# Modules whose public functions are timed.
+TIMED_MODULES = ["GGLSetup"]
+TIMELINE_DIR = os.path.join(WORKSPACE_DIR, "timelines")
+SUMMARY_SIZE = 20
+# Spans outside of any test, like those of session fixtures torn down last.
+SESSION_NODE = "session"
+
+
+class Span(NamedTuple):
+    test: str
+    phase: str
+    name: str
+    start: float    # seconds since the test started
+    duration: float
+    self_time: float    # duration without the spans called
+    depth: int
+    thread: str
+    error: Optional[str]
+
+
+class SpanStats:
+    """Totals of one span name across the session."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.self_time = 0.0
+        self.longest = 0.0
+        self.tests = set()
+
+    def add(self, span: Span):
+        self.calls += 1
+        self.total += span.duration
+        self.self_time += span.self_time
+        self.longest = max(self.longest, span.duration)
+        self.tests.add(span.test)
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_current_test = SESSION_NODE
+_current_phase = "session"
+_test_started = time.monotonic()
+_timeline: List[Span] = []
+_stats: Dict[str, SpanStats] = {}
+_timeline_dir = TIMELINE_DIR
+
+
+def pytest_addoption(parser):
+    parser.addoption("--timeline-dir",
+                     action="store",
+                     default=TIMELINE_DIR,
+                     help="Directory of the per-test timing timelines")
+    parser.addoption("--timing-summary",
+                     action="store",
+                     type=int,
+                     default=SUMMARY_SIZE,
+                     help="Number of the slowest spans to summarize, "
+                     "0 to disable the summary")
+
+
+def pytest_configure(config):
+    global _timeline_dir
+    _timeline_dir = config.getoption("--timeline-dir")
+    _instrument_loaded()
+
+
+def pytest_collection_finish(session):
+    # Test modules import their own copies of the modules as src.*.
+    _instrument_loaded()
+
+
+def _instrument_loaded():
+    for module_name, module in list(sys.modules.items()):
+        if module is None:
+            continue
+        base_name = module_name.removeprefix("src.")
+        if base_name in TIMED_CLASSES:
+            class_name = TIMED_CLASSES[base_name]
+            cls = getattr(module, class_name, None)
+            if cls is not None:
+                _instrument_class(cls, class_name)
+        if base_name in TIMED_MODULES:
+            _instrument_module(module, base_name)
+
+
+def _instrument_class(cls: type, class_name: str):
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if isinstance(attr, (staticmethod, classmethod)):
+            if _timeable(attr.__func__):
+                setattr(
+                    cls, name,
+                    type(attr)(_timed(f"{class_name}.{name}", attr.__func__)))
+        elif _timeable(attr):
+            setattr(cls, name, _timed(f"{class_name}.{name}", attr))
+
+
+def _instrument_module(module, module_name: str):
+    for name, attr in list(vars(module).items()):
+        if (not name.startswith("_") and _timeable(attr)
+                and attr.__module__ == module.__name__):
+            setattr(module, name, _timed(f"{module_name}.{name}", attr))
+
+
+def _timeable(attr) -> bool:
+    return (inspect.isfunction(attr) and not getattr(attr, "__timed__", False)
+            and not inspect.iscoroutinefunction(attr)
+            and not inspect.isgeneratorfunction(attr))
+
+
+def _timed(name: str, func: Callable) -> Callable:
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        test, phase, test_started = (_current_test, _current_phase,
+                                     _test_started)
+        stack.append(0.0)
+        started = time.monotonic()
+        error = None
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.monotonic() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += duration
+            _record(
+                Span(test, phase, name, round(started - test_started, 6),
+                     round(duration, 6), round(duration - children, 6),
+                     len(stack),
+                     threading.current_thread().name, error))
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def _record(span: Span):
+    with _lock:
+        _timeline.append(span)
+        _stats.setdefault(span.name, SpanStats()).add(span)
+
+
+def _set_phase(phase: str):
+    global _current_phase
+    _current_phase = phase
+
+
+def pytest_runtest_logstart(nodeid: str, location):
+    global _current_test, _test_started
+    _current_test = nodeid
+    _test_started = time.monotonic()
+
+
+@hookimpl(wrapper=True)
+def pytest_runtest_setup(item):
+    _set_phase("setup")
+    return (yield)
+
+
+@hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    _set_phase("call")
+    return (yield)
+
+
+@hookimpl(wrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    _set_phase("teardown")
+    return (yield)
+
+
+def pytest_runtest_logfinish(nodeid: str, location):
+    global _current_test
+    _current_test = SESSION_NODE
+    _set_phase("session")
+    _write_timeline(nodeid)
+
+
+def pytest_sessionfinish(session):
+    _write_timeline(SESSION_NODE)
+
+
+def _write_timeline(nodeid: str):
+    global _timeline
+    with _lock:
+        spans = [span for span in _timeline if span.test == nodeid]
+        _timeline = [span for span in _timeline if span.test != nodeid]
+    if not spans:
+        return
+    try:
+        os.makedirs(_timeline_dir, exist_ok=True)
+        file_name = re.sub(r"[^\w.-]+", "_", nodeid) + ".jsonl"
+        with open(os.path.join(_timeline_dir, file_name), "w") as f:
+            for span in sorted(spans, key=lambda span: span.start):
+                f.write(json.dumps(span._asdict()) + "\n")
+    except OSError as e:
+        print(f"Failed to write the timeline of {nodeid}: {e}")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    size = config.getoption("--timing-summary")
+    if size <= 0 or not _stats:
+        return
+    with _lock:
+        slowest = sorted(_stats.items(),
+                         key=lambda item: item[1].total,
+                         reverse=True)[:size]
+    terminalreporter.write_sep("=", "slowest phases")
+    terminalreporter.write_line(
+        f"{'total':>9} {'self':>9} {'longest':>9} {'calls':>6} "
+        f"{'tests':>6}  span")
+    for name, stats in slowest:
+        terminalreporter.write_line(
+            f"{stats.total:8.1f}s {stats.self_time:8.1f}s "
+            f"{stats.longest:8.1f}s {stats.calls:6} {len(stats.tests):6}  "
+            f"{name}")
+    terminalreporter.write_line(f"Timelines written to {_timeline_dir}")
@@ -0,0 +1,17 @@
+"""Workspace of the test run.
+
+Everything a test run writes outside the device lives under one workspace
+root, taken from GGL_WORKSPACE_DIR. Each pytest-xdist worker gets its own
+directory below it, so workers, and containers given their own roots, never
+share setup data, sources or temporary recipes. Caches meant to be shared
+between runs, like the build cache and its build trees, are kept elsewhere.
+"""
+import os
+
+WORKSPACE_ROOT = os.environ.get("GGL_WORKSPACE_DIR",
+                                "/tmp/aws-greengrass-testing-workspace")
+# Set by pytest-xdist in its workers before any test module is imported.
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "")
+WORKSPACE_DIR = (os.path.join(WORKSPACE_ROOT, WORKER_ID)
+                 if WORKER_ID else WORKSPACE_ROOT)
+JSON_FILE = os.path.join(WORKSPACE_DIR, "iot_setup_data.json")
@@ -1,52 +1,9 @@
-from typing import Generator
-from GGTestUtils import sleep_with_log
-from pytest import fixture, mark
+from pytest import mark
 from src.IoTUtils import IoTUtils
-from src.GGTestUtils import GGTestUtils
+from src.GGTestUtils import GGTestUtils, wait_until
 from src.SystemInterface import SystemInterface
 
 import time
-import src.GGLSetup as ggl_setup
-
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    gg_util_obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    iot_obj = IoTUtils(region)
-
-    iot_obj.set_up_core_device()
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-
-    yield iot_obj
-
-    ggl_setup.clean_up()
-    iot_obj.clean_up()
-
-
-@fixture(scope="function")    # Runs for each test function
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-
-    # yield the instance of the class to the tests.
-    yield interface
-
-    # This section is called AFTER the test is run.
-    pass
 
 
 # As a component developer, I can create Greengrass component that works on my current platform.
@@ -78,8 +35,6 @@ def test_Component_12_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "SUCCEEDED")
 
-    sleep_with_log(5)
-
     # And  I can check the cli to see the status of component MultiPlatform is RUNNING
     """ GG LITE CLI DOES NOT SUPPORT THIS YET. """
 
@@ -87,7 +42,7 @@ def test_Component_12_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + component_cloud_name[0] + ".service",
         "Hello world! World",
-        timeout=20) is True)
+        timeout=25) is True)
 
 
 # GC developer can create a component with recipes containing s3 artifact. GGC operator can deploy it and artifact can be run.
@@ -118,8 +73,6 @@ def test_Component_16_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         120, deployment_id) == "SUCCEEDED")
 
-    sleep_with_log(5)
-
     # Then I can check the cli to see the status of component HelloWorld is RUNNING
     """ GG LITE CLI DOES NOT SUPPORT THIS YET. """
 
@@ -127,7 +80,7 @@ def test_Component_16_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + component_cloud_name[0] + ".service",
         "Evergreen's dev experience is great!",
-        timeout=20,
+        timeout=25,
     ) is True)
 
 
@@ -150,8 +103,10 @@ def test_Component_27_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     component_cloud_name = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I corrupt the contents of the component HelloWorld version 1.0.0 in the S3 bucket
     assert gg_util_obj.upload_corrupt_artifacts_to_s3("HelloWorld",
@@ -192,62 +147,37 @@ def test_Component_29_T0(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "aws.gg.uat.local.ComponentConfigTestService=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 120
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "aws.gg.uat.local.ComponentConfigTestService") == "FINISHED":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state(
+        "aws.gg.uat.local.ComponentConfigTestService", "FINISHED", timeout=120)
 
     # I can check the cli to see the status of component aws.gg.uat.local.ComponentConfigTestService is FINISHED
     assert (system_interface.check_systemctl_status_for_component(
         "aws.gg.uat.local.ComponentConfigTestService") == "FINISHED")
 
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /singleLevelKey: default value of singleLevelKey"
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Value for /singleLevelKey: default value of singleLevelKey",
-        timeout=20) is True)
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /nestedKey/leafKey: default value of /nestedKey/leafKey."
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Value for /nestedKey/leafKey: default value of /nestedKey/leafKey.",
-        timeout=20) is True)
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /nestedKey: {"leafKey":"default value of /nestedKey/leafKey"}. I will be interpolated as a serialized JSON String."
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Value for /nestedKey: {\"leafKey\":\"default value of /nestedKey/leafKey\"}. I will be interpolated as a serialized JSON String.",
-        timeout=20) is True)
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /listKey/0: item1."
-    # TODO: Add this after we support json pointer support for list indices. This logging has been removed from the component recipe for now.
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /emptyStringKey: ."
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Value for /emptyStringKey: .",
-        timeout=20) is True)
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /defaultIsNullKey: null"
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Value for /defaultIsNullKey: null",
-        timeout=20) is True)
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Value for /newSingleLevelKey: {configuration:/newSingleLevelKey}."
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Value for /newSingleLevelKey: {configuration:/newSingleLevelKey}.",
-        timeout=20) is True)
-
-    # And the aws.gg.uat.local.ComponentConfigTestService log contains the line "Verified JSON interpolation from script"
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl.aws.gg.uat.local.ComponentConfigTestService.service",
-        "Verified JSON interpolation from script",
-        timeout=20) is True)
+    # And the aws.gg.uat.local.ComponentConfigTestService log contains the lines
+    #   "Value for /singleLevelKey: default value of singleLevelKey"
+    #   "Value for /nestedKey/leafKey: default value of /nestedKey/leafKey."
+    #   "Value for /nestedKey: {"leafKey":"default value of /nestedKey/leafKey"}. I will be interpolated as a serialized JSON String."
+    #   "Value for /emptyStringKey: ."
+    #   "Value for /defaultIsNullKey: null"
+    #   "Value for /newSingleLevelKey: {configuration:/newSingleLevelKey}."
+    #   "Verified JSON interpolation from script"
+    # TODO: Add "Value for /listKey/0: item1." after we support json pointer support for list indices. This logging has been removed from the component recipe for now.
+    service = "ggl.aws.gg.uat.local.ComponentConfigTestService.service"
+    matches = system_interface.wait_for_messages(
+        {
+            service: [
+                "Value for /singleLevelKey: default value of singleLevelKey",
+                "Value for /nestedKey/leafKey: default value of /nestedKey/leafKey.",
+                "Value for /nestedKey: {\"leafKey\":\"default value of /nestedKey/leafKey\"}. I will be interpolated as a serialized JSON String.",
+                "Value for /emptyStringKey: .",
+                "Value for /defaultIsNullKey: null",
+                "Value for /newSingleLevelKey: {configuration:/newSingleLevelKey}.",
+                "Verified JSON interpolation from script",
+            ]
+        },
+        timeout=20)
+    assert all(record is not None for record in matches[service].values())
 
     # I can use greengrass-cli component details -n to check the component aws.gg.uat.local.ComponentConfigTestService has configuration that is equal to JSON:
     #     """
@@ -395,13 +325,7 @@ def test_Component_34_T4(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
                                                 "Minimal=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "Minimal") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("Minimal", "RUNNING", timeout=180)
 
     # I install the component Minimal version 2.0.0 from local store
     component_recipe_dir = "./components/Minimal/2.0.0/recipe/"
@@ -409,18 +333,17 @@ def test_Component_34_T4(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
                                                 "Minimal=2.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "Minimal") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("Minimal", "RUNNING", timeout=180)
 
     # the local files for component Minimal version 2.0.0 should exist
-    # TODO: Replace hacky sleep when we can use CLI to verify a local deployment has finished.
-    sleep_with_log(30)
-    assert gg_util_obj.recipe_for_component_exists("Minimal", "2.0.0")
+    # TODO: Wait for the deployment through the CLI once it can report it.
+    assert wait_until(
+        lambda: gg_util_obj.recipe_for_component_exists("Minimal", "2.0.0"),
+        30,
+        reason="recipe of Minimal 2.0.0 to be stored")
 
     # the local files for component Minimal version 1.0.0 should not exist
-    assert not gg_util_obj.recipe_for_component_exists("Minimal", "1.0.0")
+    assert wait_until(
+        lambda: not gg_util_obj.recipe_for_component_exists("Minimal", "1.0.0"),
+        30,
+        reason="recipe of Minimal 1.0.0 to be removed")
@@ -9,65 +9,17 @@ This test deploys ConfigUpdateSubscriber (v1.0.0) via a CLOUD deployment
   2. Deploying the same component version but with a DIFFERENT merged config
      value DOES produce a new CONFIG_UPDATE_RECEIVED event.
 """
-import subprocess
-from typing import Generator
 
-from pytest import fixture
-
-from src.GGTestUtils import GGTestUtils, ComponentDeploymentInfo, sleep_with_log
+from src.GGTestUtils import (GGTestUtils, ComponentDeploymentInfo, holds_for,
+                             log_probe, wait_until)
 from src.IoTUtils import IoTUtils
 from src.SystemInterface import SystemInterface
-import src.GGLSetup as ggl_setup
-
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    obj = GGTestUtils(request.config.getoption("--aws-account"),
-                      request.config.getoption("--s3-bucket"),
-                      request.config.getoption("--region"),
-                      request.config.getoption("--ggl-cli-path"))
-    yield obj
-    obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    obj = IoTUtils(region)
-    obj.set_up_core_device()
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-    yield obj
-    ggl_setup.clean_up()
-    obj.clean_up()
-
-
-@fixture(scope="function")
-def system_interface() -> Generator[SystemInterface, None, None]:
-    yield SystemInterface()
-
-
-def _count_markers(service: str, marker: str) -> int:
-    """Return total count of `marker` occurrences in `service`'s journal
-    for the current boot."""
-    result = subprocess.run(
-        ["sudo", "journalctl", "-u", service, "-b", "--no-pager"],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    return sum(1 for line in result.stdout.splitlines() if marker in line)
 
 
 def _wait_running(system_interface: SystemInterface,
                   component: str,
                   timeout: int = 180):
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                component) == "RUNNING":
-            return
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state(component, "RUNNING", timeout)
 
 
 def _deploy(gg_util_obj: GGTestUtils, thing_group_arn: str, component: str,
@@ -106,7 +58,9 @@ def test_ConfigUpdateSubscription_no_duplicate_on_repeat_deploy(
     component = gg_util_obj.upload_component_with_versions(
         component, [version]).name
     service = f"ggl.{component}.service"
-    sleep_with_log(5, "let cloud mark the component DEPLOYABLE")
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # First deployment: component starts and subscribes. The default config is
     # written once, so exactly one CONFIG_UPDATE_RECEIVED event is expected
@@ -118,9 +72,14 @@ def test_ConfigUpdateSubscription_no_duplicate_on_repeat_deploy(
     # Wait for subscription to be established and initial event delivered.
     assert system_interface.monitor_journalctl_for_message(
         service, "CONFIG_UPDATE_SUBSCRIBED", timeout=60) is True
-    sleep_with_log(5, "let initial config update event flush")
+    wait_until(log_probe(system_interface, service, marker),
+               30,
+               reason="let initial config update event flush")
+
+    def marker_count() -> int:
+        return system_interface.count_journal_messages(service, marker)
 
-    baseline = _count_markers(service, marker)
+    baseline = marker_count()
     print(f"Baseline {marker} count: {baseline}")
 
     # Re-deploy with an identical merge config twice. Config values are
@@ -129,9 +88,12 @@ def test_ConfigUpdateSubscription_no_duplicate_on_repeat_deploy(
     for i in range(2):
         _deploy(gg_util_obj, thing_group_arn, component, version,
                 {"watchedKey": "v1"}, f"DeploymentRepeat{i + 1}")
-        sleep_with_log(10, "let deployment propagate")
+        # Ends early if an event shows up, which the check below reports.
+        holds_for(lambda: marker_count() == baseline,
+                  10,
+                  reason="let deployment propagate")
 
-    after_redeploy = _count_markers(service, marker)
+    after_redeploy = marker_count()
     print(f"{marker} after re-deploys: {after_redeploy}")
     assert after_redeploy == baseline, (
         f"Expected no new config update events after redeploying identical "
@@ -141,9 +103,11 @@ def test_ConfigUpdateSubscription_no_duplicate_on_repeat_deploy(
     # for watchedKey. This MUST produce a new CONFIG_UPDATE_RECEIVED event.
     _deploy(gg_util_obj, thing_group_arn, component, version,
             {"watchedKey": "v2"}, "Deployment2")
-    sleep_with_log(15, "let config-change deployment propagate")
+    wait_until(log_probe(system_interface, service, marker, after_redeploy + 1),
+               60,
+               reason="let config-change deployment propagate")
 
-    after_change = _count_markers(service, marker)
+    after_change = marker_count()
     print(f"{marker} after value change: {after_change}")
     assert after_change > after_redeploy, (
         f"Expected new config update event after value change, but count "
@@ -1,53 +1,12 @@
-from typing import Generator
-from GGTestUtils import sleep_with_log
-from pytest import fixture, mark
+from pytest import mark
 from src.IoTUtils import IoTUtils, JSON_FILE
-from src.GGTestUtils import GGTestUtils, ComponentDeploymentInfo
+from src.GGTestUtils import (GGTestUtils, ComponentDeploymentInfo, holds_for,
+                             settles_within, sleep_with_log, unit_state_probe,
+                             wait_until)
 from src.SystemInterface import SystemInterface
 
 import json
 import time
-import src.GGLSetup as ggl_setup
-
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    gg_util_obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    iot_obj = IoTUtils(region)
-
-    iot_obj.set_up_core_device()
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-
-    yield iot_obj
-
-    ggl_setup.clean_up()
-    iot_obj.clean_up()
-
-
-@fixture(scope="function")    # Runs for each test function
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-
-    # yield the instance of the class to the tests.
-    yield interface
-
-    # This section is called AFTER the test is run.
-    pass
 
 
 #As a developer, I can use the local cli to deploy a single component to a device locally without cloud intervention.
@@ -62,13 +21,9 @@ def test_Deployment_1_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         None, component_recipe_dir, "SampleComponentWithConfiguration=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
 
     # I can check the cli to see the status of component SampleComponentWithConfiguration is RUNNING
     assert (system_interface.check_systemctl_status_for_component(
@@ -92,13 +47,9 @@ def test_Deployment_1_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         None, component_recipe_dir, "SampleComponentWithConfiguration=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
 
     component_recipe_dir = "./components/SampleComponentWithArtifacts/1.0.0/recipe/"
     component_artifacts_dir = "./components/local_artifacts/"
@@ -107,24 +58,21 @@ def test_Deployment_1_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "SampleComponentWithArtifacts=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithArtifacts") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithArtifacts",
+                                         "RUNNING",
+                                         timeout=180)
+
+    states = system_interface.snapshot_units(
+        ["SampleComponentWithConfiguration", "SampleComponentWithArtifacts"])
 
     # I can check the cli to see the status of component SampleComponentWithConfiguration is RUNNING
-    assert (system_interface.check_systemctl_status_for_component(
-        "SampleComponentWithConfiguration") == "RUNNING")
+    assert states["SampleComponentWithConfiguration"].status == "RUNNING"
 
     # I can check the cli to see the component SampleComponentWithConfiguration is running with version 1.0.0
     # GG_LITE CLI doesn't support this yet.
 
     # I can check the cli to see the status of component SampleComponentWithArtifacts is RUNNING
-    assert (system_interface.check_systemctl_status_for_component(
-        "SampleComponentWithArtifacts") == "RUNNING")
+    assert states["SampleComponentWithArtifacts"].status == "RUNNING"
 
     # I can check the cli to see the component SampleComponentWithArtifacts is running with version 1.0.0
     # GG_LITE CLI doesn't support this yet.
@@ -145,13 +93,9 @@ def test_Deployment_1_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
 
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
 
     # I can check the cli to see the status of component SampleComponentWithConfiguration is RUNNING
     assert (system_interface.check_systemctl_status_for_component(
@@ -180,13 +124,9 @@ def test_Deployment_1_T6(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         None, component_recipe_dir, "SampleComponentWithConfiguration=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
 
     component_recipe_dir = "./components/SampleComponentWithArtifacts/1.0.0/recipe/"
     component_artifacts_dir = "./components/local_artifacts/"
@@ -195,24 +135,21 @@ def test_Deployment_1_T6(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "SampleComponentWithArtifacts=1.0.0"))
     # TODO: We can use the CLI to verify that a local deployment has finished once that feature exists
     # For now, check if the expected component is running within a timeout.
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithArtifacts") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithArtifacts",
+                                         "RUNNING",
+                                         timeout=180)
+
+    states = system_interface.snapshot_units(
+        ["SampleComponentWithConfiguration", "SampleComponentWithArtifacts"])
 
     # I can check the cli to see the status of component SampleComponentWithConfiguration is RUNNING
-    assert (system_interface.check_systemctl_status_for_component(
-        "SampleComponentWithConfiguration") == "RUNNING")
+    assert states["SampleComponentWithConfiguration"].status == "RUNNING"
 
     # I can check the cli to see the component SampleComponentWithConfiguration is running with version 1.0.0
     # GG_LITE CLI doesn't support this yet.
 
     # I can check the cli to see the status of component SampleComponentWithArtifacts is RUNNING
-    assert (system_interface.check_systemctl_status_for_component(
-        "SampleComponentWithArtifacts") == "RUNNING")
+    assert states["SampleComponentWithArtifacts"].status == "RUNNING"
 
     # I can check the cli to see the component SampleComponentWithArtifacts is running with version 1.0.0
     # GG_LITE CLI doesn't support this yet.
@@ -240,13 +177,9 @@ def test_Deployment_1_T12(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
 
     # I can check the cli to see the status of component HelloWorldBroken is BROKEN
     # TODO: Use a proper timeout. Old testing framework uses 30 * timeoutMultiplier seconds
-    timeout = 30
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "HelloWorldBroken") == "BROKEN":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    wait_until(unit_state_probe(system_interface, "HelloWorldBroken", "BROKEN"),
+               30,
+               reason="HelloWorldBroken to be BROKEN")
 
     # I can check the cli to see the component HelloWorldBroken is running with version 1.0.0
     # GG_LITE CLI doesn't support this yet.
@@ -277,8 +210,10 @@ def test_Deployment_3_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     component_cloud_name = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I create a deployment configuration for deployment Deployment1 with components
     #   | HelloWorld | 1.0.0 |
@@ -305,8 +240,10 @@ def test_Deployment_3_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     component_cloud_name1 = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.1"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I create a deployment configuration for deployment Deployment1 with components
     #   | HelloWorld | 1.0.1 |
@@ -431,13 +368,13 @@ def test_Deployment_3_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "FAILED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component BrokenComponent is BROKEN
+    # And after 10 seconds I can check the cli to see the status of component BrokenComponent is BROKEN
     # GG LITE CLI cannot yet do this, so we rely on systemctl.
-    assert (system_interface.check_systemctl_status_for_component(
-        broken_component_cloud_name[0]) == "NOT_RUNNING")
+    assert settles_within(unit_state_probe(system_interface,
+                                           broken_component_cloud_name[0],
+                                           "NOT_RUNNING"),
+                          10,
+                          reason="BrokenComponent to stay stopped")
 
     # When I upload component "BrokenComponent" version "1.0.2" from the local store
     # Then I ensure component "BrokenComponent" version "1.0.2" exists on cloud within 60 seconds
@@ -492,13 +429,13 @@ def test_Deployment_3_T4(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "FAILED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component BrokenComponent is BROKEN
+    # And after 10 seconds I can check the cli to see the status of component BrokenComponent is BROKEN
     # GG LITE CLI cannot yet do this, so we rely on systemctl.
-    assert (system_interface.check_systemctl_status_for_component(
-        broken_component_cloud_name[0]) == "NOT_RUNNING")
+    assert settles_within(unit_state_probe(system_interface,
+                                           broken_component_cloud_name[0],
+                                           "NOT_RUNNING"),
+                          10,
+                          reason="BrokenComponent to stay stopped")
 
     # When I upload component "BrokenComponent" version "1.0.1" from the local store
     # Then I ensure component "BrokenComponent" version "1.0.1" exists on cloud within 60 seconds
@@ -550,21 +487,23 @@ def test_Deployment_3_T5(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "FAILED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component BrokenComponent is BROKEN
+    # And after 10 seconds I can check the cli to see the status of component BrokenComponent is BROKEN
     # GG LITE CLI cannot yet do this, so we rely on systemctl.
-    assert (system_interface.check_systemctl_status_for_component(
-        broken_component_cloud_name[0]) == "NOT_RUNNING")
+    assert settles_within(unit_state_probe(system_interface,
+                                           broken_component_cloud_name[0],
+                                           "NOT_RUNNING"),
+                          10,
+                          reason="BrokenComponent to stay stopped")
 
     # When I upload component "HelloWorld" version "1.0.0" from the local store
     # Then I ensure component "HelloWorld" version "1.0.0" exists on cloud within 60 seconds
     hello_world_cloud_name = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I create a deployment configuration for deployment Deployment2 with components
     #     | HelloWorld | 1.0.0 |
@@ -603,13 +542,9 @@ def test_Deployment_5_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
                                                "Component2Base=1.0.0",
                                                group_name=first_group)
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "Component2Base") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("Component2Base",
+                                         "RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "Component2Base") == "RUNNING"
     assert system_interface.check_systemctl_status_for_component(
@@ -621,13 +556,9 @@ def test_Deployment_5_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
                                                "Component2Base=1.0.0",
                                                group_name=second_group)
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "Component2Base") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("Component2Base",
+                                         "RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "Component2Base") == "RUNNING"
 
@@ -639,9 +570,10 @@ def test_Deployment_5_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         group_name=first_group,
         remove_components=["Component2Base"])
 
-    # Wait for the remove deployment to settle
-    for _ in range(30):
-        sleep_with_log(1)
+    # Let the remove deployment settle, ending early if Component2Base stops
+    holds_for(unit_state_probe(system_interface, "Component2Base", "RUNNING"),
+              30,
+              reason="let the remove deployment settle")
 
     # Component2Base should still be RUNNING because it's still in SecondThingGroup
     assert system_interface.check_systemctl_status_for_component(
@@ -932,20 +864,18 @@ def test_Deployment_8_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_c) == "SUCCEEDED")
 
-    # Then I can check the cli to see the component componentGroupA is listed within 5 seconds
-    assert system_interface.monitor_journalctl_for_message(
-        f"ggl.{component_group_A_cloud_name[0]}.service",
-        "Evergreen says Hello", 5)
-
-    # Then I can check the cli to see the component componentGroupB is listed within 5 seconds
-    assert system_interface.monitor_journalctl_for_message(
-        f"ggl.{component_group_B_cloud_name[0]}.service",
-        "Evergreen says Hello", 5)
-
-    # Then I can check the cli to see the component componentGroupC is listed within 5 seconds
-    assert system_interface.monitor_journalctl_for_message(
-        f"ggl.{component_group_C_cloud_name[0]}.service",
-        "Evergreen says Hello", 5)
+    # Then I can check the cli to see the components componentGroupA,
+    # componentGroupB and componentGroupC are listed within 5 seconds
+    matches = system_interface.wait_for_messages(
+        {
+            f"ggl.{name}.service": ["Evergreen says Hello"]
+            for name in (component_group_A_cloud_name[0],
+                         component_group_B_cloud_name[0],
+                         component_group_C_cloud_name[0])
+        },
+        timeout=5)
+    assert all(record is not None for found in matches.values()
+               for record in found.values())
 
 
 # Scenario: Deployment-8-T3: As a device application owner, I can remove device from thing
@@ -1001,8 +931,18 @@ def test_Deployment_8_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         a_thing_name, b_thing_group_name)
     assert b_thing_group_result is True
 
-    # Wait for thing group membership changes to propagate
-    sleep_with_log(30)
+    # Wait for thing group membership changes to propagate to Greengrass
+    left_a = gg_util_obj.core_device_group_probe(a_thing_name,
+                                                 a_thing_group_name,
+                                                 member=False)
+    assert wait_until(left_a,
+                      60,
+                      reason="Greengrass to see the device leave GroupA")
+    joined_b = gg_util_obj.core_device_group_probe(a_thing_name,
+                                                   b_thing_group_name)
+    assert wait_until(joined_b,
+                      60,
+                      reason="Greengrass to see the device join GroupB")
 
     # When I create a deployment configuration for deployment deployment2 and thing group GroupB with components
     #     | HelloWorld | 1.0.1 |
@@ -1344,13 +1284,9 @@ def test_Deployment_19_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert gg_util_obj.create_local_deployment(
         None, component_recipe_dir, "SampleComponentWithConfiguration=1.0.0")
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "SampleComponentWithConfiguration") == "RUNNING"
 
@@ -1361,13 +1297,9 @@ def test_Deployment_19_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         None,
         remove_components=["SampleComponentWithConfiguration"])
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "NOT_RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "NOT_RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "SampleComponentWithConfiguration") == "NOT_RUNNING"
 
@@ -1389,13 +1321,9 @@ def test_Deployment_19_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "SampleComponentWithConfiguration=1.0.0",
         group_name=group_name)
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "SampleComponentWithConfiguration") == "RUNNING"
 
@@ -1417,13 +1345,9 @@ def test_Deployment_19_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "SampleComponentWithConfiguration=1.0.0",
         group_name=group_name)
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "SampleComponentWithConfiguration") == "RUNNING"
 
@@ -1435,13 +1359,9 @@ def test_Deployment_19_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         group_name=group_name,
         remove_components=["SampleComponentWithConfiguration"])
 
-    timeout = 180
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithConfiguration") == "NOT_RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithConfiguration",
+                                         "NOT_RUNNING",
+                                         timeout=180)
     assert system_interface.check_systemctl_status_for_component(
         "SampleComponentWithConfiguration") == "NOT_RUNNING"
 
@@ -1470,7 +1390,9 @@ def _create_endpoint_switch_deployment(
     merge_config to the specified thing group. Returns deployment
     ID."""
     version = source_gg_util_obj.create_nucleus_lite_component(thing_name)
-    sleep_with_log(5, "waiting for component to be DEPLOYABLE")
+    assert wait_until(source_gg_util_obj.deployable_probe(),
+                      60,
+                      reason="waiting for component to be DEPLOYABLE")
 
     component = ComponentDeploymentInfo(
         name="aws.greengrass.NucleusLite",
@@ -1578,6 +1500,7 @@ def test_Deployment_20_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
 # Provisions IoT resources in the destination region, deploys the
 # destination endpoints, and verifies the device connects to the
 # destination region.
+@mark.full_setup    # switches the device to another region
 def test_Deployment_20_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
                           system_interface: SystemInterface):
     thing_name = iot_obj.thing_name
@@ -1630,7 +1553,7 @@ def test_Deployment_20_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         # Core device deletion fails if triggered immediately after
         # registration due to a race condition. Sleep before cleanup
         # to allow registration to complete.
-        sleep_with_log(5)
+        sleep_with_log(5, "let core device registration complete")
         dest_iot_obj.clean_up()
 
 
@@ -1638,6 +1561,7 @@ def test_Deployment_20_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
 # Deploys TesCredentialVerifier (HARD dep on TES), verifies it prints
 # source credentials, performs endpoint switch, and verifies the
 # component prints destination credentials after the cascade restart.
+@mark.full_setup    # switches the device to another region
 def test_Deployment_20_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
                           system_interface: SystemInterface):
     thing_name = iot_obj.thing_name
@@ -1667,10 +1591,11 @@ def test_Deployment_20_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         thing_group_arn = gg_util_obj.get_thing_group_arn(thing_group_name)
         verifier_info = gg_util_obj.upload_component_with_versions(
             "TesCredentialVerifier", ["1.0.0"])
-        sleep_with_log(5, "waiting for component to be DEPLOYABLE")
 
         nucleus_version = gg_util_obj.create_nucleus_lite_component(thing_name)
-        sleep_with_log(5, "waiting for NucleusLite component")
+        assert wait_until(gg_util_obj.deployable_probe(),
+                          60,
+                          reason="waiting for components to be DEPLOYABLE")
 
         nucleus_component = ComponentDeploymentInfo(
             name="aws.greengrass.NucleusLite",
@@ -1719,7 +1644,8 @@ def test_Deployment_20_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         assert (system_interface.monitor_journalctl_for_message(
             service_name, f".iot.{dest_region}.", timeout=30) is True)
     finally:
-        sleep_with_log(5)
+        # Same registration race as Deployment-20-T2.
+        sleep_with_log(5, "let core device registration complete")
         dest_iot_obj.clean_up()
 
 
@@ -1737,7 +1663,9 @@ def test_Deployment_21_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     # Upload and deploy SampleComponentWithConfiguration with default config
     component_info = gg_util_obj.upload_component_with_versions(
         "SampleComponentWithConfiguration", ["1.0.0"])
-    sleep_with_log(5)
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     thing_group_arn = gg_util_obj.get_thing_group_arn(new_thing_group_name)
     deployment_id = gg_util_obj.create_deployment(
@@ -1,52 +1,8 @@
-from typing import Generator
-from GGTestUtils import sleep_with_log
-from pytest import fixture
 from src.IoTUtils import IoTUtils
-from src.GGTestUtils import GGTestUtils
+from src.GGTestUtils import GGTestUtils, holds_for, wait_until
 from src.SystemInterface import SystemInterface
 
 import time
-import src.GGLSetup as ggl_setup
-
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    gg_util_obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    iot_obj = IoTUtils(region)
-
-    iot_obj.set_up_core_device()
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-
-    yield iot_obj
-
-    ggl_setup.clean_up()
-    iot_obj.clean_up()
-
-
-@fixture(scope="function")    # Runs for each test function
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-
-    # yield the instance of the class to the tests.
-    yield interface
-
-    # This section is called AFTER the test is run.
-    pass
 
 
 # Scenario: FleetStatus-1-T1: As a customer I can get thing information with components whose statuses have changed after an IoT Jobs deployment succeeds
@@ -64,8 +20,10 @@ def test_FleetStatus_1_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     component_cloud_name = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I create a deployment configuration for deployment FirstDeployment and thing group FssThingGroup with components
     #        | HelloWorld | 1.0.0 |
@@ -104,7 +62,9 @@ def test_FleetStatus_1_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     # Then I ensure component "BrokenAfterDeployed" version "1.0.0" exists on cloud within 60 seconds
     broken_component_cloud_name = gg_util_obj.upload_component_with_versions(
         "BrokenAfterDeployed", ["1.0.0"])
-    sleep_with_log(10)
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     #    And I create a deployment configuration for deployment FirstDeployment and thing group FssThingGroup with components
     #        | BrokenAfterDeployed | 1.0.0 |
@@ -139,7 +99,9 @@ def test_FleetStatus_2_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     # When I upload component "HelloWorld" version "1.0.0" (runs healthy)
     component_cloud_name = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
-    sleep_with_log(5)
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # And I create and deploy a deployment with HelloWorld
     deployment_id = gg_util_obj.create_deployment(
@@ -157,9 +119,12 @@ def test_FleetStatus_2_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_ggcore_device_status(60, fss_thing_group_name,
                                                   "HEALTHY"))
 
-    # Wait 20s past the event-based forwarding window to confirm the
-    # RUNNING terminal-state broadcast does NOT degrade the device status
-    sleep_with_log(20, "waiting past event-based forwarding window")
+    # Watch the device for 20s past the event-based forwarding window to
+    # confirm the RUNNING terminal-state broadcast does NOT degrade its status
+    healthy = gg_util_obj.core_device_status_probe(fss_thing_name, "HEALTHY")
+    assert holds_for(healthy,
+                     20,
+                     reason="waiting past event-based forwarding window")
 
     # Then the device is STILL HEALTHY — a RUNNING terminal-state
     # broadcast must not cause a false UNHEALTHY via the event path
@@ -184,8 +149,10 @@ def test_FleetStatus_1_T2(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     broken_cloud = gg_util_obj.upload_component_with_versions(
         "BrokenComponent", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I create and deploy deployment FirstDeployment with BrokenComponent
     deployment_id = gg_util_obj.create_deployment(
@@ -221,8 +188,10 @@ def test_FleetStatus_1_T5(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     component_cloud = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # When I create and deploy deployment FirstDeployment with HelloWorld
     deployment_id = gg_util_obj.create_deployment(
@@ -273,8 +242,10 @@ def test_FleetStatus_UninstalledReporting_T1(iot_obj: IoTUtils,
     component_cloud = gg_util_obj.upload_component_with_versions(
         "HelloWorld", ["1.0.0"])
 
-    # Give 5 sec for cloud to calculate artifact checksum and make it "DEPLOYABLE"
-    sleep_with_log(5)
+    # Wait for cloud to calculate artifact checksum and make it "DEPLOYABLE"
+    assert wait_until(gg_util_obj.deployable_probe(),
+                      60,
+                      reason="let cloud mark the component DEPLOYABLE")
 
     # And I deploy a deployment with HelloWorld to the thing group
     deployment_id = gg_util_obj.create_deployment(
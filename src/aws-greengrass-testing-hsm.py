@@ -1,27 +1,15 @@
 from typing import Generator
 from pytest import fixture, mark
 from src.IoTUtils import IoTUtils
-from src.GGTestUtils import GGTestUtils
+from src.GGTestUtils import GGTestUtils, log_probe, wait_until
 from src.SystemInterface import SystemInterface
 
-import time
 import subprocess
 import sqlite3
 import src.GGLSetup as ggl_setup
 
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    gg_util_obj.cleanup()
+# The TPM keys are set up on a pristine device of each test.
+pytestmark = mark.full_setup
 
 
 @fixture(scope="function")
@@ -48,17 +36,6 @@ def iot_obj(request) -> Generator[IoTUtils, None, None]:
     iot_obj.clean_up()
 
 
-@fixture(scope="function")    # Runs for each test function
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-
-    # yield the instance of the class to the tests.
-    yield interface
-
-    # This section is called AFTER the test is run.
-    pass
-
-
 # Scenario: test_HSM_1_T1: As a customer, I want to store the private key for secret encryption in a TPM/HSM
 # Given my device has already run the nucleus lite, and the key is stored in the TPM,
 # I want to reboot the nucleus lite and test with the MQTT pub/sub on the topic.
@@ -189,20 +166,26 @@ def test_HSM_2_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         timeout=60) is True)
 
     # Reboot to verify TPM key persistence
+    service_name = "ggl." + pubsub_cloud_name[0] + ".service"
+    subscribed = system_interface.count_journal_messages(
+        service_name, "Successfully subscribed to test/topic")
+    published = system_interface.count_journal_messages(
+        service_name, "Successfully published to test/topic")
     print("Restarting Greengrass to verify TPM key persistence...")
     assert system_interface.restart_systemd_nucleus_lite(timeout=60) is True
-    time.sleep(10)
 
     # Verify MQTT connectivity persists after reboot
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl." + pubsub_cloud_name[0] + ".service",
-        "Successfully subscribed to test/topic",
-        timeout=60) is True)
-
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl." + pubsub_cloud_name[0] + ".service",
-        "Successfully published to test/topic",
-        timeout=60) is True)
+    assert wait_until(log_probe(system_interface, service_name,
+                                "Successfully subscribed to test/topic",
+                                subscribed + 1),
+                      70,
+                      reason="component to subscribe again after restart")
+
+    assert wait_until(log_probe(system_interface, service_name,
+                                "Successfully published to test/topic",
+                                published + 1),
+                      70,
+                      reason="component to publish again after restart")
 
     # Cleanup
     cleanup_result = subprocess.run(
@@ -1,52 +1,9 @@
-from typing import Generator
-from GGTestUtils import sleep_with_log
-from pytest import fixture, mark
+from pytest import mark
 from src.IoTUtils import IoTUtils
 from src.GGTestUtils import GGTestUtils
 from src.SystemInterface import SystemInterface
 
 import time
-import src.GGLSetup as ggl_setup
-
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    gg_util_obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    iot_obj = IoTUtils(region)
-
-    iot_obj.set_up_core_device()
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-
-    yield iot_obj
-
-    ggl_setup.clean_up()
-    iot_obj.clean_up()
-
-
-@fixture(scope="function")    # Runs for each test function
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-
-    # yield the instance of the class to the tests.
-    yield interface
-
-    # This section is called AFTER the test is run.
-    pass
 
 
 #Scenario: Runtime-1-T4: As a component developer, if a state transition keeps timing out, then I expect my component
@@ -126,22 +83,14 @@ def test_Runtime_1_T9(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         None, component_recipe_dir, "component_with_soft_dep=1.0.0"))
 
     # Then I can check component_with_soft_dep is in state RUNNING within 30 seconds
-    timeout = 30
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "component_with_soft_dep") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("component_with_soft_dep",
+                                         "RUNNING",
+                                         timeout=30)
 
     # And I can check broken_soft_dep is in state BROKEN within 10 seconds
-    timeout = 10
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "broken_soft_dep") == "NOT_RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("broken_soft_dep",
+                                         "NOT_RUNNING",
+                                         timeout=10)
 
 
 # Scenario: Runtime-25-T1: As a device application owner, I can expect Greengrass-owner components being robust and can
@@ -156,13 +105,9 @@ def test_Runtime_25_T1(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         component_artifacts_dir, component_recipe_dir,
         "SampleComponentWithArtifacts=1.0.0"))
     # And I can check SampleComponentWithArtifacts is in state RUNNING within 30 seconds
-    timeout = 30
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "SampleComponentWithArtifacts") == "RUNNING":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("SampleComponentWithArtifacts",
+                                         "RUNNING",
+                                         timeout=30)
     # When I kill the kernel
     success_status = system_interface.stop_systemd_nucleus_lite(30)
 
@@ -184,15 +129,10 @@ def test_Runtime_28_T3(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         None, component_recipe_dir, "process_status_component_privilege=0.0.0"))
 
     # Then I can check the cli to see the status of component process_status_component_privilege is FINISHED
-    timeout = 10
-    while timeout > 0:
-        if system_interface.check_systemctl_status_for_component(
-                "process_status_component_privilege") == "FINISHED":
-            break
-        sleep_with_log(1)
-        timeout -= 1
+    system_interface.wait_for_unit_state("process_status_component_privilege",
+                                         "FINISHED",
+                                         timeout=15)
 
     # And I get assertions that the process was running as privileged user
-    sleep_with_log(5)    #wait for process to finish
     assert (system_interface.check_systemd_user(
         "process_status_component_privilege", 15) == "User=root\n")
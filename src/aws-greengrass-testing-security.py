@@ -1,53 +1,10 @@
-from typing import Generator, List, Tuple
-from GGTestUtils import sleep_with_log
-from pytest import fixture, mark
+from typing import List, Tuple
+from pytest import mark
 from src.IoTUtils import IoTUtils
-from src.GGTestUtils import GGTestUtils
+from src.GGTestUtils import GGTestUtils, log_probe, wait_until
 from src.SystemInterface import SystemInterface
 
 import time
-import src.GGLSetup as ggl_setup
-
-
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    gg_util_obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    iot_obj = IoTUtils(region)
-
-    iot_obj.set_up_core_device()
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-
-    yield iot_obj
-
-    ggl_setup.clean_up()
-    iot_obj.clean_up()
-
-
-@fixture(scope="function")    # Runs for each test function
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-
-    # yield the instance of the class to the tests.
-    yield interface
-
-    # This section is called AFTER the test is run.
-    pass
-
 
 ACL_TEST_TOPICS: List[Tuple[str, str, bool]] = [
     (r"test/topic", r"test/topic", True),
@@ -210,13 +167,11 @@ def test_Security_6_T6(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         240, deployment_id) == "SUCCEEDED")
 
-    sleep_with_log(5)
-
     # And I get 1 assertion with context "Successfully subscribed to test/topic"
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + pubsub_cloud_name[0] + ".service",
         "Successfully subscribed to test/topic",
-        timeout=60) is True)
+        timeout=65) is True)
 
     #And I get 1 assertion with context "Successfully published to test/topic"
     assert (system_interface.monitor_journalctl_for_message(
@@ -264,7 +219,12 @@ def test_Security_6_T7(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "Successfully published to test/topic",
         timeout=20) is True)
 
-    sleep_with_log(5)
+    # Messages logged after the restart are told apart by their count.
+    service_name = "ggl." + pubsub_cloud_name[0] + ".service"
+    subscribed = system_interface.count_journal_messages(
+        service_name, "Successfully subscribed to test/topic")
+    published = system_interface.count_journal_messages(
+        service_name, "Successfully published to test/topic")
 
     # When I restart the kernel
     assert (system_interface.restart_systemd_nucleus_lite(30) is True)
@@ -273,19 +233,19 @@ def test_Security_6_T7(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (system_interface.check_systemctl_status_for_component(
         pubsub_cloud_name[0]) == "RUNNING")
 
-    sleep_with_log(5)
-
     # And I get 1 assertion with context "Successfully subscribed to test/topic"
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl." + pubsub_cloud_name[0] + ".service",
-        "Successfully subscribed to test/topic",
-        timeout=20) is True)
+    assert wait_until(log_probe(system_interface, service_name,
+                                "Successfully subscribed to test/topic",
+                                subscribed + 1),
+                      25,
+                      reason="component to subscribe again after restart")
 
     # And I get 1 assertion with context "Successfully published to test/topic"
-    assert (system_interface.monitor_journalctl_for_message(
-        "ggl." + pubsub_cloud_name[0] + ".service",
-        "Successfully published to test/topic",
-        timeout=20) is True)
+    assert wait_until(log_probe(system_interface, service_name,
+                                "Successfully published to test/topic",
+                                published + 1),
+                      25,
+                      reason="component to publish again after restart")
 
 
 # Scenario: Security-6-T15: As a service owner, when I remove a component, all of that component's ACLs are removed as well
@@ -336,14 +296,12 @@ def test_Security_6_T15(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     print(f"The deployment ({deployment_id}): {deployment_result}")
     assert (deployment_result == 'SUCCEEDED')
 
-    sleep_with_log(20, "waiting for component to start and publish messages")
-
     # And I get 1 assertion with context "Successfully subscribed to test/topic"
     # And I get 1 assertion with context "Successfully published to test/topic"
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + hello_world_pubSub[0] + ".service",
         "Successfully published 1 message(s)",
-        timeout=30) is True)
+        timeout=50) is True)
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + hello_world_pubSub[0] + ".service",
         "Received new message on topic test/topic: Hello from local pubsub topic",
@@ -375,11 +333,9 @@ def test_Security_6_T15(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     print(f"The deployment ({deployment_id}): {deployment_result}")
     assert (deployment_result == 'FAILED')
 
-    sleep_with_log(5)
-
     # And I get 1 assertion with context "IPC error"
     assert (system_interface.monitor_journalctl_for_message(
-        "ggl." + hello_world_pubSub[0] + ".service", "IPC error", timeout=20)
+        "ggl." + hello_world_pubSub[0] + ".service", "IPC error", timeout=25)
             is True)
 
 
@@ -414,13 +370,11 @@ def test_Security_6_T22(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_1) == "SUCCEEDED")
 
-    sleep_with_log(5)
-
     # And I get 1 assertion with context "Subscribed to pubsub topic"
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + subscriber_cloud_name[0] + ".service",
         "Subscribed to pubsub topic",
-        timeout=20) is True)
+        timeout=25) is True)
 
     # And I get 1 assertion with context "Published to pubsub topic"
     assert (system_interface.monitor_journalctl_for_message(
@@ -434,8 +388,6 @@ def test_Security_6_T22(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
         "Received new message: Hello world",
         timeout=20) is True)
 
-    sleep_with_log(5)
-
     # And I install the component PubsubPublisher version 0.0.0 from local store with replaced configuration and restart
     publisher_cloud_name = publisher_cloud_name._replace(
         merge_config={
@@ -458,13 +410,11 @@ def test_Security_6_T22(iot_obj: IoTUtils, gg_util_obj: GGTestUtils,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_2) == "FAILED")
 
-    sleep_with_log(5)
-
     # And I get 1 assertion with context "Subscribed to pubsub topic"
     assert (system_interface.monitor_journalctl_for_message(
         "ggl." + subscriber_cloud_name[0] + ".service",
         "Subscribed to pubsub topic",
-        timeout=20) is True)
+        timeout=25) is True)
 
     # And I get 1 assertion with context "UnauthorizedError"
     assert (system_interface.monitor_journalctl_for_message(
@@ -1,61 +1,19 @@
 from typing import Generator
-from GGTestUtils import sleep_with_log
 from pytest import fixture
 import pytest
 from src.IoTUtils import IoTUtils
-from src.GGTestUtils import GGTestUtils
+from src.GGTestUtils import (GGTestUtils, settles_within, unit_state_probe,
+                             wait_until)
 from src.SystemInterface import SystemInterface
 
 import time
 import boto3
 from botocore.config import Config
-import src.GGLSetup as ggl_setup
 
 # Adaptive retry config: absorb CloudWatch Logs API throttling under parallel UAT load.
 THROTTLE_RETRY_CONFIG = Config(retries={"max_attempts": 10, "mode": "adaptive"})
 
 
-@fixture(scope="function")
-def gg_util_obj(request) -> Generator[GGTestUtils, None, None]:
-    aws_account = request.config.getoption("--aws-account")
-    s3_bucket = request.config.getoption("--s3-bucket")
-    region = request.config.getoption("--region")
-    ggl_cli_path = request.config.getoption("--ggl-cli-path")
-
-    gg_util_obj = GGTestUtils(aws_account, s3_bucket, region, ggl_cli_path)
-
-    yield gg_util_obj
-
-    # CloudWatch cleanup should happen before GGTestUtils cleanup
-    # to avoid the SystemLogForwarder component deleting log groups
-    gg_util_obj.cleanup()
-
-
-@fixture(scope="function")
-def iot_obj(request) -> Generator[IoTUtils, None, None]:
-    region = request.config.getoption("--region")
-    commit_id = request.config.getoption("--commit-id")
-    iot_obj = IoTUtils(region)
-
-    print(f"Setting up IoT core device...")
-    iot_obj.set_up_core_device()
-    print(f"Installing GGL from source with commit {commit_id}...")
-    ggl_setup.setup_greengrass_lite(commit_id, region)
-    print(f"GGL setup complete")
-
-    yield iot_obj
-
-    print(f"Cleaning up GGL and IoT resources...")
-    ggl_setup.clean_up()
-    iot_obj.clean_up()
-
-
-@fixture(scope="function")
-def system_interface() -> Generator[SystemInterface, None, None]:
-    interface = SystemInterface()
-    yield interface
-
-
 @fixture(scope="function")
 def cloudwatch_cleanup(request) -> Generator[None, None, None]:
     region = request.config.getoption("--region")
@@ -145,8 +103,10 @@ def test_SLF_1_T1(iot_obj: IoTUtils, cloudwatch_cleanup,
     print(f"Component uploaded: {slf_component_cloud_name}")
 
     # Give time for cloud to process artifacts and make component deployable
-    sleep_with_log(10)
-    print(f"Waited 10 seconds for artifact processing")
+    wait_until(
+        gg_util_obj.deployable_probe(),
+        60,
+        reason="cloud to process artifacts and make component deployable")
 
     # Check component status
     try:
@@ -171,13 +131,13 @@ def test_SLF_1_T1(iot_obj: IoTUtils, cloudwatch_cleanup,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "SUCCEEDED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
+    # And after 10 seconds I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
     # GG LITE CLI cannot yet do this, so we rely on systemctl.
-    assert (system_interface.check_systemctl_status_for_component(
-        slf_component_cloud_name.name) == "RUNNING")
+    assert settles_within(unit_state_probe(system_interface,
+                                           slf_component_cloud_name.name,
+                                           "RUNNING"),
+                          10,
+                          reason="SystemLogForwarderTest to run")
 
 
 # Scenario: SLF-1-T2: As a device application owner, I can deploy SLF to my device with default filter configuration and reduced time-based configuration and observe logs show up in the cloud.
@@ -201,8 +161,10 @@ def test_SLF_1_T2(iot_obj: IoTUtils, cloudwatch_cleanup,
     print(f"Component uploaded: {slf_component_cloud_name}")
 
     # Give time for cloud to process artifacts and make component deployable
-    sleep_with_log(10)
-    print(f"Waited 10 seconds for artifact processing")
+    wait_until(
+        gg_util_obj.deployable_probe(),
+        60,
+        reason="cloud to process artifacts and make component deployable")
 
     # And I apply reduced time configuration with unique log group
     slf_component_cloud_name = slf_component_cloud_name._replace(
@@ -224,13 +186,13 @@ def test_SLF_1_T2(iot_obj: IoTUtils, cloudwatch_cleanup,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "SUCCEEDED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
+    # And after 10 seconds I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
     # GG LITE CLI cannot yet do this, so we rely on systemctl.
-    assert (system_interface.check_systemctl_status_for_component(
-        slf_component_cloud_name.name) == "RUNNING")
+    assert settles_within(unit_state_probe(system_interface,
+                                           slf_component_cloud_name.name,
+                                           "RUNNING"),
+                          10,
+                          reason="SystemLogForwarderTest to run")
 
     # Skip the journalctl monitoring for now to avoid excessive logging
     print(f"Skipping journalctl monitoring to avoid log spam")
@@ -240,21 +202,20 @@ def test_SLF_1_T2(iot_obj: IoTUtils, cloudwatch_cleanup,
     #     timeout=60) is True)
 
     # The SystemLogForwarder itself should be generating logs as a ggl.* service
-    # which will be captured by its own filter. Let's wait a bit for it to generate logs
-    print(f"SystemLogForwarder should be generating its own logs...")
-    sleep_with_log(5)
-
+    # which will be captured by its own filter.
     # Wait for logs to be uploaded to CloudWatch (maxUploadIntervalSec is 10)
-    sleep_with_log(15)
-    print(f"Waiting for logs to appear in CloudWatch...")
-
-    # Check CloudWatch logs for system logs
     logs_client = boto3.client('logs',
                                region_name=gg_util_obj._region,
                                config=THROTTLE_RETRY_CONFIG)
     log_group_name = cloudwatch_cleanup['log_group_name']
     log_stream_name = iot_obj.thing_name
+    wait_until(lambda: logs_client.get_log_events(logGroupName=log_group_name,
+                                                  logStreamName=log_stream_name,
+                                                  limit=1)["events"],
+               60,
+               reason="logs to appear in CloudWatch")
 
+    # Check CloudWatch logs for system logs
     try:
         response = logs_client.get_log_events(logGroupName=log_group_name,
                                               logStreamName=log_stream_name,
@@ -307,8 +268,10 @@ def test_SLF_1_T3(iot_obj: IoTUtils, cloudwatch_cleanup,
         })
 
     # Give time for cloud to process artifacts and make component deployable
-    sleep_with_log(10)
-    print(f"Waited 10 seconds for artifact processing")
+    wait_until(
+        gg_util_obj.deployable_probe(),
+        60,
+        reason="cloud to process artifacts and make component deployable")
 
     # Deploy the configuration
     deployment_id = gg_util_obj.create_deployment(
@@ -322,27 +285,25 @@ def test_SLF_1_T3(iot_obj: IoTUtils, cloudwatch_cleanup,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "SUCCEEDED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
-    assert (system_interface.check_systemctl_status_for_component(
-        slf_component_cloud_name.name) == "RUNNING")
+    # And after 10 seconds I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
+    assert settles_within(unit_state_probe(system_interface,
+                                           slf_component_cloud_name.name,
+                                           "RUNNING"),
+                          10,
+                          reason="SystemLogForwarderTest to run")
 
     # The SystemLogForwarder itself should be generating logs as a ggl.* service
-    # which will be captured by its own filter. Let's wait a bit for it to generate logs
-    print(f"SystemLogForwarder should be generating its own logs...")
-    sleep_with_log(5)
-
+    # which will be captured by its own filter.
     # Wait for logs to be uploaded to CloudWatch (maxUploadIntervalSec is 10)
-    sleep_with_log(15)
-    print(f"Waiting for logs to appear in CloudWatch...")
-
-    # Verify the custom log group was created by SystemLogForwarder
     logs_client = boto3.client('logs',
                                region_name=gg_util_obj._region,
                                config=THROTTLE_RETRY_CONFIG)
+    wait_until(lambda: logs_client.describe_log_groups(
+        logGroupNamePrefix=custom_log_group)["logGroups"],
+               60,
+               reason="log group to appear in CloudWatch")
 
+    # Verify the custom log group was created by SystemLogForwarder
     try:
         response = logs_client.describe_log_groups(
             logGroupNamePrefix=custom_log_group)
@@ -392,8 +353,10 @@ def test_SLF_1_T4(iot_obj: IoTUtils, cloudwatch_cleanup,
         })
 
     # Give time for cloud to process artifacts and make component deployable
-    sleep_with_log(10)
-    print(f"Waited 10 seconds for artifact processing")
+    wait_until(
+        gg_util_obj.deployable_probe(),
+        60,
+        reason="cloud to process artifacts and make component deployable")
 
     # Deploy the configuration
     deployment_id = gg_util_obj.create_deployment(
@@ -407,27 +370,26 @@ def test_SLF_1_T4(iot_obj: IoTUtils, cloudwatch_cleanup,
     assert (gg_util_obj.wait_for_deployment_till_timeout(
         180, deployment_id) == "SUCCEEDED")
 
-    # And I wait for 10 seconds
-    sleep_with_log(10)
-
-    # And I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
-    assert (system_interface.check_systemctl_status_for_component(
-        slf_component_cloud_name.name) == "RUNNING")
+    # And after 10 seconds I can check the cli to see the status of component SystemLogForwarderTest is RUNNING
+    assert settles_within(unit_state_probe(system_interface,
+                                           slf_component_cloud_name.name,
+                                           "RUNNING"),
+                          10,
+                          reason="SystemLogForwarderTest to run")
 
     # The SystemLogForwarder itself should be generating logs as a ggl.* service
-    # which will be captured by its own filter. Let's wait a bit for it to generate logs
-    print(f"SystemLogForwarder should be generating its own logs...")
-    sleep_with_log(5)
-
+    # which will be captured by its own filter.
     # Wait for logs to be uploaded to CloudWatch (maxUploadIntervalSec is 10)
-    sleep_with_log(15)
-    print(f"Waiting for logs to appear in CloudWatch...")
-
-    # Verify the custom log stream was created by SystemLogForwarder
     logs_client = boto3.client('logs',
                                region_name=gg_util_obj._region,
                                config=THROTTLE_RETRY_CONFIG)
+    wait_until(lambda: logs_client.describe_log_streams(
+        logGroupName=cloudwatch_cleanup['log_group_name'],
+        logStreamNamePrefix=custom_log_stream)["logStreams"],
+               60,
+               reason="log stream to appear in CloudWatch")
 
+    # Verify the custom log stream was created by SystemLogForwarder
     try:
         response = logs_client.describe_log_streams(
             logGroupName=cloudwatch_cleanup['log_group_name'],